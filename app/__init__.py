@@ -13,17 +13,35 @@ def create_app(config_name='default'):
     db.init_app(app)
     migrate.init_app(app, db)
 
+    # orjson-backed jsonify when available
+    from app.json_provider import init_json_provider
+    init_json_provider(app)
+
     # Import and register blueprints
     from app.routes.main import main_bp
     from app.routes.weather import weather_bp
     from app.routes.news import news_bp
     from app.routes.crypto import crypto_bp
     from app.routes.github import github_bp
+    from app.routes.aio import aio_bp
+    from app.routes.internal import internal_bp
 
     app.register_blueprint(main_bp)
     app.register_blueprint(weather_bp, url_prefix='/weather')
     app.register_blueprint(news_bp, url_prefix='/news')
     app.register_blueprint(crypto_bp, url_prefix='/crypto')
     app.register_blueprint(github_bp, url_prefix='/github')
+    app.register_blueprint(aio_bp, url_prefix='/aio')
+    app.register_blueprint(internal_bp, url_prefix='/internal')
+
+    # Compression, then HTTP caching: after_request hooks run in reverse
+    # order, so validators and 304s are decided on the uncompressed body
+    from app.compression import init_compression
+    from app.http_cache import init_http_caching
+    init_compression(app)
+    init_http_caching(app)
+
+    # The background scheduler is started by the serving entry points only
+    # (run.py, wsgi.py), not by CLI commands and scripts (see app.scheduler)
 
     return app
\ No newline at end of file
@@ -0,0 +1,305 @@
+"""
+Price Alerts
+Evaluates PriceAlert rows against price ticks. Active alerts live in an
+in-memory book: per coin and condition, a sorted array of target prices
+with the matching alert ids. An alert leaves the book as soon as it
+triggers, so every 'above' target left is higher than the last price seen
+for its coin and every 'below' target lower - a new price only has to be
+bisected into the arrays, and the alerts it crossed since the previous
+price are the prefix or suffix it cuts off. A tick costs O(log n + k) for k
+triggered alerts instead of a pass over all of them, and the triggered
+alerts are marked with one bulk UPDATE.
+
+Before each evaluation the book catches up with new rows by id, and every
+PRICE_ALERT_RECONCILE seconds it is rebuilt from the database. The rebuild
+picks up alerts edited, re-activated or deleted by other processes, and rows
+whose transactions committed out of id order. Deletes and edits made through
+the ORM in this process are applied as soon as their transaction commits.
+Until the next rebuild, an alert changed elsewhere may fire at the target the
+book last saw. The UPDATE then matches it on is_active, triggered,
+target_price and condition, so the stored alert is never marked for a
+target or direction it no longer has.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import bindparam, event, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.models import PriceAlert
+from app.api.crypto_api import CryptoAPI
+from app.api.utils.http import _config_value
+
+CONDITIONS = ('above', 'below')
+
+# Alerts a tick fired: parallel arrays of ids, target prices and conditions
+Triggered = namedtuple('Triggered', 'ids targets conditions')
+
+crypto_api = CryptoAPI()
+
+_books = {}
+_books_lock = threading.Lock()
+
+
+def _untriggered(column=PriceAlert.triggered):
+    return or_(column.is_(False), column.is_(None))
+
+
+class _Side:
+    """Target prices of one coin and condition, ascending, with their alert ids"""
+    __slots__ = ('targets', 'ids')
+
+    def __init__(self):
+        self.targets = np.empty(0, dtype=float)
+        self.ids = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, targets, ids):
+        targets = np.asarray(targets, dtype=float)
+        ids = np.asarray(ids, dtype=np.int64)
+        order = np.argsort(targets, kind='stable')
+        targets, ids = targets[order], ids[order]
+        # One merging pass: each new target goes after any equal ones
+        positions = np.searchsorted(self.targets, targets, side='right')
+        self.targets = np.insert(self.targets, positions, targets)
+        self.ids = np.insert(self.ids, positions, ids)
+
+    def discard(self, alert_id):
+        positions = np.flatnonzero(self.ids == alert_id)
+        if positions.size:
+            self.targets = np.delete(self.targets, positions)
+            self.ids = np.delete(self.ids, positions)
+        return bool(positions.size)
+
+
+class AlertBook:
+    """Active, untriggered price alerts indexed by coin, condition and target"""
+
+    def __init__(self):
+        self.sides = {}  # (coin_id, condition) -> _Side
+        self.last_prices = {}
+        self.loaded_to = 0  # Highest alert id read from the database
+        self.reconciled_at = None  # time.monotonic() of the last full load
+        self.reconciles = 0
+        self.ticks = 0
+        self.triggered = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(side) for side in self.sides.values())
+
+    def add(self, rows):
+        """Index (id, coin_id, condition, target_price) rows; returns the number added"""
+        grouped = {}
+        for alert_id, coin_id, condition, target in rows:
+            if condition not in CONDITIONS or target is None:
+                continue
+            targets, ids = grouped.setdefault((coin_id, condition), ([], []))
+            targets.append(target)
+            ids.append(alert_id)
+
+        with self._lock:
+            for key, (targets, ids) in grouped.items():
+                self.sides.setdefault(key, _Side()).add(targets, ids)
+        return sum(len(ids) for _, ids in grouped.values())
+
+    def discard(self, alert_id):
+        """Drop an alert wherever it is indexed"""
+        with self._lock:
+            return any([side.discard(alert_id) for side in self.sides.values()])
+
+    @staticmethod
+    def _load(after=0):
+        return db.session.execute(
+            select(PriceAlert.id, PriceAlert.coin_id, PriceAlert.condition, PriceAlert.target_price)
+            .where(PriceAlert.id > after, PriceAlert.is_active.is_(True), _untriggered())
+            .order_by(PriceAlert.id)
+        ).all()
+
+    def refresh(self, reconcile_every=300):
+        """
+        Index active alerts created since the last refresh, or rebuild the
+        whole book when the last rebuild is older than reconcile_every
+        seconds; returns the number of alerts read
+        """
+        if self.reconciled_at is None or time.monotonic() - self.reconciled_at >= reconcile_every:
+            return self.reconcile()
+        rows = self._load(self.loaded_to)
+        if rows:
+            self.loaded_to = rows[-1][0]
+        return self.add(rows)
+
+    def reconcile(self):
+        """Rebuild the book from every active alert in the database"""
+        rows = self._load()
+        rebuilt = AlertBook()
+        rebuilt.add(rows)
+        with self._lock:
+            self.sides = rebuilt.sides
+            self.loaded_to = rows[-1][0] if rows else 0
+            self.reconciled_at = time.monotonic()
+            self.reconciles += 1
+        return len(rows)
+
+    def reset(self):
+        """Forget everything; the next refresh rebuilds from the database"""
+        with self._lock:
+            self.sides = {}
+            self.loaded_to = 0
+            self.reconciled_at = None
+
+    def coins(self):
+        with self._lock:
+            return sorted({coin_id for (coin_id, _), side in self.sides.items() if len(side)})
+
+    def tick(self, prices):
+        """
+        Apply new prices ({coin_id: price}); returns the alerts that
+        triggered (Triggered), which leave the book
+        """
+        hits = []
+        with self._lock:
+            self.ticks += 1
+            for coin_id, price in prices.items():
+                if price is None:
+                    continue
+                above = self.sides.get((coin_id, 'above'))
+                if above is not None and len(above):
+                    cut = np.searchsorted(above.targets, price, side='right')
+                    if cut:
+                        hits.append((above.ids[:cut], above.targets[:cut], 'above'))
+                        above.targets, above.ids = above.targets[cut:], above.ids[cut:]
+                below = self.sides.get((coin_id, 'below'))
+                if below is not None and len(below):
+                    cut = np.searchsorted(below.targets, price, side='left')
+                    if cut < len(below):
+                        hits.append((below.ids[cut:], below.targets[cut:], 'below'))
+                        below.targets, below.ids = below.targets[:cut], below.ids[:cut]
+                self.last_prices[coin_id] = price
+            if hits:
+                triggered = Triggered(np.concatenate([ids for ids, _, _ in hits]),
+                                      np.concatenate([targets for _, targets, _ in hits]),
+                                      np.concatenate([np.full(len(ids), condition) for ids, _, condition in hits]))
+            else:
+                triggered = Triggered(np.empty(0, dtype=np.int64), np.empty(0), np.empty(0, dtype=str))
+            self.triggered += len(triggered.ids)
+        return triggered
+
+    def stats(self):
+        return {
+            'alerts': len(self),
+            'coins': len(self.coins()),
+            'loaded_to': self.loaded_to,
+            'reconciles': self.reconciles,
+            'ticks': self.ticks,
+            'triggered': self.triggered
+        }
+
+
+def get_alert_book():
+    """Return the process-wide alert book for the current database"""
+    url = str(db.engine.url)
+    book = _books.get(url)
+    if book is None:
+        with _books_lock:
+            book = _books.setdefault(url, AlertBook())
+    return book
+
+
+def mark_triggered(triggered, when=None):
+    """
+    Set triggered/triggered_at in one bulk UPDATE on the alerts that are still
+    active with the target and condition they fired at; returns rows updated
+    """
+    when = when or datetime.utcnow()
+    table = PriceAlert.__table__
+    statement = (
+        table.update()
+        .where(table.c.id == bindparam('alert_id'),
+               table.c.target_price == bindparam('target'),
+               table.c.condition == bindparam('fired_condition'),
+               table.c.is_active.is_(True),
+               _untriggered(table.c.triggered))
+        .values(triggered=True, triggered_at=when)
+    )
+    params = [{'alert_id': int(alert_id), 'target': float(target), 'fired_condition': str(condition)}
+              for alert_id, target, condition in zip(*triggered)]
+    result = db.session.connection().execute(statement, params)
+    db.session.commit()
+    return result.rowcount
+
+
+def evaluate(prices):
+    """Tick the book with {coin_id: price} and mark what triggered; returns the count"""
+    book = get_alert_book()
+    triggered = book.tick(prices)
+    if not len(triggered.ids):
+        return 0
+    try:
+        return mark_triggered(triggered)
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        print(f"Price alert error: {e}")
+        # The triggered alerts already left the book: rebuild it so they are retried
+        book.reset()
+        return 0
+
+
+def check_alerts():
+    """Refresh the book, price all of its coins with one lookup and evaluate"""
+    book = get_alert_book()
+    loaded = book.refresh(_config_value('PRICE_ALERT_RECONCILE', 300))
+    coins = book.coins()
+    if not coins:
+        return {'loaded': loaded, 'coins': 0, 'triggered': 0}
+    prices = crypto_api.get_prices(coins)
+    triggered = evaluate({coin_id: data.get('usd') for coin_id, data in prices.items()})
+    return {'loaded': loaded, 'coins': len(coins), 'triggered': triggered}
+
+
+def alert_stats():
+    return {url: book.stats() for url, book in _books.items()}
+
+
+# Keep the book in step with ORM edits once their transaction commits
+
+def _pending(alert, connection, change):
+    session = object_session(alert)
+    if session is not None:
+        session.info.setdefault('price_alert_changes', []).append((str(connection.engine.url), change))
+
+
+@event.listens_for(PriceAlert, 'after_delete')
+def _alert_deleted(mapper, connection, alert):
+    _pending(alert, connection, (alert.id, None))
+
+
+@event.listens_for(PriceAlert, 'after_update')
+def _alert_updated(mapper, connection, alert):
+    live = alert.is_active and not alert.triggered
+    _pending(alert, connection, (alert.id, (alert.coin_id, alert.condition, alert.target_price) if live else None))
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_alert_changes(session):
+    for url, (alert_id, indexed) in session.info.pop('price_alert_changes', []):
+        book = _books.get(url)
+        if book is None:
+            continue
+        book.discard(alert_id)
+        # Newer rows are picked up by the next refresh
+        if indexed is not None and alert_id <= book.loaded_to:
+            book.add([(alert_id, *indexed)])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_alert_changes(session):
+    session.info.pop('price_alert_changes', None)
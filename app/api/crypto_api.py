@@ -2,7 +2,18 @@
 Cryptocurrency API - Standalone version using CoinGecko API directly
 """
 
-import requests
+from app.api.utils.http import get_transport
+from app.api.utils.async_http import get_async_transport
+from app.api.utils.cache import cached, normalize_ids, normalize_text
+from app.api.utils.batching import get_price_batcher
+from app.api.utils.downsample import downsample_chart
+from app.api.utils.indicators import compute_indicators, parse_indicators
+
+# Cache key normalization shared by the sync and async clients
+PRICE_KEYS = {'coin_ids': normalize_ids, 'vs_currency': normalize_text}
+COIN_KEYS = {'coin_id': normalize_text, 'vs_currency': normalize_text}
+INDICATOR_KEYS = dict(COIN_KEYS, indicators=normalize_ids)
+CURRENCY_KEYS = {'vs_currency': normalize_text}
 
 class CryptoAPI:
     """Crypto API handler class - uses CoinGecko API (no API key required)"""
@@ -13,113 +24,60 @@ class CryptoAPI:
     def check_status(self):
         """Check if crypto API is available"""
         try:
-            response = requests.get(f'{self.base_url}/ping', timeout=5)
+            response = get_transport().get('coingecko', f'{self.base_url}/ping', timeout=5)
             return response.status_code == 200
         except:
             return False
     
+    @cached('crypto_prices', ttl=30, max_stale=120, normalize=PRICE_KEYS)
     def get_prices(self, coin_ids, vs_currency='usd'):
         """Get prices for multiple coins"""
         try:
-            # Convert list to comma-separated string
-            if isinstance(coin_ids, list):
-                coin_ids = ','.join(coin_ids)
-            
-            url = f'{self.base_url}/simple/price'
-            params = {
-                'ids': coin_ids,
-                'vs_currencies': vs_currency,
-                'include_24hr_change': 'true',
-                'include_market_cap': 'true',
-                'include_24h_vol': 'true'
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Reformat data to match expected structure
-            result = {}
-            for coin_id, coin_data in data.items():
-                result[coin_id] = {
-                    'usd': coin_data.get(vs_currency, 0),
-                    'usd_24h_change': coin_data.get(f'{vs_currency}_24h_change', 0),
-                    'usd_market_cap': coin_data.get(f'{vs_currency}_market_cap', 0),
-                    'usd_24h_vol': coin_data.get(f'{vs_currency}_24h_vol', 0)
-                }
-            
-            return result
+            # Concurrent lookups for other coins/currencies share one /simple/price call
+            data = get_price_batcher(self.base_url).get(
+                self._coin_list(coin_ids), vs_currency, self._fetch_simple_prices)
+            return self._format_prices(data, vs_currency)
         except Exception as e:
             print(f"Crypto API Error: {e}")
             return {}
     
+    def _fetch_simple_prices(self, coin_ids, currencies):
+        """Fetch raw /simple/price data for many coins and currencies at once"""
+        url, params = self._prices_request(coin_ids, ','.join(currencies))
+        response = get_transport().get('coingecko', url, params=params)
+        response.raise_for_status()
+        return response.json()
+    
+    @cached('crypto_coin', ttl=120, max_stale=600, normalize=COIN_KEYS)
     def get_coin_details(self, coin_id):
         """Get detailed coin information"""
         try:
-            url = f'{self.base_url}/coins/{coin_id}'
-            params = {
-                'localization': 'false',
-                'tickers': 'false',
-                'market_data': 'true',
-                'community_data': 'false',
-                'developer_data': 'false'
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
+            url, params = self._coin_details_request(coin_id)
+            response = get_transport().get('coingecko', url, params=params)
             response.raise_for_status()
-            data = response.json()
-            
-            market_data = data.get('market_data', {})
-            
-            return {
-                'id': data.get('id'),
-                'symbol': data.get('symbol', '').upper(),
-                'name': data.get('name'),
-                'image': data.get('image', {}).get('large'),
-                'current_price': market_data.get('current_price', {}).get('usd'),
-                'market_cap': market_data.get('market_cap', {}).get('usd'),
-                'market_cap_rank': data.get('market_cap_rank'),
-                'total_volume': market_data.get('total_volume', {}).get('usd'),
-                'high_24h': market_data.get('high_24h', {}).get('usd'),
-                'low_24h': market_data.get('low_24h', {}).get('usd'),
-                'price_change_24h': market_data.get('price_change_24h'),
-                'price_change_percentage_24h': market_data.get('price_change_percentage_24h'),
-                'circulating_supply': market_data.get('circulating_supply'),
-                'total_supply': market_data.get('total_supply')
-            }
+            return self._format_coin_details(response.json())
         except Exception as e:
             print(f"Crypto API Error: {e}")
             return None
     
+    @cached('crypto_trending', ttl=300, max_stale=900, cache_if=lambda result: bool(result.get('coins')))
     def get_trending(self):
         """Get trending coins"""
         try:
             url = f'{self.base_url}/search/trending'
-            response = requests.get(url, timeout=10)
+            response = get_transport().get('coingecko', url)
             response.raise_for_status()
-            data = response.json()
-            
-            return {
-                'coins': data.get('coins', [])
-            }
+            return self._format_trending(response.json())
         except Exception as e:
             print(f"Crypto API Error: {e}")
             return {'coins': []}
     
+    @cached('crypto_top', ttl=60, max_stale=300, normalize=CURRENCY_KEYS)
     def get_top_coins(self, vs_currency='usd', limit=100, page=1):
         """Get top coins by market cap"""
         try:
-            url = f'{self.base_url}/coins/markets'
-            params = {
-                'vs_currency': vs_currency,
-                'order': 'market_cap_desc',
-                'per_page': limit,
-                'page': page,
-                'sparkline': 'false',
-                'price_change_percentage': '24h,7d'
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
+            url, params = self._top_coins_request(vs_currency, limit, page)
+            response = get_transport().get('coingecko', url, params=params)
             response.raise_for_status()
             data = response.json()
             
@@ -128,24 +86,233 @@ class CryptoAPI:
             print(f"Crypto API Error: {e}")
             return []
     
+    @cached('crypto_chart', ttl=300, max_stale=900, normalize=COIN_KEYS)
     def get_market_chart(self, coin_id, vs_currency='usd', days=7):
         """Get market chart data"""
         try:
-            url = f'{self.base_url}/coins/{coin_id}/market_chart'
-            params = {
-                'vs_currency': vs_currency,
-                'days': days
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
+            url, params = self._market_chart_request(coin_id, vs_currency, days)
+            response = get_transport().get('coingecko', url, params=params)
             response.raise_for_status()
-            data = response.json()
-            
-            return {
-                'prices': data.get('prices', []),
-                'market_caps': data.get('market_caps', []),
-                'total_volumes': data.get('total_volumes', [])
+            return self._format_market_chart(response.json())
+        except Exception as e:
+            print(f"Crypto API Error: {e}")
+            return None
+    
+    @cached('crypto_chart_points', ttl=300, max_stale=900, normalize=COIN_KEYS)
+    def get_downsampled_chart(self, coin_id, vs_currency='usd', days=7, points=500, method='lttb'):
+        """Get market chart data reduced to at most `points` points per series"""
+        chart = self.get_market_chart(coin_id, vs_currency, days)
+        return downsample_chart(chart, points, method) if chart else None
+    
+    @cached('crypto_indicators', ttl=300, max_stale=900, normalize=INDICATOR_KEYS)
+    def get_indicators(self, coin_id, vs_currency='usd', days=30, indicators=('sma_20',)):
+        """Compute indicators (see parse_indicators) over the market chart prices"""
+        chart = self.get_market_chart(coin_id, vs_currency, days)
+        if not chart or not chart['prices']:
+            return None
+        return compute_indicators(chart['prices'], parse_indicators(indicators))
+    
+    # Request builders and response formatters shared by the sync and async clients
+    def _coin_list(self, coin_ids):
+        # Accepts 'a,b', ['a', 'b'] and ['a,b'] (query strings pass the latter)
+        if isinstance(coin_ids, str):
+            coin_ids = [coin_ids]
+        return [coin_id.strip() for value in coin_ids for coin_id in value.split(',') if coin_id.strip()]
+    
+    def _prices_request(self, coin_ids, vs_currency):
+        # Convert list to comma-separated string
+        if isinstance(coin_ids, list):
+            coin_ids = ','.join(coin_ids)
+        
+        url = f'{self.base_url}/simple/price'
+        params = {
+            'ids': coin_ids,
+            'vs_currencies': vs_currency,
+            'include_24hr_change': 'true',
+            'include_market_cap': 'true',
+            'include_24h_vol': 'true'
+        }
+        return url, params
+    
+    def _format_prices(self, data, vs_currency):
+        # Reformat data to match expected structure
+        result = {}
+        for coin_id, coin_data in data.items():
+            result[coin_id] = {
+                'usd': coin_data.get(vs_currency, 0),
+                'usd_24h_change': coin_data.get(f'{vs_currency}_24h_change', 0),
+                'usd_market_cap': coin_data.get(f'{vs_currency}_market_cap', 0),
+                'usd_24h_vol': coin_data.get(f'{vs_currency}_24h_vol', 0)
             }
+        
+        return result
+    
+    def _coin_details_request(self, coin_id):
+        url = f'{self.base_url}/coins/{coin_id}'
+        params = {
+            'localization': 'false',
+            'tickers': 'false',
+            'market_data': 'true',
+            'community_data': 'false',
+            'developer_data': 'false'
+        }
+        return url, params
+    
+    def _format_coin_details(self, data):
+        market_data = data.get('market_data', {})
+        
+        return {
+            'id': data.get('id'),
+            'symbol': data.get('symbol', '').upper(),
+            'name': data.get('name'),
+            'image': data.get('image', {}).get('large'),
+            'current_price': market_data.get('current_price', {}).get('usd'),
+            'market_cap': market_data.get('market_cap', {}).get('usd'),
+            'market_cap_rank': data.get('market_cap_rank'),
+            'total_volume': market_data.get('total_volume', {}).get('usd'),
+            'high_24h': market_data.get('high_24h', {}).get('usd'),
+            'low_24h': market_data.get('low_24h', {}).get('usd'),
+            'price_change_24h': market_data.get('price_change_24h'),
+            'price_change_percentage_24h': market_data.get('price_change_percentage_24h'),
+            'circulating_supply': market_data.get('circulating_supply'),
+            'total_supply': market_data.get('total_supply')
+        }
+    
+    def _format_trending(self, data):
+        # Keep the {'coins': [{'item': {...}}]} shape, minus the per-currency
+        # price tables, sparklines and descriptions nobody renders
+        coins = []
+        for entry in data.get('coins', []):
+            item = entry.get('item', {})
+            details = item.get('data') or {}
+            coins.append({'item': {
+                'id': item.get('id'),
+                'coin_id': item.get('coin_id'),
+                'name': item.get('name'),
+                'symbol': item.get('symbol'),
+                'market_cap_rank': item.get('market_cap_rank'),
+                'thumb': item.get('thumb'),
+                'small': item.get('small'),
+                'score': item.get('score'),
+                'price_btc': item.get('price_btc'),
+                'data': {
+                    'price': details.get('price'),
+                    'price_change_percentage_24h': (details.get('price_change_percentage_24h') or {}).get('usd'),
+                    'market_cap': details.get('market_cap'),
+                    'total_volume': details.get('total_volume')
+                }
+            }})
+        return {'coins': coins}
+    
+    def _top_coins_request(self, vs_currency, limit, page):
+        url = f'{self.base_url}/coins/markets'
+        params = {
+            'vs_currency': vs_currency,
+            'order': 'market_cap_desc',
+            'per_page': limit,
+            'page': page,
+            'sparkline': 'false',
+            'price_change_percentage': '24h,7d'
+        }
+        return url, params
+    
+    def _market_chart_request(self, coin_id, vs_currency, days):
+        url = f'{self.base_url}/coins/{coin_id}/market_chart'
+        params = {
+            'vs_currency': vs_currency,
+            'days': days
+        }
+        return url, params
+    
+    def _format_market_chart(self, data):
+        return {
+            'prices': data.get('prices', []),
+            'market_caps': data.get('market_caps', []),
+            'total_volumes': data.get('total_volumes', [])
+        }
+
+
+class AsyncCryptoAPI(CryptoAPI):
+    """asyncio version of CryptoAPI - same results, non-blocking I/O"""
+    
+    async def _get(self, url, params=None, timeout=None):
+        response = await get_async_transport().get('coingecko', url, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    async def check_status(self):
+        """Check if crypto API is available"""
+        try:
+            response = await get_async_transport().get('coingecko', f'{self.base_url}/ping', timeout=5)
+            return response.status_code == 200
+        except Exception:
+            return False
+    
+    @cached('crypto_prices', ttl=30, max_stale=120, normalize=PRICE_KEYS)
+    async def get_prices(self, coin_ids, vs_currency='usd'):
+        """Get prices for multiple coins"""
+        try:
+            data = await get_price_batcher(self.base_url).get_async(
+                self._coin_list(coin_ids), vs_currency, self._fetch_simple_prices)
+            return self._format_prices(data, vs_currency)
+        except Exception as e:
+            print(f"Crypto API Error: {e}")
+            return {}
+    
+    async def _fetch_simple_prices(self, coin_ids, currencies):
+        """Fetch raw /simple/price data for many coins and currencies at once"""
+        url, params = self._prices_request(coin_ids, ','.join(currencies))
+        return await self._get(url, params)
+    
+    @cached('crypto_coin', ttl=120, max_stale=600, normalize=COIN_KEYS)
+    async def get_coin_details(self, coin_id):
+        """Get detailed coin information"""
+        try:
+            url, params = self._coin_details_request(coin_id)
+            return self._format_coin_details(await self._get(url, params))
+        except Exception as e:
+            print(f"Crypto API Error: {e}")
+            return None
+    
+    @cached('crypto_trending', ttl=300, max_stale=900, cache_if=lambda result: bool(result.get('coins')))
+    async def get_trending(self):
+        """Get trending coins"""
+        try:
+            return self._format_trending(await self._get(f'{self.base_url}/search/trending'))
+        except Exception as e:
+            print(f"Crypto API Error: {e}")
+            return {'coins': []}
+    
+    @cached('crypto_top', ttl=60, max_stale=300, normalize=CURRENCY_KEYS)
+    async def get_top_coins(self, vs_currency='usd', limit=100, page=1):
+        """Get top coins by market cap"""
+        try:
+            url, params = self._top_coins_request(vs_currency, limit, page)
+            return await self._get(url, params)
         except Exception as e:
             print(f"Crypto API Error: {e}")
-            return None
\ No newline at end of file
+            return []
+    
+    @cached('crypto_chart', ttl=300, max_stale=900, normalize=COIN_KEYS)
+    async def get_market_chart(self, coin_id, vs_currency='usd', days=7):
+        """Get market chart data"""
+        try:
+            url, params = self._market_chart_request(coin_id, vs_currency, days)
+            return self._format_market_chart(await self._get(url, params))
+        except Exception as e:
+            print(f"Crypto API Error: {e}")
+            return None
+    
+    @cached('crypto_chart_points', ttl=300, max_stale=900, normalize=COIN_KEYS)
+    async def get_downsampled_chart(self, coin_id, vs_currency='usd', days=7, points=500, method='lttb'):
+        """Get market chart data reduced to at most `points` points per series"""
+        chart = await self.get_market_chart(coin_id, vs_currency, days)
+        return downsample_chart(chart, points, method) if chart else None
+    
+    @cached('crypto_indicators', ttl=300, max_stale=900, normalize=INDICATOR_KEYS)
+    async def get_indicators(self, coin_id, vs_currency='usd', days=30, indicators=('sma_20',)):
+        """Compute indicators (see parse_indicators) over the market chart prices"""
+        chart = await self.get_market_chart(coin_id, vs_currency, days)
+        if not chart or not chart['prices']:
+            return None
+        return compute_indicators(chart['prices'], parse_indicators(indicators))
@@ -4,34 +4,121 @@ Core functionality for GitHub repository analysis
 """
 
 import requests
+import httpx
+import json
 import os
+import time
+from app.api.utils.http import get_transport, _config_value
+from app.api.utils.async_http import get_async_transport
+from app.api.utils.cache import coalesced, get_cache
+from app.api.utils.fanout import fan_out
+from app.api.utils.ratelimit import get_budget, is_low_priority
 from datetime import datetime
 
+# Responses answered from stored bodies after a 304 Not Modified
+conditional_stats = {'stored': 0, 'not_modified': 0}
+
+
+def _resource_for(url):
+    """GitHub rate-limit resource a request URL is counted against"""
+    return 'search' if '/search/' in url else 'core'
+
+
+def github_stats():
+    """Rate budget and conditional request counters"""
+    return dict(get_budget('github').stats(), conditional=dict(conditional_stats))
+
+
 class GitHubAnalytics:
     """GitHub API analytics handler"""
     
     def __init__(self):
         self.token = os.getenv('GITHUB_TOKEN')
         self.base_url = 'https://api.github.com'
-        self.headers = {
-            'Accept': 'application/vnd.github.v3+json'
-        }
+        self.budget = get_budget('github')
+        self.headers = {}
         if self.token:
             self.headers['Authorization'] = f'token {self.token}'
     
     def _make_request(self, endpoint, params=None):
         """Make API request with error handling"""
+        page = self._request_page(f"{self.base_url}/{endpoint}", params)
+        return page['body'] if page else None
+    
+    @coalesced('github_request')
+    def _request_page(self, url, params=None):
+        """Fetch one page; returns {'body', 'next'} or None on error"""
+        key, headers, stored = self._conditional_request(url, params)
+        if not self._within_budget(url):
+            return stored if stored else None
+        
         try:
-            url = f"{self.base_url}/{endpoint}"
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            response = get_transport().get('github', url, headers=headers, params=params)
+            return self._handle_response(url, response, key, stored)
         except requests.exceptions.RequestException as e:
             print(f"GitHub API Error: {e}")
             return None
     
+    def _iter_pages(self, endpoint, params=None, max_pages=None):
+        """Yield the body of each page of a listing, following the Link header"""
+        url = f"{self.base_url}/{endpoint}"
+        pages = 0
+        while url and (max_pages is None or pages < max_pages):
+            page = self._request_page(url, params)
+            if not page or not page['body']:
+                return
+            yield page['body']
+            pages += 1
+            # The next link already carries the query string
+            url, params = page['next'], None
+    
+    # Conditional requests and rate budget shared by the sync and async clients
+    def _conditional_request(self, url, params):
+        """Return (validator key, request headers, stored page with its validators)"""
+        key = 'github_validators:' + url + '?' + json.dumps(params or {}, sort_keys=True, default=str)
+        state, entry = get_cache().lookup(key, count=False)
+        stored = entry.value if entry is not None else None
+        
+        headers = dict(self.headers)
+        if stored:
+            if stored.get('etag'):
+                headers['If-None-Match'] = stored['etag']
+            if stored.get('last_modified'):
+                headers['If-Modified-Since'] = stored['last_modified']
+        return key, headers, stored
+    
+    def _within_budget(self, url):
+        """Whether the rate budget allows calling url now (rate_limit is free)"""
+        if url.endswith('/rate_limit'):
+            return True
+        return self.budget.allow(_resource_for(url), low=is_low_priority())
+    
+    def _handle_response(self, url, response, key, stored):
+        """Track the quota, serve the stored page on 304 and save new validators"""
+        self.budget.update(response.headers, _resource_for(url))
+        if response.status_code == 304 and stored:
+            conditional_stats['not_modified'] += 1
+            return stored
+        
+        response.raise_for_status()
+        page = {
+            'body': response.json(),
+            'next': response.links.get('next', {}).get('url'),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+        if page['etag'] or page['last_modified']:
+            conditional_stats['stored'] += 1
+            get_cache().set(key, page, _config_value('GITHUB_VALIDATOR_TTL', 86400))
+        return page
+    
     def check_rate_limit(self):
         """Check remaining API rate limit"""
+        # Answer from the headers of earlier responses when possible
+        remaining = self.budget.remaining('core')
+        if remaining is not None:
+            return remaining
+        
         data = self._make_request('rate_limit')
         if data:
             return data['rate']['remaining']
@@ -43,6 +130,9 @@ class GitHubAnalytics:
         if not data:
             return None
         
+        return self._format_repository(data)
+    
+    def _format_repository(self, data):
         return {
             'name': data['name'],
             'full_name': data['full_name'],
@@ -68,6 +158,9 @@ class GitHubAnalytics:
         if not data:
             return []
         
+        return self._format_contributors(data)
+    
+    def _format_contributors(self, data):
         contributors = []
         for contributor in data:
             contributors.append({
@@ -85,6 +178,9 @@ class GitHubAnalytics:
         if not data:
             return {}
         
+        return self._format_languages(data)
+    
+    def _format_languages(self, data):
         # Calculate percentages
         total = sum(data.values())
         percentages = {}
@@ -108,6 +204,9 @@ class GitHubAnalytics:
         if not data:
             return []
         
+        return self._format_commits(data)
+    
+    def _format_commits(self, data):
         commits = []
         for commit in data:
             commits.append({
@@ -131,6 +230,9 @@ class GitHubAnalytics:
         if not data:
             return []
         
+        return self._format_issues(data)
+    
+    def _format_issues(self, data):
         issues = []
         for issue in data:
             # Skip pull requests (they also show up in issues endpoint)
@@ -160,6 +262,9 @@ class GitHubAnalytics:
         if not data:
             return []
         
+        return self._format_pull_requests(data)
+    
+    def _format_pull_requests(self, data):
         prs = []
         for pr in data:
             prs.append({
@@ -180,6 +285,9 @@ class GitHubAnalytics:
         if not data:
             return []
         
+        return self._format_releases(data)
+    
+    def _format_releases(self, data):
         releases = []
         for release in data:
             releases.append({
@@ -190,4 +298,197 @@ class GitHubAnalytics:
                 'author': release['author']['login']
             })
         
-        return releases
\ No newline at end of file
+        return releases
+    
+    # Lazy listings: one page in memory at a time, however long the listing
+    def _iter_items(self, endpoint, params, formatter, limit=None, max_pages=None):
+        """Yield formatted items page by page, stopping after limit items"""
+        params = dict(params, per_page=min(limit, 100) if limit else 100)
+        count = 0
+        for body in self._iter_pages(endpoint, params, max_pages):
+            for item in formatter(body):
+                yield item
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+    
+    def iter_contributors(self, owner, repo, limit=None, max_pages=None):
+        """Iterate over repository contributors"""
+        return self._iter_items(f'repos/{owner}/{repo}/contributors', {},
+                                self._format_contributors, limit, max_pages)
+    
+    def iter_commits(self, owner, repo, since=None, until=None, limit=None, max_pages=None):
+        """Iterate over commit history"""
+        params = {}
+        if since:
+            params['since'] = since
+        if until:
+            params['until'] = until
+        return self._iter_items(f'repos/{owner}/{repo}/commits', params,
+                                self._format_commits, limit, max_pages)
+    
+    def iter_issues(self, owner, repo, state='all', limit=None, max_pages=None):
+        """Iterate over repository issues (pull requests excluded)"""
+        return self._iter_items(f'repos/{owner}/{repo}/issues', {'state': state},
+                                self._format_issues, limit, max_pages)
+    
+    def iter_pull_requests(self, owner, repo, state='all', limit=None, max_pages=None):
+        """Iterate over repository pull requests"""
+        return self._iter_items(f'repos/{owner}/{repo}/pulls', {'state': state},
+                                self._format_pull_requests, limit, max_pages)
+    
+    def iter_releases(self, owner, repo, limit=None, max_pages=None):
+        """Iterate over repository releases"""
+        return self._iter_items(f'repos/{owner}/{repo}/releases', {},
+                                self._format_releases, limit, max_pages)
+    
+    def build_report(self, owner, repo, max_pages=None, deadline=None):
+        """
+        Fetch every report section concurrently.
+        
+        Listings follow pagination up to max_pages pages of 100 items, and
+        each page is added to the report as soon as it arrives, so a section
+        that hits the deadline still returns the pages it got. The report
+        carries a per-section timing breakdown.
+        """
+        if max_pages is None:
+            max_pages = _config_value('GITHUB_REPORT_MAX_PAGES', 5)
+        if deadline is None:
+            deadline = _config_value('GITHUB_REPORT_DEADLINE', 30)
+        
+        base = f'repos/{owner}/{repo}'
+        listings = {
+            'contributors': (f'{base}/contributors', {'per_page': 100}, self._format_contributors),
+            'commits': (f'{base}/commits', {'per_page': 100}, self._format_commits),
+            'issues': (f'{base}/issues', {'state': 'all', 'per_page': 100}, self._format_issues),
+            'pull_requests': (f'{base}/pulls', {'state': 'all', 'per_page': 100}, self._format_pull_requests),
+            'releases': (f'{base}/releases', {'per_page': 100}, self._format_releases),
+        }
+        report = {name: [] for name in listings}
+        pages = {name: 0 for name in listings}
+        
+        def collect(name):
+            endpoint, params, formatter = listings[name]
+            def run():
+                for body in self._iter_pages(endpoint, params, max_pages):
+                    report[name].extend(formatter(body))
+                    pages[name] += 1
+            return run
+        
+        tasks = {name: collect(name) for name in listings}
+        tasks['repository'] = lambda: self.get_repository(owner, repo)
+        tasks['languages'] = lambda: self.get_languages(owner, repo)
+        
+        started = time.perf_counter()
+        results = fan_out(tasks, default_deadline=deadline)
+        
+        timings = {}
+        for name, result in results.items():
+            if name in listings:
+                # Snapshot: a timed-out section may still be appending pages
+                report[name] = list(report[name])
+            else:
+                report[name] = result['data']
+            timings[name] = {'status': result['status'], 'elapsed_ms': result['elapsed_ms']}
+            if name in listings:
+                timings[name].update(pages=pages[name], items=len(report[name]))
+        
+        report['timings'] = {
+            'sections': timings,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+            'sequential_ms': round(sum(t['elapsed_ms'] for t in timings.values()), 1),
+            'max_pages': max_pages
+        }
+        return report
+
+
+class AsyncGitHubAnalytics(GitHubAnalytics):
+    """asyncio version of GitHubAnalytics - same results, non-blocking I/O"""
+    
+    async def _make_request(self, endpoint, params=None):
+        """Make API request with error handling"""
+        page = await self._request_page(f"{self.base_url}/{endpoint}", params)
+        return page['body'] if page else None
+    
+    @coalesced('github_request')
+    async def _request_page(self, url, params=None):
+        """Fetch one page; returns {'body', 'next'} or None on error"""
+        key, headers, stored = self._conditional_request(url, params)
+        if not self._within_budget(url):
+            return stored if stored else None
+        
+        try:
+            response = await get_async_transport().get('github', url, headers=headers, params=params)
+            return self._handle_response(url, response, key, stored)
+        except (httpx.HTTPError, ValueError) as e:
+            # ValueError: a non-JSON or truncated body (requests raises a
+            # RequestException subclass for the same case on the sync path)
+            print(f"GitHub API Error: {e}")
+            return None
+    
+    async def _iter_pages(self, endpoint, params=None, max_pages=None):
+        """Yield the body of each page of a listing, following the Link header"""
+        url = f"{self.base_url}/{endpoint}"
+        pages = 0
+        while url and (max_pages is None or pages < max_pages):
+            page = await self._request_page(url, params)
+            if not page or not page['body']:
+                return
+            yield page['body']
+            pages += 1
+            url, params = page['next'], None
+    
+    async def check_rate_limit(self):
+        """Check remaining API rate limit"""
+        remaining = self.budget.remaining('core')
+        if remaining is not None:
+            return remaining
+        
+        data = await self._make_request('rate_limit')
+        if data:
+            return data['rate']['remaining']
+        return None
+    
+    async def get_repository(self, owner, repo):
+        """Get repository information"""
+        data = await self._make_request(f'repos/{owner}/{repo}')
+        return self._format_repository(data) if data else None
+    
+    async def get_contributors(self, owner, repo, limit=100):
+        """Get repository contributors"""
+        data = await self._make_request(f'repos/{owner}/{repo}/contributors',
+                                        params={'per_page': limit})
+        return self._format_contributors(data) if data else []
+    
+    async def get_languages(self, owner, repo):
+        """Get programming languages used in repository"""
+        data = await self._make_request(f'repos/{owner}/{repo}/languages')
+        return self._format_languages(data) if data else {}
+    
+    async def get_commits(self, owner, repo, since=None, until=None, limit=100):
+        """Get commit history"""
+        params = {'per_page': limit}
+        if since:
+            params['since'] = since
+        if until:
+            params['until'] = until
+        
+        data = await self._make_request(f'repos/{owner}/{repo}/commits', params=params)
+        return self._format_commits(data) if data else []
+    
+    async def get_issues(self, owner, repo, state='all', limit=100):
+        """Get repository issues"""
+        data = await self._make_request(f'repos/{owner}/{repo}/issues',
+                                        params={'state': state, 'per_page': limit})
+        return self._format_issues(data) if data else []
+    
+    async def get_pull_requests(self, owner, repo, state='all', limit=50):
+        """Get repository pull requests"""
+        data = await self._make_request(f'repos/{owner}/{repo}/pulls',
+                                        params={'state': state, 'per_page': limit})
+        return self._format_pull_requests(data) if data else []
+    
+    async def get_releases(self, owner, repo):
+        """Get repository releases"""
+        data = await self._make_request(f'repos/{owner}/{repo}/releases')
+        return self._format_releases(data) if data else []
\ No newline at end of file
@@ -4,10 +4,12 @@ Flask API - GitHub Repository Analytics
 """
 
 from flask import jsonify, request
-from app.api.github_analytics_core import GitHubAnalytics
+from app.api.github_analytics_core import GitHubAnalytics, AsyncGitHubAnalytics
 from datetime import datetime, timedelta
-import requests
-import os
+from app.api.utils.cache import cached, normalize_text
+
+# Cache key normalization shared by the sync and async clients
+SEARCH_KEYS = {'query': normalize_text, 'sort': normalize_text, 'order': normalize_text}
 
 class GitHubAPI:
     """GitHub API handler class"""
@@ -54,71 +56,71 @@ class GitHubAPI:
     def get_trending_repos(self, language=None, since='daily', limit=30):
         """Get trending repositories"""
         try:
-            # Build query based on time period
-            if since == 'daily':
-                date_filter = f"created:>={(datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')}"
-            elif since == 'weekly':
-                date_filter = f"created:>={(datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')}"
-            else:
-                date_filter = 'stars:>1000'
-            
-            query = date_filter
-            if language:
-                query += f' language:{language}'
-            
-            return self.search_repositories(query, limit=limit)
+            return self.search_repositories(self._trending_query(language, since), limit=limit)
         except Exception as e:
             print(f"GitHub Trending Error: {e}")
             return []
     
+    @cached('github_search', ttl=600, max_stale=1800, normalize=SEARCH_KEYS)
     def search_repositories(self, query, sort='stars', order='desc', page=1, per_page=30, limit=None):
         """Search GitHub repositories"""
         try:
-            url = "https://api.github.com/search/repositories"
-            params = {
-                'q': query,
-                'sort': sort,
-                'order': order,
-                'page': page,
-                'per_page': per_page if not limit else min(limit, per_page)
-            }
-            
-            headers = {'Accept': 'application/vnd.github.v3+json'}
-            token = os.getenv('GITHUB_TOKEN')
-            if token:
-                headers['Authorization'] = f'token {token}'
-            
-            response = requests.get(url, params=params, headers=headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            repos = []
-            items = data.get('items', [])
-            if limit:
-                items = items[:limit]
-            
-            for item in items:
-                repos.append({
-                    'name': item['name'],
-                    'full_name': item['full_name'],
-                    'description': item['description'],
-                    'stars': item['stargazers_count'],
-                    'stargazers_count': item['stargazers_count'],
-                    'forks': item['forks_count'],
-                    'forks_count': item['forks_count'],
-                    'language': item['language'],
-                    'url': item['html_url'],
-                    'html_url': item['html_url'],
-                    'owner': {
-                        'login': item['owner']['login']
-                    }
-                })
-            
-            return repos
+            params = self._search_params(query, sort, order, page, per_page, limit)
+            data = self.analytics._make_request('search/repositories', params=params)
+            return self._format_search_results(data, limit) if data else []
         except Exception as e:
             print(f"GitHub Search Error: {e}")
             return []
     
+    # Query builders and formatters shared by the sync and async clients
+    def _trending_query(self, language, since):
+        # Build query based on time period
+        if since == 'daily':
+            date_filter = f"created:>={(datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')}"
+        elif since == 'weekly':
+            date_filter = f"created:>={(datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')}"
+        else:
+            date_filter = 'stars:>1000'
+        
+        query = date_filter
+        if language:
+            query += f' language:{language}'
+        return query
+    
+    def _search_params(self, query, sort, order, page, per_page, limit):
+        return {
+            'q': query,
+            'sort': sort,
+            'order': order,
+            'page': page,
+            'per_page': per_page if not limit else min(limit, per_page)
+        }
+    
+    def _format_search_results(self, data, limit):
+        repos = []
+        items = data.get('items', [])
+        if limit:
+            items = items[:limit]
+        
+        for item in items:
+            repos.append({
+                'name': item['name'],
+                'full_name': item['full_name'],
+                'description': item['description'],
+                'stars': item['stargazers_count'],
+                'stargazers_count': item['stargazers_count'],
+                'forks': item['forks_count'],
+                'forks_count': item['forks_count'],
+                'language': item['language'],
+                'url': item['html_url'],
+                'html_url': item['html_url'],
+                'owner': {
+                    'login': item['owner']['login']
+                }
+            })
+        
+        return repos
+    
     # Flask route wrapper methods
     def rate_limit(self):
         """Check GitHub API rate limit"""
@@ -165,13 +167,36 @@ class GitHubAPI:
     
     def full_report(self, owner, repo):
         """Generate comprehensive analytics report"""
-        report = {
-            "repository": self.analytics.get_repository(owner, repo),
-            "contributors": self.analytics.get_contributors(owner, repo),
-            "languages": self.analytics.get_languages(owner, repo),
-            "commits": self.analytics.get_commits(owner, repo, limit=100),
-            "issues": self.analytics.get_issues(owner, repo, limit=100),
-            "pull_requests": self.analytics.get_pull_requests(owner, repo, limit=50),
-            "releases": self.analytics.get_releases(owner, repo),
-        }
-        return jsonify(report)
\ No newline at end of file
+        max_pages = request.args.get('max_pages', type=int)
+        report = self.analytics.build_report(owner, repo, max_pages=max_pages)
+        return jsonify(report)
+
+
+class AsyncGitHubAPI(GitHubAPI):
+    """asyncio version of the GitHubAPI data methods"""
+    
+    def __init__(self):
+        self.analytics = AsyncGitHubAnalytics()
+    
+    async def get_repository(self, owner, repo):
+        """Get repository information"""
+        return await self.analytics.get_repository(owner, repo)
+    
+    async def get_trending_repos(self, language=None, since='daily', limit=30):
+        """Get trending repositories"""
+        try:
+            return await self.search_repositories(self._trending_query(language, since), limit=limit)
+        except Exception as e:
+            print(f"GitHub Trending Error: {e}")
+            return []
+    
+    @cached('github_search', ttl=600, max_stale=1800, normalize=SEARCH_KEYS)
+    async def search_repositories(self, query, sort='stars', order='desc', page=1, per_page=30, limit=None):
+        """Search GitHub repositories"""
+        try:
+            params = self._search_params(query, sort, order, page, per_page, limit)
+            data = await self.analytics._make_request('search/repositories', params=params)
+            return self._format_search_results(data, limit) if data else []
+        except Exception as e:
+            print(f"GitHub Search Error: {e}")
+            return []
\ No newline at end of file
@@ -3,9 +3,21 @@ News API Wrapper
 Wraps NewsAPI functionality for Flask application
 """
 
-import requests
 import os
 from flask import current_app
+from app.api.utils.http import get_transport
+from app.api.utils.async_http import get_async_transport
+from app.api.utils.cache import cached, normalize_text
+from app import news_index
+
+# Cache key normalization shared by the sync and async clients
+HEADLINE_KEYS = {'country': normalize_text, 'category': normalize_text, 'query': normalize_text}
+SEARCH_KEYS = {'query': normalize_text, 'language': normalize_text}
+SOURCE_KEYS = {'category': normalize_text, 'language': normalize_text, 'country': normalize_text}
+
+def has_articles(result):
+    """Only cache responses that actually contain articles"""
+    return bool(result and result.get('articles'))
 
 class NewsAPI:
     def __init__(self):
@@ -29,12 +41,115 @@ class NewsAPI:
         """Check if API is configured and available"""
         return bool(self._get_api_key())
     
-    def get_top_headlines(self, country='us', category=None, query=None, page=1, page_size=20):
-        """Get top headlines"""
+    def get_top_headlines(self, country='us', category=None, query=None, page=1, page_size=20,
+                          collapse=True):
+        """
+        Get top headlines, from the ingested news store while it is fresh.
+        With collapse, near-duplicate stories are listed once.
+        """
+        local = self._headlines_local(country, category, query, page, page_size, collapse)
+        if local:
+            return local
+        result = self._headlines_upstream(country, category, query, page, page_size)
+        return news_index.collapse_duplicates(result) if collapse else result
+    
+    @cached('news_headlines', ttl=300, max_stale=900, normalize=HEADLINE_KEYS, cache_if=has_articles)
+    def _headlines_upstream(self, country='us', category=None, query=None, page=1, page_size=20):
         api_key = self._get_api_key()
         if not api_key:
             return {'articles': [], 'totalResults': 0}
         
+        endpoint, params = self._headlines_request(api_key, country, category, query, page, page_size)
+        
+        try:
+            response = get_transport().get('newsapi', endpoint, params=params)
+            response.raise_for_status()
+            data = response.json()
+            news_index.index_articles(data.get('articles'))
+            return data
+        except Exception as e:
+            print(f"News API Error: {e}")
+            return {'articles': [], 'totalResults': 0}
+    
+    def search_everything(self, query, from_date=None, to_date=None, language='en',
+                         sort_by='publishedAt', page=1, page_size=20, collapse=True):
+        """
+        Search all news articles, from the local index when it has recent
+        matches. With collapse, near-duplicate stories are listed once.
+        """
+        local = self._search_local(query, from_date, to_date, language, sort_by, page, page_size, collapse)
+        if local:
+            return local
+        result = self._search_upstream(query, from_date, to_date, language, sort_by, page, page_size)
+        return news_index.collapse_duplicates(result) if collapse else result
+    
+    @cached('news_search', ttl=600, max_stale=1800, normalize=SEARCH_KEYS, cache_if=has_articles)
+    def _search_upstream(self, query, from_date=None, to_date=None, language='en',
+                         sort_by='publishedAt', page=1, page_size=20):
+        api_key = self._get_api_key()
+        if not api_key:
+            return {'articles': [], 'totalResults': 0}
+        
+        endpoint, params = self._everything_request(api_key, query, from_date, to_date,
+                                                    language, sort_by, page, page_size)
+        
+        try:
+            response = get_transport().get('newsapi', endpoint, params=params)
+            response.raise_for_status()
+            data = response.json()
+            news_index.index_articles(data.get('articles'))
+            return data
+        except Exception as e:
+            print(f"News API Error: {e}")
+            return {'articles': [], 'totalResults': 0}
+    
+    @cached('news_sources', ttl=3600, max_stale=86400, normalize=SOURCE_KEYS)
+    def get_sources(self, category=None, language='en', country=None):
+        """Get available news sources"""
+        api_key = self._get_api_key()
+        if not api_key:
+            return []
+        
+        endpoint, params = self._sources_request(api_key, category, language, country)
+        
+        try:
+            response = get_transport().get('newsapi', endpoint, params=params)
+            response.raise_for_status()
+            data = response.json()
+            return data.get('sources', [])
+        except Exception as e:
+            print(f"News API Error: {e}")
+            return []
+    
+    def search(self, query, page_size=10):
+        """Simple search wrapper for dashboard"""
+        return self.search_everything(query, page_size=page_size)
+    
+    def _headlines_local(self, country, category, query, page, page_size, collapse):
+        """Store listing if the ingestion job keeps it fresh, else None"""
+        try:
+            if not news_index.headlines_fresh(country, category):
+                return None
+        except RuntimeError:
+            # Not in app context: no database to read
+            return None
+        return news_index.headlines(country.lower(), category and category.lower(), query,
+                                    page, page_size, collapse)
+    
+    def _search_local(self, query, from_date, to_date, language, sort_by, page, page_size, collapse):
+        """Local index result if it can stand in for NewsAPI, else None"""
+        # Indexed articles carry no language; headlines are fetched in the default one
+        try:
+            if language != current_app.config.get('NEWS_INDEX_LANGUAGE', 'en'):
+                return None
+        except RuntimeError:
+            # Not in app context: no database to search
+            return None
+        result = news_index.search(query, from_date, to_date, sort_by, page, page_size, collapse)
+        return result if news_index.is_sufficient(result, page, page_size) else None
+    
+    # Request builders shared by the sync and async clients
+    def _headlines_request(self, api_key, country, category, query, page, page_size):
         endpoint = f"{self.base_url}/top-headlines"
         params = {
             'apiKey': api_key,
@@ -47,22 +162,10 @@ class NewsAPI:
             params['category'] = category
         if query:
             params['q'] = query
-        
-        try:
-            response = requests.get(endpoint, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"News API Error: {e}")
-            return {'articles': [], 'totalResults': 0}
+        return endpoint, params
     
-    def search_everything(self, query, from_date=None, to_date=None, language='en', 
-                         sort_by='publishedAt', page=1, page_size=20):
-        """Search all news articles"""
-        api_key = self._get_api_key()
-        if not api_key:
-            return {'articles': [], 'totalResults': 0}
-        
+    def _everything_request(self, api_key, query, from_date, to_date, language,
+                            sort_by, page, page_size):
         endpoint = f"{self.base_url}/everything"
         params = {
             'apiKey': api_key,
@@ -77,21 +180,9 @@ class NewsAPI:
             params['from'] = from_date
         if to_date:
             params['to'] = to_date
-        
-        try:
-            response = requests.get(endpoint, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"News API Error: {e}")
-            return {'articles': [], 'totalResults': 0}
+        return endpoint, params
     
-    def get_sources(self, category=None, language='en', country=None):
-        """Get available news sources"""
-        api_key = self._get_api_key()
-        if not api_key:
-            return []
-        
+    def _sources_request(self, api_key, category, language, country):
         endpoint = f"{self.base_url}/top-headlines/sources"
         params = {
             'apiKey': api_key,
@@ -102,16 +193,81 @@ class NewsAPI:
             params['category'] = category
         if country:
             params['country'] = country
+        return endpoint, params
+
+
+class AsyncNewsAPI(NewsAPI):
+    """asyncio version of NewsAPI - same results, non-blocking I/O"""
+    
+    async def _get(self, endpoint, params):
+        response = await get_async_transport().get('newsapi', endpoint, params=params)
+        response.raise_for_status()
+        return response.json()
+    
+    async def get_top_headlines(self, country='us', category=None, query=None, page=1, page_size=20,
+                                collapse=True):
+        """Get top headlines, from the ingested news store while it is fresh"""
+        local = self._headlines_local(country, category, query, page, page_size, collapse)
+        if local:
+            return local
+        result = await self._headlines_upstream(country, category, query, page, page_size)
+        return news_index.collapse_duplicates(result) if collapse else result
+    
+    @cached('news_headlines', ttl=300, max_stale=900, normalize=HEADLINE_KEYS, cache_if=has_articles)
+    async def _headlines_upstream(self, country='us', category=None, query=None, page=1, page_size=20):
+        api_key = self._get_api_key()
+        if not api_key:
+            return {'articles': [], 'totalResults': 0}
         
         try:
-            response = requests.get(endpoint, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = await self._get(*self._headlines_request(api_key, country, category,
+                                                            query, page, page_size))
+            news_index.index_articles(data.get('articles'))
+            return data
+        except Exception as e:
+            print(f"News API Error: {e}")
+            return {'articles': [], 'totalResults': 0}
+    
+    async def search_everything(self, query, from_date=None, to_date=None, language='en',
+                                sort_by='publishedAt', page=1, page_size=20, collapse=True):
+        """Search all news articles, from the local index when it has recent matches"""
+        # The local index is an SQLite query; it is fast enough to run inline
+        local = self._search_local(query, from_date, to_date, language, sort_by, page, page_size, collapse)
+        if local:
+            return local
+        result = await self._search_upstream(query, from_date, to_date, language, sort_by, page, page_size)
+        return news_index.collapse_duplicates(result) if collapse else result
+    
+    @cached('news_search', ttl=600, max_stale=1800, normalize=SEARCH_KEYS, cache_if=has_articles)
+    async def _search_upstream(self, query, from_date=None, to_date=None, language='en',
+                               sort_by='publishedAt', page=1, page_size=20):
+        api_key = self._get_api_key()
+        if not api_key:
+            return {'articles': [], 'totalResults': 0}
+        
+        try:
+            data = await self._get(*self._everything_request(api_key, query, from_date, to_date,
+                                                             language, sort_by, page, page_size))
+            news_index.index_articles(data.get('articles'))
+            return data
+        except Exception as e:
+            print(f"News API Error: {e}")
+            return {'articles': [], 'totalResults': 0}
+    
+    @cached('news_sources', ttl=3600, max_stale=86400, normalize=SOURCE_KEYS)
+    async def get_sources(self, category=None, language='en', country=None):
+        """Get available news sources"""
+        api_key = self._get_api_key()
+        if not api_key:
+            return []
+        
+        try:
+            data = await self._get(*self._sources_request(api_key, category, language, country))
             return data.get('sources', [])
         except Exception as e:
             print(f"News API Error: {e}")
             return []
     
-    def search(self, query, page_size=10):
+    async def search(self, query, page_size=10):
         """Simple search wrapper for dashboard"""
-        return self.search_everything(query, page_size=page_size)
\ No newline at end of file
+        return await self.search_everything(query, page_size=page_size)
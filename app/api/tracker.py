@@ -1,5 +1,119 @@
+"""
+Crypto Tracker
+Portfolio valuation for CryptoHolding rows. The holdings being valued are
+loaded in one query and priced with one get_prices call for the union of
+their coins - for a single user or for every user at once - and value, cost
+basis, P&L and allocation are computed over numpy arrays rather than per
+holding.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+from app import db
+from app.models import CryptoHolding
+from app.api.crypto_api import CryptoAPI
+
+# In-memory holding added with add_to_portfolio
+Lot = namedtuple('Lot', 'user_id coin_id amount purchase_price')
+
+# Columns needed to value every user's holdings (no per-holding detail)
+VALUATION_COLUMNS = (CryptoHolding.user_id, CryptoHolding.coin_id,
+                     CryptoHolding.amount, CryptoHolding.purchase_price)
+
+
+def _number(value):
+    """float for JSON, None for NaN (no price or no purchase price)"""
+    return None if np.isnan(value) else float(value)
+
+
+def _holding_dict(row):
+    if isinstance(row, CryptoHolding):
+        return row.to_dict()
+    return {'coin_id': row.coin_id, 'amount': row.amount, 'purchase_price': row.purchase_price}
+
+
+def valuate(rows, prices, vs_currency='usd', detail=True):
+    """
+    Value holding rows (anything with user_id, coin_id, amount and
+    purchase_price) against a get_prices result. Returns one summary per
+    user_id, in order of first appearance; with detail, each summary lists
+    its holdings with price, value, cost, P&L and allocation.
+
+    Holdings of coins missing from prices are reported under 'unpriced' and
+    left out of the totals; holdings without a purchase price count towards
+    value but not towards cost basis or P&L.
+    """
+    if not rows:
+        return []
+
+    coins, coin_index = np.unique([row.coin_id for row in rows], return_inverse=True)
+    # get_prices labels the vs_currency price 'usd' whatever the currency
+    coin_prices = np.array([prices[coin]['usd'] if coin in prices else np.nan for coin in coins], dtype=float)
+    price = coin_prices[coin_index]
+    amount = np.array([row.amount for row in rows], dtype=float)
+    purchase = np.array([np.nan if row.purchase_price is None else row.purchase_price for row in rows],
+                        dtype=float)
+
+    value = amount * price
+    cost = amount * purchase
+    pnl = value - cost
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pnl_pct = pnl / cost * 100
+
+    # Per-user sums: bincount over each row's position in the user list
+    owners = [row.user_id for row in rows]
+    order = list(dict.fromkeys(owners))
+    positions = {user_id: i for i, user_id in enumerate(order)}
+    owner_index = np.fromiter((positions[user_id] for user_id in owners), dtype=np.intp, count=len(rows))
+    priced = ~np.isnan(value)
+    both = priced & ~np.isnan(cost)
+    users = len(order)
+    total_value = np.bincount(owner_index, weights=np.where(priced, value, 0), minlength=users)
+    total_cost = np.bincount(owner_index, weights=np.where(both, cost, 0), minlength=users)
+    total_pnl = np.bincount(owner_index, weights=np.where(both, pnl, 0), minlength=users)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        allocation = value / total_value[owner_index] * 100
+        total_pnl_pct = np.where(total_cost > 0, total_pnl / total_cost * 100, np.nan)
+
+    summaries = [{
+        'user_id': user_id,
+        'vs_currency': vs_currency,
+        'total_value': float(total_value[i]),
+        'total_cost': float(total_cost[i]),
+        'pnl': float(total_pnl[i]),
+        'pnl_percentage': _number(total_pnl_pct[i]),
+        'unpriced': []
+    } for i, user_id in enumerate(order)]
+    if detail:
+        for summary in summaries:
+            summary['holdings'] = []
+
+    for i, row in enumerate(rows):
+        summary = summaries[owner_index[i]]
+        if not priced[i] and row.coin_id not in summary['unpriced']:
+            summary['unpriced'].append(row.coin_id)
+        if detail:
+            holding = _holding_dict(row)
+            holding.update({
+                'price': _number(price[i]),
+                'value': _number(value[i]),
+                'cost': _number(cost[i]),
+                'pnl': _number(pnl[i]),
+                'pnl_percentage': _number(pnl_pct[i]),
+                'allocation': _number(allocation[i])
+            })
+            summary['holdings'].append(holding)
+    return summaries
+
+
 class CryptoTracker:
-    def __init__(self):
+    def __init__(self, api=None):
+        self.api = api or CryptoAPI()
         self.portfolio = {}
 
     def get_coin_list(self):
@@ -20,8 +134,78 @@ class CryptoTracker:
     def get_top_coins(self, vs_currency, limit, page):
         return []  # Implement actual API call
 
-    def calculate_portfolio_value(self, vs_currency):
-        return {}  # Implement actual API call
+    def _holdings(self, user_id):
+        if user_id is None:
+            return [Lot(None, coin_id, lot['amount'], lot['purchase_price'])
+                    for coin_id, lot in self.portfolio.items()]
+        return CryptoHolding.query.filter_by(user_id=user_id).order_by(CryptoHolding.id).all()
+
+    def _summary(self, user_id, rows, prices, vs_currency):
+        summaries = valuate(rows, prices, vs_currency)
+        if summaries:
+            return summaries[0]
+        return {'user_id': user_id, 'vs_currency': vs_currency, 'total_value': 0.0, 'total_cost': 0.0,
+                'pnl': 0.0, 'pnl_percentage': None, 'unpriced': [], 'holdings': []}
+
+    @staticmethod
+    def _all_holdings():
+        return db.session.query(*VALUATION_COLUMNS).order_by(CryptoHolding.user_id).all()
+
+    @staticmethod
+    def _coins(rows):
+        return sorted({row.coin_id for row in rows})
+
+    def calculate_portfolio_value(self, vs_currency='usd', user_id=None):
+        """
+        Value a user's CryptoHolding rows (or, without user_id, the in-memory
+        portfolio built with add_to_portfolio)
+        """
+        rows = self._holdings(user_id)
+        prices = self.api.get_prices(self._coins(rows), vs_currency) if rows else {}
+        return self._summary(user_id, rows, prices, vs_currency)
+
+    def value_all_users(self, vs_currency='usd'):
+        """Totals for every user with holdings: one query, one price lookup"""
+        rows = self._all_holdings()
+        if not rows:
+            return []
+        prices = self.api.get_prices(self._coins(rows), vs_currency)
+        return valuate(rows, prices, vs_currency, detail=False)
 
     def add_to_portfolio(self, coin_id, amount, purchase_price):
-        self.portfolio[coin_id] = {'amount': amount, 'purchase_price': purchase_price}
\ No newline at end of file
+        self.portfolio[coin_id] = {'amount': amount, 'purchase_price': purchase_price}
+
+
+_valuation = {}
+_valuation_lock = threading.Lock()
+tracker = CryptoTracker()
+
+
+def revalue_portfolios(vs_currency='usd'):
+    """
+    Scheduler job: value every user's holdings in one pass (one query, one
+    price lookup) and keep the aggregate for /stats; returns the summaries
+    """
+    started = time.perf_counter()
+    summaries = tracker.value_all_users(vs_currency)
+    snapshot = {
+        'valued_at': datetime.utcnow().isoformat(),
+        'vs_currency': vs_currency,
+        'users': len(summaries),
+        'total_value': sum(summary['total_value'] for summary in summaries),
+        'total_cost': sum(summary['total_cost'] for summary in summaries),
+        'pnl': sum(summary['pnl'] for summary in summaries),
+        'unpriced_coins': sorted({coin for summary in summaries for coin in summary['unpriced']}),
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+    with _valuation_lock:
+        _valuation.clear()
+        _valuation.update(snapshot)
+    return summaries
+
+
+def valuation_stats():
+    """Aggregate of the last revalue_portfolios run"""
+    with _valuation_lock:
+        return dict(_valuation)
+
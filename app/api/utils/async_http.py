@@ -0,0 +1,77 @@
+"""
+Shared Async HTTP Transport
+Pooled httpx.AsyncClient used by the asyncio provider clients
+"""
+
+import asyncio
+import threading
+
+import httpx
+
+from app.api.utils.http import PROVIDERS, DEFAULT_HEADERS, _config_value
+
+# httpx clients are bound to the event loop they first run on, and Flask runs
+# every async view on a new loop. One client per process therefore lives on a
+# background loop of its own, and callers on any loop hand requests to it.
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def _timeout_for(profile, timeout):
+    """Convert a requests-style timeout into an httpx.Timeout"""
+    if timeout is None:
+        timeout = profile.get('timeout', 10)
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+class AsyncHTTPTransport:
+    """Async counterpart of HTTPTransport with per-host keep-alive pools"""
+
+    def __init__(self, max_connections=100, max_keepalive=20):
+        self.client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_keepalive)
+        )
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name='async-http', daemon=True)
+        self._thread.start()
+
+    async def _on_loop(self, coro):
+        """Run coro on the transport's loop; cancelling the caller cancels it there too"""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    async def request(self, method, provider, url, headers=None, timeout=None, **kwargs):
+        """Send a request using the provider's default headers and timeout"""
+        profile = PROVIDERS.get(provider, {})
+        merged_headers = dict(profile.get('headers', {}))
+        if headers:
+            merged_headers.update(headers)
+
+        return await self._on_loop(self.client.request(method, url, headers=merged_headers,
+                                                       timeout=_timeout_for(profile, timeout), **kwargs))
+
+    async def get(self, provider, url, **kwargs):
+        """Send a GET request for the given provider"""
+        return await self.request('GET', provider, url, **kwargs)
+
+    async def close(self):
+        """Close all pooled connections and stop the transport's loop"""
+        await self._on_loop(self.client.aclose())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def get_async_transport():
+    """Return the process-wide async transport"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = AsyncHTTPTransport(
+                    max_connections=_config_value('HTTP_ASYNC_MAX_CONNECTIONS', 100),
+                    max_keepalive=_config_value('HTTP_POOL_MAXSIZE', 20)
+                )
+    return _transport
@@ -0,0 +1,158 @@
+"""
+Micro-batching
+Merges price lookups that arrive within a short window into one upstream call
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+
+from app.api.utils.http import _config_value
+
+
+class BatchAbandoned(Exception):
+    """The leader of a batch stopped (e.g. was cancelled) before fetching it"""
+
+
+class _Batch:
+    """Coin ids and currencies collected during one window"""
+
+    def __init__(self):
+        self.ids = set()
+        self.currencies = set()
+        self.callers = 0
+        self.future = Future()
+        # A running future cannot be cancelled, so a waiter giving up (an
+        # async deadline) does not cancel the call for everyone else
+        self.future.set_running_or_notify_cancel()
+
+
+class PriceBatcher:
+    """
+    Collects (coin ids, currency) lookups for `window` seconds and resolves
+    them with a single fetch(ids, currencies) call.
+
+    The first caller of a window becomes its leader: it waits out the window,
+    closes the batch and performs the merged fetch. Everyone else waits on
+    the batch's future, for at most window + timeout seconds. fetch must
+    return CoinGecko /simple/price data ({coin_id: {currency: price, ...}});
+    each caller receives only the coins it asked for. A batch is closed early
+    once it holds max_ids coin ids. If the leader stops without fetching
+    (cancelled while waiting), its followers start a new batch.
+    """
+
+    def __init__(self, window=0.03, max_ids=250, timeout=15):
+        self.window = window
+        self.max_ids = max_ids
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._open = None
+        self.lookups = 0
+        self.upstream_calls = 0
+
+    def _join(self, coin_ids, currency):
+        """Add a lookup to the open batch; return (batch, is_leader)"""
+        with self._lock:
+            self.lookups += 1
+            batch = self._open
+            leader = False
+            if batch is None or len(batch.ids | set(coin_ids)) > self.max_ids:
+                batch = _Batch()
+                self._open = batch
+                leader = True
+            batch.ids.update(coin_ids)
+            batch.currencies.add(currency)
+            batch.callers += 1
+            if len(batch.ids) >= self.max_ids:
+                # Full: later lookups start a new window
+                self._open = None
+            return batch, leader
+
+    def _close(self, batch):
+        with self._lock:
+            if self._open is batch:
+                self._open = None
+            self.upstream_calls += 1
+            return sorted(batch.ids), sorted(batch.currencies)
+
+    def _release(self, batch):
+        """Leader exit: drop the batch if still open and wake its followers"""
+        with self._lock:
+            if self._open is batch:
+                self._open = None
+        if not batch.future.done():
+            batch.future.set_exception(BatchAbandoned())
+
+    @staticmethod
+    def _split(data, coin_ids):
+        return {coin_id: data[coin_id] for coin_id in coin_ids if coin_id in data}
+
+    def get(self, coin_ids, currency, fetch):
+        """Resolve coin_ids in currency, sharing the upstream call of this window"""
+        batch, leader = self._join(coin_ids, currency)
+        if leader:
+            try:
+                time.sleep(self.window)
+                ids, currencies = self._close(batch)
+                batch.future.set_result(fetch(ids, currencies))
+            except Exception as e:
+                batch.future.set_exception(e)
+            finally:
+                self._release(batch)
+        try:
+            data = batch.future.result(timeout=self.window + self.timeout)
+        except BatchAbandoned:
+            return self.get(coin_ids, currency, fetch)
+        return self._split(data, coin_ids)
+
+    async def get_async(self, coin_ids, currency, fetch):
+        """asyncio version of get(); fetch returns an awaitable"""
+        batch, leader = self._join(coin_ids, currency)
+        if leader:
+            try:
+                await asyncio.sleep(self.window)
+                ids, currencies = self._close(batch)
+                batch.future.set_result(await fetch(ids, currencies))
+            except Exception as e:
+                batch.future.set_exception(e)
+            finally:
+                self._release(batch)
+        try:
+            data = await asyncio.wait_for(asyncio.wrap_future(batch.future),
+                                          self.window + self.timeout)
+        except BatchAbandoned:
+            return await self.get_async(coin_ids, currency, fetch)
+        return self._split(data, coin_ids)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'lookups': self.lookups,
+                'upstream_calls': self.upstream_calls,
+                'window_ms': round(self.window * 1000, 1)
+            }
+
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_price_batcher(group):
+    """Return the process-wide batcher for an upstream (e.g. its base URL)"""
+    batcher = _batchers.get(group)
+    if batcher is None:
+        with _batchers_lock:
+            batcher = _batchers.get(group)
+            if batcher is None:
+                batcher = PriceBatcher(
+                    window=_config_value('CRYPTO_BATCH_WINDOW_MS', 30) / 1000,
+                    max_ids=_config_value('CRYPTO_BATCH_MAX_IDS', 250),
+                    timeout=_config_value('CRYPTO_BATCH_TIMEOUT', 15)
+                )
+                _batchers[group] = batcher
+    return batcher
+
+
+def batching_stats():
+    return {group: batcher.stats() for group, batcher in _batchers.items()}
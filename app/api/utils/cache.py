@@ -0,0 +1,287 @@
+"""
+Provider Cache
+Caching, stale-while-revalidate and request coalescing for upstream provider
+methods. Storage is pluggable (see cache_backends): in-process by default, or
+SQLite / Redis to share one cache between worker processes.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+
+from app.api.utils.http import _config_value
+from app.api.utils.singleflight import get_flight
+from app.api.utils.ratelimit import low_priority
+from app.api.utils.cache_backends import TTLCache, SQLiteCache, RedisCache
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _config_str(name, default):
+    """Read a string setting from Flask config (when in app context) or environment"""
+    try:
+        value = current_app.config.get(name)
+    except RuntimeError:
+        # Not in app context
+        value = None
+    return value if value is not None else os.getenv(name, default)
+
+
+def create_cache_backend():
+    """Build the cache backend selected by CACHE_BACKEND"""
+    backend = _config_str('CACHE_BACKEND', 'memory').lower()
+    max_bytes = _config_value('CACHE_MAX_BYTES', 32 * 1024 * 1024)
+    if backend == 'sqlite':
+        path = _config_str('CACHE_SQLITE_PATH', '/tmp/flask-dashboard-cache.sqlite3')
+        return SQLiteCache(path, max_bytes=max_bytes)
+    if backend == 'redis':
+        return RedisCache(_config_str('CACHE_REDIS_URL', 'redis://localhost:6379/0'),
+                          max_bytes=max_bytes)
+    return TTLCache(max_bytes=max_bytes)
+
+
+def get_cache():
+    """Return the process-wide provider cache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_cache_backend()
+    return _cache
+
+
+def set_cache(backend):
+    """Replace the process-wide cache backend (e.g. in benchmarks)"""
+    global _cache
+    with _cache_lock:
+        _cache = backend
+
+
+def cache_stats():
+    """Cache counters plus background refresh counters"""
+    data = get_cache().stats()
+    data['refreshes_scheduled'] = refresh_stats['scheduled']
+    data['refreshes_failed'] = refresh_stats['failed']
+    return data
+
+
+# Parameter normalizers - equivalent requests must map to the same cache key
+def normalize_ids(value):
+    """Coin-id style lists: order, case, whitespace and duplicates do not matter"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    return sorted({str(item).strip().lower() for item in value if str(item).strip()})
+
+
+def normalize_text(value):
+    """Free text such as city names: case and surrounding whitespace do not matter"""
+    if value is None:
+        return None
+    return ' '.join(str(value).split()).casefold()
+
+
+def _setting_for(setting, namespace, default):
+    """Per-data-type value from a Flask config dict (when in app context)"""
+    try:
+        values = current_app.config.get(setting) or {}
+    except RuntimeError:
+        # Not in app context
+        values = {}
+    return values.get(namespace, default)
+
+
+def make_key(namespace, func, args, kwargs, normalize=None):
+    """Build a cache key from the bound call arguments (excluding self)"""
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    params = dict(bound.arguments)
+    params.pop('self', None)
+    for name, normalizer in (normalize or {}).items():
+        if name in params:
+            params[name] = normalizer(params[name])
+    return f'{namespace}:{json.dumps(params, sort_keys=True, default=str)}'
+
+
+# Cache lookups made while serving a request are recorded here so views can
+# report the age of the data they return (see track_cache_lookups).
+_lookups = contextvars.ContextVar('cache_lookups', default=None)
+
+
+def track_cache_lookups():
+    """
+    Start recording cached-method lookups in the current context.
+
+    Returns a dict that is filled in as cached methods are called:
+    'age' is the age in seconds of the oldest value served and 'stale' is
+    True if any value was served past its TTL.
+    """
+    record = {}
+    _lookups.set(record)
+    return record
+
+
+def current_cache_lookups():
+    """The record started by the last track_cache_lookups() in this context, if any"""
+    return _lookups.get()
+
+
+def _record_lookup(state, entry):
+    record = _lookups.get()
+    if record is None:
+        return
+    age = round(entry.age, 1) if entry is not None else 0.0
+    record['age'] = max(record.get('age', 0.0), age)
+    record['stale'] = record.get('stale', False) or state == 'stale'
+
+
+# Background refreshes for stale entries; at most one per key at a time
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='cache-refresh')
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+refresh_stats = {'scheduled': 0, 'failed': 0}
+
+
+def _schedule_refresh(key, compute, store):
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+        refresh_stats['scheduled'] += 1
+
+    try:
+        app = current_app._get_current_object()
+    except RuntimeError:
+        # Not in app context
+        app = None
+
+    def run():
+        try:
+            # Stale data is already being served, so the refresh can wait for quota
+            with low_priority():
+                if app is None:
+                    store(compute())
+                else:
+                    with app.app_context():
+                        store(compute())
+        except Exception as e:
+            refresh_stats['failed'] += 1
+            print(f"Cache refresh error for {key}: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    _refresh_executor.submit(run)
+
+
+async def _compute_async(key, func, args, kwargs, store):
+    return store(key, await func(*args, **kwargs))
+
+
+def _should_cache(value):
+    return bool(value)
+
+
+def cached(namespace, ttl=60, max_stale=0, normalize=None, cache_if=_should_cache):
+    """
+    Cache a provider method's result per normalized arguments.
+
+    namespace names the data type and selects its TTL and maximum staleness
+    (overridable through the CACHE_TTLS and CACHE_MAX_STALE config dicts).
+    Expired entries younger than ttl + max_stale are returned immediately
+    while a single background refresh replaces them; older entries block on
+    the upstream again. Sync and async clients that use the same namespace
+    share entries. Results rejected by cache_if (by default empty or None
+    results, which the providers return on errors) are not stored.
+    """
+    def decorator(func):
+        def store(key, value):
+            if cache_if(value):
+                get_cache().set(key, value,
+                                _setting_for('CACHE_TTLS', namespace, ttl),
+                                _setting_for('CACHE_MAX_STALE', namespace, max_stale))
+            return value
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = make_key(namespace, func, args, kwargs, normalize)
+                state, entry = get_cache().lookup(key)
+                _record_lookup(state, entry)
+                if state == 'stale':
+                    # The request's event loop may be gone by the time the
+                    # refresh runs, so it gets a loop of its own; the HTTP
+                    # client it uses is the shared one (see async_http)
+                    _schedule_refresh(key, lambda: asyncio.run(func(*args, **kwargs)),
+                                      lambda value: store(key, value))
+                if state != 'miss':
+                    return entry.value
+                # Concurrent misses for the same key share one upstream call,
+                # across worker processes too when the backend is shared
+                return await get_flight().do_async(key, lambda: get_cache().get_or_compute_async(
+                    key, lambda: func(*args, **kwargs), lambda value: store(key, value)))
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(namespace, func, args, kwargs, normalize)
+            state, entry = get_cache().lookup(key)
+            _record_lookup(state, entry)
+            if state == 'stale':
+                _schedule_refresh(key, lambda: func(*args, **kwargs),
+                                  lambda value: store(key, value))
+            if state != 'miss':
+                return entry.value
+            # Concurrent misses for the same key share one upstream call,
+            # across worker processes too when the backend is shared
+            return get_flight().do(key, lambda: get_cache().get_or_compute(
+                key, lambda: func(*args, **kwargs), lambda value: store(key, value)))
+
+        def refresh(*args, **kwargs):
+            """Recompute and store the result, bypassing any cached value"""
+            key = make_key(namespace, func, args, kwargs, normalize)
+            return get_flight().do(key, lambda: store(key, func(*args, **kwargs)))
+
+        wrapper.refresh = refresh
+        return wrapper
+
+    return decorator
+
+
+def refresh_cached(method, *args, **kwargs):
+    """Refresh the cache entry of a bound @cached method for the given arguments"""
+    return method.__func__.refresh(method.__self__, *args, **kwargs)
+
+
+def coalesced(namespace, normalize=None):
+    """
+    Coalesce concurrent calls of an uncached method with equal normalized
+    arguments into one execution whose result or exception is shared.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = make_key(namespace, func, args, kwargs, normalize)
+                return await get_flight().do_async(key, lambda: func(*args, **kwargs))
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(namespace, func, args, kwargs, normalize)
+            return get_flight().do(key, lambda: func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
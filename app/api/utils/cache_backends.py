@@ -0,0 +1,440 @@
+"""
+Cache Backends
+Storage for the provider cache: an in-process LRU, plus SQLite and Redis
+backends that every worker on a node (or in a deployment) can share
+"""
+
+import asyncio
+import pickle
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+
+class CacheEntry:
+    """A cached value with its byte size and timestamps"""
+
+    __slots__ = ('value', 'size', 'stored_at', 'expires_at', 'stale_until')
+
+    def __init__(self, value, size, stored_at, expires_at, stale_until):
+        self.value = value
+        self.size = size
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+
+    @property
+    def age(self):
+        return max(0.0, time.time() - self.stored_at)
+
+
+# Serialization for shared backends: pickle, zlib-compressed above a threshold.
+# The first byte records whether the payload is compressed.
+_RAW = b'\x00'
+_ZLIB = b'\x01'
+COMPRESS_THRESHOLD = 4096
+
+
+def serialize(value):
+    payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(payload) > COMPRESS_THRESHOLD:
+        return _ZLIB + zlib.compress(payload, 1)
+    return _RAW + payload
+
+
+def deserialize(blob):
+    blob = bytes(blob)
+    if blob[:1] == _ZLIB:
+        return pickle.loads(zlib.decompress(blob[1:]))
+    return pickle.loads(blob[1:])
+
+
+class CacheBackend:
+    """Shared counters, lookup states and get-or-compute for all backends"""
+
+    name = 'base'
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # Backends implement _read/_write/_delete/_clear/_usage and the lock pair
+    def _read(self, key):
+        raise NotImplementedError
+
+    def _write(self, key, entry):
+        raise NotImplementedError
+
+    def _delete(self, key):
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _usage(self):
+        raise NotImplementedError
+
+    def _try_lock(self, key, timeout):
+        return True
+
+    def _unlock(self, key):
+        pass
+
+    def _count(self, name, amount=1):
+        with self._counter_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def lookup(self, key, count=True):
+        """
+        Return (state, entry) for key.
+
+        state is 'fresh' within the TTL, 'stale' after the TTL but within the
+        entry's max staleness, and 'miss' otherwise (entry is then None).
+        """
+        now = time.time()
+        entry = self._read(key)
+        if entry is not None and entry.stale_until <= now:
+            self._delete(key)
+            if count:
+                self._count('expirations')
+            entry = None
+
+        if entry is None:
+            state = 'miss'
+        elif entry.expires_at <= now:
+            state = 'stale'
+        else:
+            state = 'fresh'
+
+        if count:
+            self._count({'miss': 'misses', 'stale': 'stale_hits', 'fresh': 'hits'}[state])
+        return state, entry
+
+    def get(self, key):
+        """Return (hit, value) for key, counting only fresh entries as hits"""
+        state, entry = self.lookup(key)
+        if state == 'fresh':
+            return True, entry.value
+        return False, None
+
+    def set(self, key, value, ttl, max_stale=0):
+        """Store value under key for ttl seconds, servable stale for max_stale more"""
+        now = time.time()
+        entry = CacheEntry(value, 0, now, now + ttl, now + ttl + max_stale)
+        return self._write(key, entry)
+
+    def delete(self, key):
+        self._delete(key)
+
+    def clear(self):
+        self._clear()
+
+    def get_or_compute(self, key, compute, store, lock_timeout=15.0):
+        """
+        Atomically compute a missing value across processes.
+
+        One caller takes the backend lock for key and runs compute(); the
+        others wait for its stored result instead of calling the upstream
+        themselves. If the lock holder stores nothing (or takes longer than
+        lock_timeout), waiters fall back to computing on their own.
+        """
+        deadline = time.time() + lock_timeout
+        while True:
+            if self._try_lock(key, lock_timeout):
+                try:
+                    state, entry = self.lookup(key, count=False)
+                    if state == 'fresh':
+                        return entry.value
+                    return store(compute())
+                finally:
+                    self._unlock(key)
+
+            time.sleep(0.05)
+            state, entry = self.lookup(key, count=False)
+            if state == 'fresh':
+                return entry.value
+            if time.time() >= deadline:
+                return store(compute())
+
+    async def get_or_compute_async(self, key, compute, store, lock_timeout=15.0):
+        """asyncio version of get_or_compute; compute returns an awaitable"""
+        deadline = time.time() + lock_timeout
+        while True:
+            if self._try_lock(key, lock_timeout):
+                try:
+                    state, entry = self.lookup(key, count=False)
+                    if state == 'fresh':
+                        return entry.value
+                    return store(await compute())
+                finally:
+                    self._unlock(key)
+
+            await asyncio.sleep(0.05)
+            state, entry = self.lookup(key, count=False)
+            if state == 'fresh':
+                return entry.value
+            if time.time() >= deadline:
+                return store(await compute())
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current usage"""
+        entries, used = self._usage()
+        with self._counter_lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': self.name,
+                'entries': entries,
+                'bytes': used,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+
+def _estimate_size(value):
+    """Approximate the memory cost of a value by its pickled size"""
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return len(repr(value))
+
+
+class TTLCache(CacheBackend):
+    """In-process TTL cache with LRU eviction under a byte-size cap"""
+
+    name = 'memory'
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        super().__init__(max_bytes)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+
+    def _read(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def _write(self, key, entry):
+        entry.size = _estimate_size(entry.value)
+        if entry.size > self.max_bytes:
+            return False
+
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self._count('evictions')
+        return True
+
+    def _delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def _clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _usage(self):
+        with self._lock:
+            return len(self._data), self._bytes
+
+    def _remove(self, key):
+        entry = self._data.pop(key)
+        self._bytes -= entry.size
+
+    def get_or_compute(self, key, compute, store, lock_timeout=15.0):
+        # In-process callers are already coalesced by the single-flight group
+        return store(compute())
+
+    async def get_or_compute_async(self, key, compute, store, lock_timeout=15.0):
+        return store(await compute())
+
+
+class SQLiteCache(CacheBackend):
+    """
+    File-backed cache shared by every worker process on a node.
+
+    Uses WAL mode so readers never block each other. Recency for LRU
+    eviction is refreshed at most every few seconds per entry to keep hits
+    read-only in the common case.
+    """
+
+    name = 'sqlite'
+    TOUCH_INTERVAL = 5.0
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        super().__init__(max_bytes)
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                stale_until REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )''')
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed '
+                     'ON cache_entries (accessed_at)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_locks (
+                key TEXT PRIMARY KEY,
+                expires_at REAL NOT NULL
+            )''')
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _read(self, key):
+        row = self._conn().execute(
+            'SELECT value, size, stored_at, expires_at, stale_until, accessed_at '
+            'FROM cache_entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+
+        value, size, stored_at, expires_at, stale_until, accessed_at = row
+        now = time.time()
+        if now - accessed_at > self.TOUCH_INTERVAL:
+            self._conn().execute('UPDATE cache_entries SET accessed_at = ? WHERE key = ?',
+                                 (now, key))
+        return CacheEntry(deserialize(value), size, stored_at, expires_at, stale_until)
+
+    def _write(self, key, entry):
+        blob = serialize(entry.value)
+        entry.size = len(blob)
+        if entry.size > self.max_bytes:
+            return False
+
+        conn = self._conn()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entries '
+            '(key, value, size, stored_at, expires_at, stale_until, accessed_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (key, blob, entry.size, entry.stored_at, entry.expires_at,
+             entry.stale_until, entry.stored_at))
+        self._evict(conn)
+        return True
+
+    def _evict(self, conn):
+        used = conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache_entries').fetchone()[0]
+        while used > self.max_bytes:
+            rows = conn.execute('SELECT key, size FROM cache_entries '
+                                'ORDER BY accessed_at LIMIT 16').fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                conn.execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+                used -= size
+                self._count('evictions')
+                if used <= self.max_bytes:
+                    break
+
+    def _delete(self, key):
+        self._conn().execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+
+    def _clear(self):
+        self._conn().execute('DELETE FROM cache_entries')
+
+    def _usage(self):
+        return self._conn().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries').fetchone()
+
+    def _try_lock(self, key, timeout):
+        conn = self._conn()
+        now = time.time()
+        conn.execute('DELETE FROM cache_locks WHERE key = ? AND expires_at <= ?', (key, now))
+        cursor = conn.execute('INSERT OR IGNORE INTO cache_locks (key, expires_at) VALUES (?, ?)',
+                              (key, now + timeout))
+        return cursor.rowcount == 1
+
+    def _unlock(self, key):
+        self._conn().execute('DELETE FROM cache_locks WHERE key = ?', (key,))
+
+
+class RedisCache(CacheBackend):
+    """
+    Redis-protocol cache shared by all workers that can reach the server.
+
+    Entries expire in Redis once their max staleness has passed; the byte
+    cap is enforced by the server's maxmemory / allkeys-lru policy.
+    """
+
+    name = 'redis'
+    _HEADER = struct.Struct('!ddd')
+
+    def __init__(self, url=None, client=None, prefix='dashboard:cache:', max_bytes=0):
+        super().__init__(max_bytes)
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError('CACHE_BACKEND=redis requires the "redis" package')
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _read(self, key):
+        blob = self.client.get(self.prefix + key)
+        if blob is None:
+            return None
+        stored_at, expires_at, stale_until = self._HEADER.unpack_from(blob)
+        payload = blob[self._HEADER.size:]
+        return CacheEntry(deserialize(payload), len(payload), stored_at, expires_at, stale_until)
+
+    def _write(self, key, entry):
+        payload = serialize(entry.value)
+        entry.size = len(payload)
+        header = self._HEADER.pack(entry.stored_at, entry.expires_at, entry.stale_until)
+        ttl_ms = max(1, int((entry.stale_until - time.time()) * 1000))
+        self.client.set(self.prefix + key, header + payload, px=ttl_ms)
+        return True
+
+    def _delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def _clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def _usage(self):
+        # Counting keys needs a full scan; report what the server can say cheaply
+        return None, None
+
+    def _try_lock(self, key, timeout):
+        return bool(self.client.set(f'{self.prefix}lock:{key}', b'1', nx=True,
+                                    px=int(timeout * 1000)))
+
+    def _unlock(self, key):
+        self.client.delete(f'{self.prefix}lock:{key}')
@@ -0,0 +1,93 @@
+"""
+Series Downsampling
+Reduces [timestamp, value] series to a fixed number of points while keeping
+their visual shape, so charts receive only what they can draw
+"""
+
+import numpy as np
+
+
+def _as_array(series):
+    """[[ts, value], ...] -> float array of shape (n, 2) without missing values"""
+    data = np.array(series, dtype=float).reshape(-1, 2)
+    return data[~np.isnan(data).any(axis=1)]
+
+
+def lttb(series, points):
+    """
+    Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last points; from each of the points - 2 buckets in
+    between it keeps the point forming the largest triangle with the point
+    kept from the previous bucket and the average of the next bucket.
+    """
+    data = _as_array(series)
+    n = len(data)
+    if points >= n or points < 3:
+        return data.tolist()
+
+    x, y = data[:, 0], data[:, 1]
+    # Bucket edges over the interior points 1..n-2
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+
+    # Averages of each bucket, used as the third vertex for the bucket before it
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    avg_x = np.append(avg_x[1:], x[-1])
+    avg_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        # Twice the triangle area for every candidate in the bucket at once
+        area = np.abs((x[prev] - avg_x[i]) * (y[start:end] - y[prev])
+                      - (x[prev] - x[start:end]) * (avg_y[i] - y[prev]))
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+
+    return data[selected].tolist()
+
+
+def minmax(series, points):
+    """
+    Min/max bucketing: keep the first and last points, split the series into
+    (points - 2) // 2 buckets and keep each bucket's lowest and highest point,
+    in time order. Cheaper than LTTB and never drops a spike.
+    """
+    data = _as_array(series)
+    n = len(data)
+    buckets = (points - 2) // 2
+    if points >= n or buckets < 1:
+        return data.tolist()
+
+    y = data[:, 1]
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    starts, counts = edges[:-1], np.diff(edges)
+    bucket_of = np.repeat(np.arange(buckets), counts)
+
+    def first_match(extremes):
+        # Index of the first point in each bucket equal to its extreme
+        hits = np.flatnonzero(y == np.repeat(extremes, counts)[:n])
+        _, first = np.unique(bucket_of[hits], return_index=True)
+        return hits[first]
+
+    lows = first_match(np.minimum.reduceat(y, starts))
+    highs = first_match(np.maximum.reduceat(y, starts))
+    selected = np.unique(np.concatenate(([0, n - 1], lows, highs)))
+    return data[selected].tolist()
+
+
+METHODS = {'lttb': lttb, 'minmax': minmax}
+
+# Fewest points either method can return while keeping both end points
+MIN_POINTS = 4
+
+
+def downsample_chart(chart, points, method='lttb'):
+    """Downsample every series of a market chart to at most `points` points"""
+    reduce = METHODS[method]
+    points = max(points, MIN_POINTS)
+    return {name: reduce(series, points) if series else [] for name, series in chart.items()}
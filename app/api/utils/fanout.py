@@ -0,0 +1,143 @@
+"""
+Concurrent Fan-out
+Runs independent upstream calls in parallel, each under its own deadline
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from flask import current_app
+from app.api.utils.cache import track_cache_lookups
+
+# Shared by all fan-out calls so slow upstreams cannot spawn unbounded threads
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='fanout')
+
+# Error reported for a result rejected by the caller's `failed` check
+NO_DATA = 'Provider returned no data'
+
+
+def _with_app_context(app, func):
+    """Wrap func so it runs inside the given app context (if any)"""
+    def runner():
+        started = time.perf_counter()
+        lookups = track_cache_lookups()
+        result, error = None, None
+        try:
+            if app is None:
+                result = func()
+            else:
+                with app.app_context():
+                    result = func()
+        except Exception as e:
+            error = e
+        return result, error, lookups, (time.perf_counter() - started) * 1000
+
+    return runner
+
+
+def fan_out(tasks, deadlines=None, default_deadline=5.0, failed=None):
+    """
+    Run named callables concurrently and collect their results.
+
+    tasks maps a source name to a zero-argument callable; deadlines maps a
+    source name to seconds measured from the start of the fan-out. failed
+    maps a source name to a check of its result: the providers catch their
+    own exceptions and return an empty value instead, which the check turns
+    into an 'error'. Returns a dict of source name -> {'status', 'data',
+    'elapsed_ms'[, 'error']} where status is 'ok', 'timeout' or 'error'.
+    Sources served from the provider cache also carry its 'age' (seconds)
+    and 'stale' flag.
+    """
+    deadlines = deadlines or {}
+    failed = failed or {}
+    try:
+        app = current_app._get_current_object()
+    except RuntimeError:
+        # Not in app context
+        app = None
+
+    started = time.perf_counter()
+    futures = {
+        name: _executor.submit(_with_app_context(app, func))
+        for name, func in tasks.items()
+    }
+
+    results = {}
+    # Wait on the shortest deadlines first so each wait is bounded correctly
+    for name in sorted(futures, key=lambda n: deadlines.get(n, default_deadline)):
+        deadline = deadlines.get(name, default_deadline)
+        remaining = max(0.0, started + deadline - time.perf_counter())
+        try:
+            data, error, lookups, elapsed_ms = futures[name].result(timeout=remaining)
+        except FutureTimeout:
+            results[name] = {
+                'status': 'timeout',
+                'data': None,
+                'elapsed_ms': round(deadline * 1000, 1)
+            }
+            continue
+
+        if error is None and name in failed and failed[name](data):
+            error = NO_DATA
+        if error is not None:
+            results[name] = {
+                'status': 'error',
+                'data': None,
+                'error': str(error),
+                'elapsed_ms': round(elapsed_ms, 1)
+            }
+        else:
+            results[name] = {
+                'status': 'ok',
+                'data': data,
+                'elapsed_ms': round(elapsed_ms, 1)
+            }
+            results[name].update(lookups)
+
+    return results
+
+
+async def async_fan_out(tasks, deadlines=None, default_deadline=5.0, failed=None):
+    """
+    asyncio version of fan_out.
+
+    tasks maps a source name to a zero-argument coroutine function. Results
+    have the same shape as fan_out.
+    """
+    deadlines = deadlines or {}
+    failed = failed or {}
+
+    async def run(name, func):
+        deadline = deadlines.get(name, default_deadline)
+        started = time.perf_counter()
+        lookups = track_cache_lookups()
+        try:
+            data = await asyncio.wait_for(func(), timeout=deadline)
+        except asyncio.TimeoutError:
+            return name, {
+                'status': 'timeout',
+                'data': None,
+                'elapsed_ms': round(deadline * 1000, 1)
+            }
+        except Exception as e:
+            return name, {
+                'status': 'error',
+                'data': None,
+                'error': str(e),
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+            }
+        if name in failed and failed[name](data):
+            return name, {
+                'status': 'error',
+                'data': None,
+                'error': NO_DATA,
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+            }
+        return name, dict({
+            'status': 'ok',
+            'data': data,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        }, **lookups)
+
+    results = await asyncio.gather(*(run(name, func) for name, func in tasks.items()))
+    return dict(results)
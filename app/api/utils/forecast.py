@@ -0,0 +1,53 @@
+"""
+Forecast Aggregation
+Vectorized reduction of OpenWeatherMap's 3-hourly forecast slots to one
+summary per local calendar day
+"""
+
+import pandas as pd
+
+
+def _mode(frame, column):
+    """Most frequent value of column per day (ties go to the earliest slot)"""
+    counts = frame.groupby(['date', column], sort=False).size().rename('count').reset_index()
+    winners = counts.loc[counts.groupby('date', sort=False)['count'].idxmax()]
+    return winners.set_index('date')[column]
+
+
+def daily_summary(forecasts, timezone_offset=0):
+    """
+    Summarize formatted forecast slots (see WeatherAPI._format_forecast) per
+    day in the city's local time (timezone_offset seconds from UTC).
+
+    Each day gets min/max temperature, the dominant condition with its most
+    common description and a day icon, mean humidity, the highest chance of
+    precipitation and mean/max wind speed.
+    """
+    if not forecasts:
+        return []
+
+    frame = pd.DataFrame(forecasts)
+    local = pd.to_datetime(frame['datetime']) + pd.Timedelta(seconds=timezone_offset)
+    frame['date'] = local.dt.strftime('%Y-%m-%d')
+    # Daily cards always show the day variant of an icon (10n -> 10d)
+    frame['icon'] = frame['icon'].str[:2] + 'd'
+
+    days = frame.groupby('date', sort=False).agg(
+        temp_min=('temp_min', 'min'),
+        temp_max=('temp_max', 'max'),
+        humidity=('humidity', 'mean'),
+        pop=('pop', 'max'),
+        wind_speed=('wind_speed', 'mean'),
+        wind_max=('wind_speed', 'max'),
+        slots=('datetime', 'size')
+    )
+    days['weather'] = _mode(frame, 'weather')
+
+    # Description and icon come from the slots with the dominant condition
+    dominant = frame[frame['weather'] == frame['date'].map(days['weather'])]
+    days['description'] = _mode(dominant, 'description')
+    days['icon'] = _mode(dominant, 'icon')
+
+    days['humidity'] = days['humidity'].round().astype(int)
+    days[['pop', 'wind_speed', 'wind_max']] = days[['pop', 'wind_speed', 'wind_max']].round(1)
+    return days.reset_index().to_dict('records')
@@ -0,0 +1,175 @@
+"""
+Shared HTTP Transport
+Pooled, keep-alive HTTP session used by every upstream API wrapper
+"""
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from flask import current_app
+
+# Default headers and timeouts per upstream provider.
+# Timeouts are (connect, read) tuples in seconds.
+PROVIDERS = {
+    'newsapi': {
+        'headers': {},
+        'timeout': (3.05, 10)
+    },
+    'openweathermap': {
+        'headers': {},
+        'timeout': (3.05, 10)
+    },
+    'coingecko': {
+        'headers': {'Accept': 'application/json'},
+        'timeout': (3.05, 10)
+    },
+    'github': {
+        'headers': {'Accept': 'application/vnd.github.v3+json'},
+        'timeout': (3.05, 10)
+    }
+}
+
+DEFAULT_HEADERS = {
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'User-Agent': 'flask-api-dashboard/1.0'
+}
+
+
+class _ConnectionStats:
+    """Thread-safe counters for requests and newly opened connections"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def add_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def add_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def snapshot(self):
+        with self._lock:
+            requests_count = self.requests
+            new_connections = self.new_connections
+        return {
+            'requests': requests_count,
+            'new_connections': new_connections,
+            'reused_connections': max(requests_count - new_connections, 0)
+        }
+
+
+def _counting_pool(base, stats):
+    """Build a connection pool class that records every new connection"""
+
+    class CountingPool(base):
+        def _new_conn(self):
+            stats.add_connection()
+            return super()._new_conn()
+
+    CountingPool.__name__ = f'Counting{base.__name__}'
+    return CountingPool
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that counts requests and new connections per host pool"""
+
+    def __init__(self, stats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool(HTTPConnectionPool, self.stats),
+            'https': _counting_pool(HTTPSConnectionPool, self.stats)
+        }
+
+    def send(self, request, **kwargs):
+        self.stats.add_request()
+        return super().send(request, **kwargs)
+
+
+class HTTPTransport:
+    """Shared keep-alive transport with per-host connection pools"""
+
+    def __init__(self, pool_connections=10, pool_maxsize=20, max_retries=0):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._stats = _ConnectionStats()
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+
+        adapter = PooledHTTPAdapter(
+            self._stats,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+            pool_block=False
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, provider, url, headers=None, timeout=None, **kwargs):
+        """Send a request using the provider's default headers and timeout"""
+        profile = PROVIDERS.get(provider, {})
+        merged_headers = dict(profile.get('headers', {}))
+        if headers:
+            merged_headers.update(headers)
+        if timeout is None:
+            timeout = profile.get('timeout', 10)
+
+        return self.session.request(method, url, headers=merged_headers,
+                                    timeout=timeout, **kwargs)
+
+    def get(self, provider, url, **kwargs):
+        """Send a GET request for the given provider"""
+        return self.request('GET', provider, url, **kwargs)
+
+    def stats(self):
+        """Return connection reuse counters"""
+        data = self._stats.snapshot()
+        data['pool_connections'] = self.pool_connections
+        data['pool_maxsize'] = self.pool_maxsize
+        return data
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def _config_value(name, default):
+    """Read a setting from Flask config (when in app context) or environment"""
+    try:
+        value = current_app.config.get(name)
+    except RuntimeError:
+        # Not in app context
+        value = None
+    if value is None:
+        value = os.getenv(name, default)
+    return int(value)
+
+
+def get_transport():
+    """Return the process-wide HTTP transport, creating it on first use"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HTTPTransport(
+                    pool_connections=_config_value('HTTP_POOL_CONNECTIONS', 10),
+                    pool_maxsize=_config_value('HTTP_POOL_MAXSIZE', 20)
+                )
+    return _transport
@@ -0,0 +1,104 @@
+"""
+Technical Indicators
+Vectorized pandas implementations of the chart indicators, computed over
+[timestamp, price] series such as CoinGecko's market_chart prices
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def sma(close, window):
+    """Simple moving average"""
+    return close.rolling(window).mean()
+
+
+def ema(close, window):
+    """Exponential moving average"""
+    return close.ewm(span=window, adjust=False, min_periods=window).mean()
+
+
+def rsi(close, window):
+    """Relative strength index with Wilder's smoothing"""
+    change = close.diff()
+    gain = change.clip(lower=0).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    loss = (-change.clip(upper=0)).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    return 100 - 100 / (1 + gain / loss)
+
+
+def volatility(close, window, periods_per_year):
+    """Rolling annualized volatility of log returns"""
+    returns = np.log(close).diff()
+    return returns.rolling(window).std() * np.sqrt(periods_per_year)
+
+
+def drawdown(close):
+    """Fall from the running peak, as a negative fraction"""
+    return close / close.cummax() - 1
+
+
+# name -> default window (None: takes no window)
+INDICATORS = {'sma': 20, 'ema': 20, 'rsi': 14, 'volatility': 30, 'drawdown': None}
+
+
+def parse_indicators(value):
+    """
+    Turn 'sma_50,ema,rsi_14,drawdown' (or a list of such names) into canonical
+    names with explicit windows, e.g. ['sma_50', 'ema_20', 'rsi_14', 'drawdown'].
+    Raises ValueError for unknown indicators or bad windows.
+    """
+    if isinstance(value, str):
+        value = value.split(',')
+
+    specs = []
+    for raw in value:
+        raw = raw.strip().lower()
+        if not raw:
+            continue
+        name, _, window = raw.partition('_')
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator '{name}'")
+        if INDICATORS[name] is None:
+            spec = name
+        else:
+            if window and (not window.isdigit() or not 1 < int(window) <= 1000):
+                raise ValueError(f"Bad window for '{raw}'")
+            spec = f'{name}_{int(window or INDICATORS[name])}'
+        if spec not in specs:
+            specs.append(spec)
+
+    if not specs:
+        raise ValueError('No indicators requested')
+    return specs
+
+
+def _to_list(series):
+    """Series -> JSON-friendly list with None for undefined values"""
+    values = np.round(series.to_numpy(dtype=float), 8)
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def compute_indicators(prices, specs):
+    """Compute parsed indicator specs over a [[timestamp, price], ...] series"""
+    frame = pd.DataFrame(prices, columns=['timestamp', 'price'], dtype=float).dropna()
+    close = frame['price']
+
+    # Annualize volatility with the series' own sampling interval
+    # (CoinGecko returns 5-minute, hourly or daily points depending on days)
+    step_ms = float(np.median(np.diff(frame['timestamp']))) if len(frame) > 1 else 86400000.0
+    periods_per_year = 365 * 86400000.0 / step_ms
+
+    result = {
+        'timestamps': frame['timestamp'].astype('int64').tolist(),
+        'price': _to_list(close)
+    }
+    for spec in specs:
+        name, _, window = spec.partition('_')
+        if name == 'drawdown':
+            series = drawdown(close)
+        elif name == 'volatility':
+            series = volatility(close, int(window), periods_per_year)
+        else:
+            series = {'sma': sma, 'ema': ema, 'rsi': rsi}[name](close, int(window))
+        result[spec] = _to_list(series)
+    return result
@@ -0,0 +1,103 @@
+"""
+MinHash / LSH
+Near-duplicate detection for short texts such as headlines. Each text is
+reduced to a MinHash signature over its word shingles; locality-sensitive
+hashing on bands of the signature finds candidate duplicates without
+comparing every pair, so clustering n texts costs about O(n) rather than
+O(n^2) comparisons.
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 16  # 16 bands of 4 rows: pairs above ~0.5 similarity usually collide
+THRESHOLD = 0.5  # Estimated Jaccard similarity needed to call two texts duplicates
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+# Multiply-shift hash family: (a * h + b) mod 2^64, top 32 bits
+_rng = np.random.default_rng(20240601)
+_A = (_rng.integers(1, 2 ** 63, NUM_PERM, dtype=np.uint64) * 2 + 1).reshape(-1, 1)
+_B = _rng.integers(0, 2 ** 63, NUM_PERM, dtype=np.uint64).reshape(-1, 1)
+
+
+def shingles(text, size=2):
+    """Set of hashed word n-grams (single words for very short texts)"""
+    words = _WORD.findall((text or '').casefold())
+    if len(words) < size:
+        grams = words
+    else:
+        grams = (' '.join(words[i:i + size]) for i in range(len(words) - size + 1))
+    return {zlib.crc32(gram.encode()) for gram in grams}
+
+
+def signatures(texts, batch=2000):
+    """MinHash signatures, one uint32 row of NUM_PERM values per text"""
+    result = np.empty((len(texts), NUM_PERM), dtype=np.uint32)
+    for start in range(0, len(texts), batch):
+        sets = [shingles(text) for text in texts[start:start + batch]]
+        # A text without words gets a shingle of its own so it matches nothing
+        sets = [s or {zlib.crc32(f'\0{start + i}'.encode())} for i, s in enumerate(sets)]
+        counts = np.fromiter((len(s) for s in sets), dtype=np.int64, count=len(sets))
+        hashes = np.fromiter((h for s in sets for h in s), dtype=np.uint64, count=int(counts.sum()))
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        with np.errstate(over='ignore'):
+            permuted = (_A * hashes + _B) >> np.uint64(32)
+        result[start:start + len(sets)] = np.minimum.reduceat(permuted, offsets, axis=1).T
+    return result
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures, grown one signature at a time"""
+
+    def __init__(self, bands=BANDS, threshold=THRESHOLD):
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self.threshold = threshold
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = {}
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def _keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, key, signature):
+        self.signatures[key] = signature
+        for bucket, band in zip(self.buckets, self._keys(signature)):
+            bucket.setdefault(band, []).append(key)
+
+    def match(self, signature):
+        """Key of the most similar indexed signature above the threshold, or None"""
+        candidates = set()
+        for bucket, band in zip(self.buckets, self._keys(signature)):
+            candidates.update(bucket.get(band, ()))
+        best, best_score = None, self.threshold
+        for key in candidates:
+            score = similarity(signature, self.signatures[key])
+            if score >= best_score:
+                best, best_score = key, score
+        return best
+
+
+def cluster(texts, bands=BANDS, threshold=THRESHOLD):
+    """
+    Group near-duplicate texts. Returns, for each text, the index of the first
+    text of its cluster (its own index when it has no earlier duplicate).
+    """
+    index = LSHIndex(bands, threshold)
+    labels = []
+    for i, signature in enumerate(signatures(texts)):
+        match = index.match(signature)
+        labels.append(i if match is None else labels[match])
+        index.add(i, signature)
+    return labels
@@ -0,0 +1,111 @@
+"""
+Upstream Rate Budgets
+Tracks the request quota an upstream reports in its response headers so
+background work can back off before user-facing requests hit the limit
+"""
+
+import contextlib
+import contextvars
+import threading
+import time
+
+from app.api.utils.http import _config_value
+
+
+_priority = contextvars.ContextVar('upstream_priority', default='normal')
+
+
+@contextlib.contextmanager
+def low_priority():
+    """Mark upstream calls made inside the block as deferrable (warm-ups, refreshes)"""
+    token = _priority.set('low')
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def is_low_priority():
+    return _priority.get() == 'low'
+
+
+class RateBudget:
+    """
+    Remaining quota per rate-limit resource, fed from X-RateLimit-* headers.
+
+    A resource is exhausted when its reported remaining count is zero and
+    its reset time has not passed yet. Low-priority calls are also refused
+    once the remaining count drops below reserve_pct percent of the limit,
+    keeping that share of the quota for user requests.
+    """
+
+    def __init__(self, reserve_pct=25):
+        self.reserve_pct = reserve_pct
+        self._lock = threading.Lock()
+        self._resources = {}
+        self.deferred = 0
+        self.refused = 0
+
+    def update(self, headers, resource=None):
+        """Record the quota reported by a response's headers"""
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is None:
+            return
+        resource = headers.get('X-RateLimit-Resource', resource or 'core')
+        with self._lock:
+            self._resources[resource] = {
+                'limit': int(headers.get('X-RateLimit-Limit', 0)),
+                'remaining': int(remaining),
+                'reset': int(headers.get('X-RateLimit-Reset', 0))
+            }
+
+    def remaining(self, resource='core'):
+        """Last reported remaining count, or None when unknown or already reset"""
+        with self._lock:
+            state = self._resources.get(resource)
+            if state is None or state['reset'] <= time.time():
+                return None
+            return state['remaining']
+
+    def allow(self, resource='core', low=False):
+        """Whether a call against resource should be made now"""
+        with self._lock:
+            state = self._resources.get(resource)
+            if state is None or state['reset'] <= time.time():
+                return True
+            if state['remaining'] <= 0:
+                self.refused += 1
+                return False
+            if low and state['remaining'] * 100 < state['limit'] * self.reserve_pct:
+                self.deferred += 1
+                return False
+            return True
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            return {
+                'reserve_pct': self.reserve_pct,
+                'deferred': self.deferred,
+                'refused': self.refused,
+                'resources': {
+                    name: dict(state, resets_in=max(0, int(state['reset'] - now)))
+                    for name, state in self._resources.items()
+                }
+            }
+
+
+_budgets = {}
+_budgets_lock = threading.Lock()
+
+
+def get_budget(provider):
+    """Return the process-wide rate budget for a provider"""
+    budget = _budgets.get(provider)
+    if budget is None:
+        with _budgets_lock:
+            budget = _budgets.get(provider)
+            if budget is None:
+                budget = RateBudget(_config_value('RATE_LIMIT_RESERVE_PCT', 25))
+                _budgets[provider] = budget
+    return budget
@@ -0,0 +1,106 @@
+"""
+Request Coalescing
+Single-flight execution: concurrent callers asking for the same key wait on
+one upstream call and share its result (or exception). A cancelled leader's
+cancellation is not shared: its followers elect a new leader instead
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class FlightAbandoned(Exception):
+    """The leader of a call stopped (e.g. was cancelled) before finishing it"""
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.collapsed = 0
+
+    def _join(self, key):
+        """Return (future, is_leader) for key"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.collapsed += 1
+                return future, False
+            future = Future()
+            # A running future cannot be cancelled, so an async follower
+            # giving up does not cancel the call for everyone else
+            future.set_running_or_notify_cancel()
+            self._calls[key] = future
+            self.executions += 1
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn):
+        """Run fn() once for all concurrent callers with the same key"""
+        future, leader = self._join(key)
+        if not leader:
+            try:
+                return future.result()
+            except FlightAbandoned:
+                return self.do(key, fn)
+
+        try:
+            result = fn()
+        except Exception as e:
+            self._finish(key, future, error=e)
+            raise
+        except BaseException:
+            self._finish(key, future, error=FlightAbandoned())
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    async def do_async(self, key, coro_fn):
+        """asyncio version of do(); also joins calls made from sync code"""
+        future, leader = self._join(key)
+        if not leader:
+            try:
+                return await asyncio.wrap_future(future)
+            except FlightAbandoned:
+                return await self.do_async(key, coro_fn)
+
+        try:
+            result = await coro_fn()
+        except Exception as e:
+            self._finish(key, future, error=e)
+            raise
+        except BaseException:
+            # Cancelled (e.g. a deadline): release the key so a follower
+            # takes over instead of being cancelled with this caller
+            self._finish(key, future, error=FlightAbandoned())
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executions': self.executions,
+                'collapsed': self.collapsed
+            }
+
+
+_flight = SingleFlight()
+
+
+def get_flight():
+    """Return the process-wide single-flight group"""
+    return _flight
+
@@ -3,11 +3,24 @@ Weather API Wrapper
 Wraps OpenWeatherMap API functionality for Flask application
 """
 
-import requests
 import os
 from flask import current_app
+from app.api.utils.http import get_transport
+from app.api.utils.async_http import get_async_transport
+from app.api.utils.cache import cached, get_cache, make_key, normalize_text, _setting_for
+from app.api.utils.fanout import fan_out, async_fan_out
+from app.api.utils.forecast import daily_summary
 from datetime import datetime
 
+# Cache key normalization shared by the sync and async clients
+CITY_KEYS = {'city': normalize_text, 'units': normalize_text}
+
+# OpenWeatherMap city ids learned from earlier lookups, so batches can use
+# the /group endpoint (up to GROUP_MAX_IDS ids per call) instead of one call
+# per city
+CITY_ID_TTL = 30 * 86400
+GROUP_MAX_IDS = 20
+
 class WeatherAPI:
     def __init__(self):
         # Only use environment variable during initialization
@@ -30,6 +43,7 @@ class WeatherAPI:
         """Check if API is configured"""
         return bool(self._get_api_key())
     
+    @cached('weather_current', ttl=600, max_stale=1800, normalize=CITY_KEYS)
     def get_current_weather(self, city, units='metric'):
         """Get current weather for a city"""
         api_key = self._get_api_key()
@@ -44,34 +58,51 @@ class WeatherAPI:
         }
         
         try:
-            response = requests.get(endpoint, params=params, timeout=10)
+            response = get_transport().get('openweathermap', endpoint, params=params)
             response.raise_for_status()
             data = response.json()
-            
-            return {
-                'city': data['name'],
-                'country': data['sys']['country'],
-                'temperature': data['main']['temp'],
-                'feels_like': data['main']['feels_like'],
-                'temp_min': data['main']['temp_min'],
-                'temp_max': data['main']['temp_max'],
-                'humidity': data['main']['humidity'],
-                'pressure': data['main']['pressure'],
-                'weather': data['weather'][0]['main'],
-                'description': data['weather'][0]['description'],
-                'icon': data['weather'][0]['icon'],
-                'wind_speed': data['wind']['speed'],
-                'wind_deg': data['wind'].get('deg', 0),
-                'clouds': data['clouds']['all'],
-                'visibility': data.get('visibility', 0),
-                'sunrise': datetime.fromtimestamp(data['sys']['sunrise']).strftime('%H:%M'),
-                'sunset': datetime.fromtimestamp(data['sys']['sunset']).strftime('%H:%M'),
-                'timestamp': datetime.now().isoformat()
-            }
+            self._remember_city_id(city, data)
+            return self._format_current(data)
         except Exception as e:
             print(f"Weather API Error: {e}")
             return None
     
+    def get_current_weather_batch(self, cities, units='metric'):
+        """
+        Current weather for several cities in one go.
+
+        Returns one {'city', 'success', 'weather' | 'error'} entry per distinct
+        city, in request order. Cached cities are served from the cache,
+        cities with a known OpenWeatherMap id are fetched through /group and
+        the rest are looked up one by one, all concurrently.
+        """
+        names, cached_names, groups, singles = self._plan_batch(cities, units)
+        results = {name: self.get_current_weather(name, units=units) for name in cached_names}
+
+        tasks = {f'city:{name}': (lambda name=name: self.get_current_weather(name, units=units))
+                 for name in singles}
+        tasks.update({f'group:{i}': (lambda group=group: self._fetch_group(group, units))
+                      for i, group in enumerate(groups)})
+        missed = self._collect_batch(fan_out(tasks), groups, results)
+
+        # Ids the group endpoint did not answer for: fall back to single lookups
+        retries = fan_out({f'city:{name}': (lambda name=name: self.get_current_weather(name, units=units))
+                           for name in missed})
+        self._collect_batch(retries, [], results)
+        return self._batch_entries(names, results)
+    
+    def _fetch_group(self, group, units):
+        """One /group call for up to GROUP_MAX_IDS known city ids -> {city: weather}"""
+        try:
+            response = get_transport().get('openweathermap', f"{self.base_url}/group",
+                                           params=self._group_params(group, units))
+            response.raise_for_status()
+            return self._store_group(group, response.json(), units)
+        except Exception as e:
+            print(f"Weather API Error: {e}")
+            return {}
+    
+    @cached('weather_forecast', ttl=1800, max_stale=3600, normalize=CITY_KEYS)
     def get_forecast(self, city, days=5, units='metric'):
         """Get weather forecast"""
         api_key = self._get_api_key()
@@ -87,37 +118,237 @@ class WeatherAPI:
         }
         
         try:
-            response = requests.get(endpoint, params=params, timeout=10)
+            response = get_transport().get('openweathermap', endpoint, params=params)
             response.raise_for_status()
-            data = response.json()
-            
-            forecasts = []
-            for item in data['list']:
-                forecasts.append({
-                    'datetime': item['dt_txt'],
-                    'temperature': item['main']['temp'],
-                    'feels_like': item['main']['feels_like'],
-                    'temp_min': item['main']['temp_min'],
-                    'temp_max': item['main']['temp_max'],
-                    'humidity': item['main']['humidity'],
-                    'weather': item['weather'][0]['main'],
-                    'description': item['weather'][0]['description'],
-                    'icon': item['weather'][0]['icon'],
-                    'wind_speed': item['wind']['speed'],
-                    'clouds': item['clouds']['all'],
-                    'pop': item.get('pop', 0) * 100
-                })
-            
-            return {
-                'city': data['city']['name'],
-                'country': data['city']['country'],
-                'forecasts': forecasts
-            }
+            return self._format_forecast(response.json())
         except Exception as e:
             print(f"Weather API Error: {e}")
             return None
     
+    def get_daily_forecast(self, city, days=5, units='metric'):
+        """Forecast reduced to one summary per local day"""
+        return self._daily(city, days, units, self.get_forecast(city, days=days, units=units))
+    
     def get_air_quality(self, city, state=None, country=None):
         """Get air quality data (placeholder - requires AirVisual API)"""
         # This would require AirVisual API integration
-        return None
\ No newline at end of file
+        return None
+    
+    # Batch planning shared by the sync and async clients
+    def _city_id_key(self, city):
+        return f'weather_city_id:{normalize_text(city)}'
+    
+    def _remember_city_id(self, city, data):
+        if data.get('id'):
+            get_cache().set(self._city_id_key(city), data['id'], CITY_ID_TTL)
+    
+    def _plan_batch(self, cities, units):
+        """Split distinct cities into cached, /group batches of known ids, and single lookups"""
+        names, seen = [], set()
+        for city in cities:
+            key = normalize_text(city)
+            if key and key not in seen:
+                seen.add(key)
+                names.append(city.strip())
+        
+        cache = get_cache()
+        cached_names, known, singles = [], {}, []
+        for name in names:
+            state, _ = cache.lookup(self._current_key(name, units), count=False)
+            if state != 'miss':
+                cached_names.append(name)
+                continue
+            hit, city_id = cache.get(self._city_id_key(name))
+            if hit and self._get_api_key():
+                known[city_id] = name
+            else:
+                singles.append(name)
+        
+        ids = list(known.items())
+        groups = [dict(ids[i:i + GROUP_MAX_IDS]) for i in range(0, len(ids), GROUP_MAX_IDS)]
+        return names, cached_names, groups, singles
+    
+    def _current_key(self, city, units):
+        return make_key('weather_current', WeatherAPI.get_current_weather.__wrapped__,
+                        (self, city, units), {}, CITY_KEYS)
+    
+    def _group_params(self, group, units):
+        return {'id': ','.join(str(city_id) for city_id in group), 'appid': self._get_api_key(), 'units': units}
+    
+    def _store_group(self, group, data, units):
+        """Format a /group response and cache each city as if fetched alone"""
+        ttl = _setting_for('CACHE_TTLS', 'weather_current', 600)
+        max_stale = _setting_for('CACHE_MAX_STALE', 'weather_current', 1800)
+        found = {}
+        for item in data.get('list', []):
+            name = group.get(item.get('id'))
+            if name is None:
+                continue
+            found[name] = self._format_current(item)
+            get_cache().set(self._current_key(name, units), found[name], ttl, max_stale)
+        return found
+    
+    def _collect_batch(self, outcomes, groups, results):
+        """Merge fan-out outcomes into results; returns the cities a group left unanswered"""
+        missed = []
+        for task, outcome in outcomes.items():
+            kind, _, label = task.partition(':')
+            if kind == 'city':
+                results[label] = outcome['data']
+                continue
+            group = groups[int(label)]
+            found = outcome['data'] or {}
+            results.update(found)
+            missed.extend(name for name in group.values() if name not in found)
+        return missed
+    
+    def _batch_entries(self, names, results):
+        entries = []
+        for name in names:
+            weather = results.get(name)
+            if weather:
+                entries.append({'city': name, 'success': True, 'weather': weather})
+            else:
+                entries.append({'city': name, 'success': False, 'error': 'Failed to fetch weather data'})
+        return entries
+    
+    def _daily(self, city, days, units, forecast):
+        """
+        Daily summary of a forecast, cached per (city, units, days, fetch of
+        the forecast): repeat calls served from the same cached forecast reuse
+        the summary, a newly fetched forecast gets a new one
+        """
+        if not forecast:
+            return None
+        
+        key = f"weather_daily:{normalize_text(city)}:{normalize_text(units)}:{days}:{forecast.get('fetched_at')}"
+        cache = get_cache()
+        hit, summary = cache.get(key)
+        if not hit:
+            summary = {
+                'city': forecast['city'],
+                'country': forecast['country'],
+                'fetched_at': forecast.get('fetched_at'),
+                'days': daily_summary(forecast['forecasts'], forecast.get('timezone', 0))
+            }
+            # Lives as long as the forecast it was computed from can be served
+            cache.set(key, summary,
+                      _setting_for('CACHE_TTLS', 'weather_forecast', 1800)
+                      + _setting_for('CACHE_MAX_STALE', 'weather_forecast', 3600))
+        return summary
+    
+    # Response formatters shared by the sync and async clients
+    def _format_current(self, data):
+        return {
+            'city': data['name'],
+            'country': data['sys']['country'],
+            'temperature': data['main']['temp'],
+            'feels_like': data['main']['feels_like'],
+            'temp_min': data['main']['temp_min'],
+            'temp_max': data['main']['temp_max'],
+            'humidity': data['main']['humidity'],
+            'pressure': data['main']['pressure'],
+            'weather': data['weather'][0]['main'],
+            'description': data['weather'][0]['description'],
+            'icon': data['weather'][0]['icon'],
+            'wind_speed': data['wind']['speed'],
+            'wind_deg': data['wind'].get('deg', 0),
+            'clouds': data['clouds']['all'],
+            'visibility': data.get('visibility', 0),
+            'sunrise': datetime.fromtimestamp(data['sys']['sunrise']).strftime('%H:%M'),
+            'sunset': datetime.fromtimestamp(data['sys']['sunset']).strftime('%H:%M'),
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def _format_forecast(self, data):
+        forecasts = []
+        for item in data['list']:
+            forecasts.append({
+                'datetime': item['dt_txt'],
+                'temperature': item['main']['temp'],
+                'feels_like': item['main']['feels_like'],
+                'temp_min': item['main']['temp_min'],
+                'temp_max': item['main']['temp_max'],
+                'humidity': item['main']['humidity'],
+                'weather': item['weather'][0]['main'],
+                'description': item['weather'][0]['description'],
+                'icon': item['weather'][0]['icon'],
+                'wind_speed': item['wind']['speed'],
+                'clouds': item['clouds']['all'],
+                'pop': item.get('pop', 0) * 100
+            })
+        
+        return {
+            'city': data['city']['name'],
+            'country': data['city']['country'],
+            'timezone': data['city'].get('timezone', 0),
+            'fetched_at': datetime.now().isoformat(),
+            'forecasts': forecasts
+        }
+
+
+class AsyncWeatherAPI(WeatherAPI):
+    """asyncio version of WeatherAPI - same results, non-blocking I/O"""
+    
+    async def _get(self, endpoint, params):
+        response = await get_async_transport().get('openweathermap', endpoint, params=params)
+        response.raise_for_status()
+        return response.json()
+    
+    @cached('weather_current', ttl=600, max_stale=1800, normalize=CITY_KEYS)
+    async def get_current_weather(self, city, units='metric'):
+        """Get current weather for a city"""
+        api_key = self._get_api_key()
+        if not api_key:
+            return None
+        
+        params = {'q': city, 'appid': api_key, 'units': units}
+        try:
+            data = await self._get(f"{self.base_url}/weather", params)
+            self._remember_city_id(city, data)
+            return self._format_current(data)
+        except Exception as e:
+            print(f"Weather API Error: {e}")
+            return None
+    
+    async def get_current_weather_batch(self, cities, units='metric'):
+        """Current weather for several cities in one go"""
+        names, cached_names, groups, singles = self._plan_batch(cities, units)
+        results = {name: await self.get_current_weather(name, units=units) for name in cached_names}
+
+        tasks = {f'city:{name}': (lambda name=name: self.get_current_weather(name, units=units))
+                 for name in singles}
+        tasks.update({f'group:{i}': (lambda group=group: self._fetch_group(group, units))
+                      for i, group in enumerate(groups)})
+        missed = self._collect_batch(await async_fan_out(tasks), groups, results)
+
+        retries = await async_fan_out({f'city:{name}': (lambda name=name: self.get_current_weather(name, units=units))
+                                       for name in missed})
+        self._collect_batch(retries, [], results)
+        return self._batch_entries(names, results)
+    
+    async def _fetch_group(self, group, units):
+        try:
+            data = await self._get(f"{self.base_url}/group", self._group_params(group, units))
+            return self._store_group(group, data, units)
+        except Exception as e:
+            print(f"Weather API Error: {e}")
+            return {}
+    
+    @cached('weather_forecast', ttl=1800, max_stale=3600, normalize=CITY_KEYS)
+    async def get_forecast(self, city, days=5, units='metric'):
+        """Get weather forecast"""
+        api_key = self._get_api_key()
+        if not api_key:
+            return None
+        
+        params = {'q': city, 'appid': api_key, 'units': units, 'cnt': days * 8}
+        try:
+            return self._format_forecast(await self._get(f"{self.base_url}/forecast", params))
+        except Exception as e:
+            print(f"Weather API Error: {e}")
+            return None
+    
+    async def get_daily_forecast(self, city, days=5, units='metric'):
+        """Forecast reduced to one summary per local day"""
+        return self._daily(city, days, units, await self.get_forecast(city, days=days, units=units))
@@ -0,0 +1,61 @@
+"""
+Response Compression
+gzip / brotli encoding of text responses, negotiated with Accept-Encoding.
+Small bodies are sent as-is: below COMPRESS_MIN_SIZE the framing overhead
+outweighs the savings.
+"""
+
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional dependency, gzip is used without it
+    brotli = None
+
+COMPRESSIBLE = ('application/json', 'application/x-ndjson', 'text/html',
+                'text/css', 'text/javascript', 'application/javascript')
+
+
+def _choose_encoding(accept_encodings):
+    """Best supported encoding the client accepts, or None"""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding, gzip_level=6, brotli_quality=4):
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def init_compression(app):
+    """Compress eligible responses after every other after_request hook has run"""
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', 6)
+    brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 4)
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200 or response.direct_passthrough
+                or response.is_streamed or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = _choose_encoding(request.accept_encodings)
+        if encoding is None or response.content_length is None or response.content_length < min_size:
+            return response
+
+        response.set_data(compress(response.get_data(), encoding, gzip_level, brotli_quality))
+        response.headers['Content-Encoding'] = encoding
+        # Same content in another encoding: the validator becomes weak, which
+        # still matches If-None-Match (weak comparison)
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
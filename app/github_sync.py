@@ -0,0 +1,222 @@
+"""
+GitHub Sync
+Incrementally copies the commits, issues and pull requests of tracked
+repositories into the app database. Each repository keeps a cursor (newest
+commit stored, latest issue update seen) so a run only fetches what changed;
+the listing endpoints then answer from indexed local queries.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models import GitHubRepo, GitHubSyncCursor, GitHubCommit, GitHubIssue
+from app.api.github_analytics_core import GitHubAnalytics
+from app.api.utils.http import _config_value
+
+analytics = GitHubAnalytics()
+
+
+def tracked_repos():
+    """
+    Repositories saved by users, the most saved first, capped at
+    GITHUB_SYNC_MAX_REPOS so the periodic sync has a bounded upstream cost
+    """
+    rows = (db.session.query(GitHubRepo.full_name)
+            .group_by(GitHubRepo.full_name)
+            .order_by(func.count().desc(), GitHubRepo.full_name)
+            .limit(_config_value('GITHUB_SYNC_MAX_REPOS', 50)))
+    return [row.full_name for row in rows]
+
+
+def tracked_name(full_name):
+    """Stored name of a tracked repository (GitHub names ignore case), or None"""
+    wanted = full_name.lower()
+    return next((name for name in tracked_repos() if name.lower() == wanted), None)
+
+
+def get_cursor(full_name):
+    """Sync cursor for a repository, or None if it was never synced"""
+    try:
+        return GitHubSyncCursor.query.filter_by(full_name=full_name).first()
+    except SQLAlchemyError:
+        # Tables not created yet (flask init-db)
+        db.session.rollback()
+        return None
+
+
+def _sync_commits(cursor, max_pages):
+    """
+    Store commits newer than the cursor; returns the number added.
+
+    The walk goes newest first down to the newest commit already stored. When
+    it needs more than max_pages pages it is resumed by the next run from the
+    oldest commit it reached, and the cursor only moves to its newest commit
+    once the gap is closed.
+    """
+    url = f"{analytics.base_url}/repos/{cursor.full_name}/commits"
+    params = {'per_page': 100}
+    if cursor.commits_since:
+        params['since'] = cursor.commits_since
+    if cursor.walk_resume_sha:
+        params['sha'] = cursor.walk_resume_sha
+
+    added = 0
+    newest = None
+    oldest = None
+    complete = False
+    for _ in range(max_pages):
+        page = analytics._request_page(url, params)
+        if page is None:
+            # Upstream error or deferred for rate limit - resume next run
+            break
+
+        commits = analytics._format_commits(page['body'])
+        known = {
+            row.sha for row in db.session.query(GitHubCommit.sha).filter(
+                GitHubCommit.repo_full_name == cursor.full_name,
+                GitHubCommit.sha.in_([commit['sha'] for commit in commits]))
+        }
+        for commit in commits:
+            if commit['sha'] == cursor.last_commit_sha:
+                complete = True
+                break
+            if newest is None:
+                newest = commit
+            oldest = commit
+            if commit['sha'] not in known:
+                db.session.add(GitHubCommit(repo_full_name=cursor.full_name, **commit))
+                added += 1
+        if complete:
+            break
+
+        url, params = page['next'], None
+        if not url:
+            complete = True
+            break
+    else:
+        # The first sync backfills at most max_pages pages
+        complete = cursor.last_commit_sha is None
+
+    if not cursor.walk_head_sha and newest is not None:
+        cursor.walk_head_sha = newest['sha']
+    if complete:
+        if cursor.walk_head_sha:
+            cursor.last_commit_sha = cursor.walk_head_sha
+            cursor.commits_since = db.session.query(GitHubCommit.date).filter_by(
+                repo_full_name=cursor.full_name, sha=cursor.walk_head_sha).scalar()
+        cursor.walk_head_sha = cursor.walk_resume_sha = None
+    elif oldest is not None:
+        cursor.walk_resume_sha = oldest['sha']
+    db.session.commit()
+    return added
+
+
+def _sync_issues(cursor, max_pages):
+    """Upsert issues and PRs updated since the cursor; returns (issues, pulls) changed"""
+    url = f"{analytics.base_url}/repos/{cursor.full_name}/issues"
+    # Oldest update first, so the cursor can advance page by page
+    params = {'state': 'all', 'sort': 'updated', 'direction': 'asc', 'per_page': 100}
+    if cursor.issues_since:
+        params['since'] = cursor.issues_since
+
+    changed = {False: 0, True: 0}
+    for _ in range(max_pages):
+        page = analytics._request_page(url, params)
+        if page is None or not page['body']:
+            break
+
+        items = page['body']
+        existing = {
+            row.number: row for row in GitHubIssue.query.filter(
+                GitHubIssue.repo_full_name == cursor.full_name,
+                GitHubIssue.number.in_([item['number'] for item in items]))
+        }
+        for item in items:
+            row = existing.get(item['number'])
+            if row is None:
+                row = GitHubIssue(repo_full_name=cursor.full_name, number=item['number'])
+                db.session.add(row)
+            row.is_pull_request = 'pull_request' in item
+            row.title = item['title']
+            row.state = item['state']
+            row.created_at = item['created_at']
+            row.updated_at = item['updated_at']
+            row.html_url = item['html_url']
+            row.user = item['user']['login']
+            changed[row.is_pull_request] += 1
+
+        cursor.issues_since = max(item['updated_at'] for item in items)
+        db.session.commit()
+
+        url, params = page['next'], None
+        if not url:
+            break
+
+    return changed[False], changed[True]
+
+
+def sync_repo(full_name, max_pages=None):
+    """Fetch what changed upstream since the repository's last sync"""
+    if max_pages is None:
+        max_pages = _config_value('GITHUB_SYNC_MAX_PAGES', 10)
+
+    cursor = get_cursor(full_name)
+    if cursor is None:
+        cursor = GitHubSyncCursor(full_name=full_name)
+        db.session.add(cursor)
+
+    commits = _sync_commits(cursor, max_pages)
+    issues, pulls = _sync_issues(cursor, max_pages)
+    cursor.synced_at = datetime.utcnow()
+    db.session.commit()
+    return {
+        'full_name': full_name,
+        'commits': commits,
+        'issues': issues,
+        'pull_requests': pulls,
+        'cursor': cursor.to_dict()
+    }
+
+
+def sync_tracked_repos():
+    """Sync every tracked repository; one failure does not stop the others"""
+    results = {}
+    for full_name in tracked_repos():
+        try:
+            results[full_name] = sync_repo(full_name)
+        except Exception as e:
+            db.session.rollback()
+            print(f"GitHub sync error for {full_name}: {e}")
+            results[full_name] = {'error': str(e)}
+    return results
+
+
+# Local reads - same item shapes as GitHubAnalytics' iterators
+def iter_local_commits(full_name, since=None, until=None, limit=None):
+    """Stored commits, newest first"""
+    query = GitHubCommit.query.filter(GitHubCommit.repo_full_name == full_name)
+    if since:
+        query = query.filter(GitHubCommit.date >= since)
+    if until:
+        query = query.filter(GitHubCommit.date <= until)
+    query = query.order_by(GitHubCommit.date.desc())
+    if limit:
+        query = query.limit(limit)
+    for row in query.yield_per(500):
+        yield row.to_dict()
+
+
+def iter_local_issues(full_name, state='all', pull_requests=False, limit=None):
+    """Stored issues (or pull requests), newest first"""
+    query = GitHubIssue.query.filter(GitHubIssue.repo_full_name == full_name,
+                                     GitHubIssue.is_pull_request == pull_requests)
+    if state != 'all':
+        query = query.filter(GitHubIssue.state == state)
+    query = query.order_by(GitHubIssue.created_at.desc())
+    if limit:
+        query = query.limit(limit)
+    for row in query.yield_per(500):
+        yield row.to_dict()
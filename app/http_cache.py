@@ -0,0 +1,72 @@
+"""
+HTTP Caching
+ETag / Last-Modified validators and Cache-Control freshness for the JSON
+endpoints, so browsers and CDNs can reuse responses and revalidate with 304s
+instead of downloading unchanged bodies again.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+
+from flask import request
+
+from app.api.utils.cache import track_cache_lookups, current_cache_lookups
+
+
+def content_version(data):
+    """
+    ETag for the data part of a response whose body also carries per-request
+    metadata (timings, ages) that would otherwise change the hash every time
+    """
+    encoded = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(encoded.encode()).hexdigest()
+
+
+def _max_age_for(path, table):
+    """Freshness for a path: longest matching prefix in table, or None"""
+    if path.startswith('/aio/'):
+        path = path[len('/aio'):]
+    matches = [prefix for prefix in table if path.startswith(prefix)]
+    if not matches:
+        return None
+    return table[max(matches, key=len)]
+
+
+def init_http_caching(app):
+    """Add validators, freshness and conditional (304) handling to JSON GETs"""
+    table = app.config.get('HTTP_CACHE_MAX_AGE', {})
+
+    @app.before_request
+    def start_tracking():
+        # Ages of the cached provider data the view serves (see add_validators)
+        if request.method == 'GET' and _max_age_for(request.path, table) is not None:
+            track_cache_lookups()
+
+    @app.after_request
+    def add_validators(response):
+        if (request.method != 'GET' or response.status_code != 200
+                or response.mimetype != 'application/json' or response.is_streamed):
+            return response
+        max_age = _max_age_for(request.path, table)
+        if max_age is None:
+            return response
+
+        # Served from the provider cache: the data is `age` seconds old and
+        # stays fresh for the rest of the endpoint's max-age. The full max-age
+        # is sent with an Age header; caches subtract Age from it themselves
+        lookups = current_cache_lookups() or {}
+        age = int(max(lookups.get('age', 0), float(response.headers.get('Age', 0))))
+        if age:
+            response.headers['Age'] = str(age)
+
+        # Views may set their own ETag (see content_version)
+        if 'ETag' not in response.headers:
+            response.add_etag()
+        response.last_modified = datetime.now(timezone.utc) - timedelta(seconds=age)
+        if age < max_age:
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+        else:
+            response.cache_control.no_cache = True
+        return response.make_conditional(request)
@@ -0,0 +1,57 @@
+"""
+JSON Provider
+Flask JSON provider backed by orjson when it is installed. orjson encodes the
+large provider payloads (top coins, charts, indicators) several times faster
+than the standard library; output stays compact with sorted keys as before.
+"""
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """DefaultJSONProvider with orjson for the common compact case"""
+
+    options = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+               | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        # Indented output (debug) and custom encoder options use the stdlib
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        # Datetimes keep Flask's HTTP-date format via the provider's default
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    @staticmethod
+    def _response_obj(args, kwargs):
+        """jsonify()'s arguments as one object: a single value, a list or a dict"""
+        if args and kwargs:
+            raise TypeError('app.json.response() takes either args or kwargs, not both')
+        if not args and not kwargs:
+            return None
+        if len(args) == 1:
+            return args[0]
+        return args or kwargs
+
+    def response(self, *args, **kwargs):
+        obj = self._response_obj(args, kwargs)
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        # Skip the str round trip: orjson already produces bytes
+        body = orjson.dumps(obj, default=self.default, option=self.options)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Use orjson for JSON responses when available"""
+    if orjson is not None and app.config.get('JSON_USE_ORJSON', True):
+        app.json = OrjsonProvider(app)
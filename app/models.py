@@ -28,7 +28,7 @@ class SavedArticle(db.Model):
     __tablename__ = 'saved_articles'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     title = db.Column(db.String(500), nullable=False)
     description = db.Column(db.Text)
     url = db.Column(db.String(500), nullable=False)
@@ -52,12 +52,85 @@ class SavedArticle(db.Model):
             'saved_at': self.saved_at.isoformat()
         }
 
+class NewsArticle(db.Model):
+    """Article seen in a NewsAPI response or saved by a user, full-text indexed by news_index"""
+    __tablename__ = 'news_articles'
+    __table_args__ = (
+        db.Index('ix_news_articles_published', 'published_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    url_hash = db.Column(db.BigInteger, unique=True, nullable=False)  # Of the canonical URL
+    url = db.Column(db.String(500), nullable=False)
+    title = db.Column(db.String(500), nullable=False)
+    description = db.Column(db.Text)
+    source = db.Column(db.String(100))
+    image_url = db.Column(db.String(500))
+    published_at = db.Column(db.String(30))  # ISO 8601, sorts chronologically
+    saved = db.Column(db.Boolean, default=False, nullable=False)  # Kept past the retention period
+    cluster_id = db.Column(db.Integer, index=True)  # First-stored article of its near-duplicate cluster
+    signature = db.Column(db.LargeBinary)  # MinHash of title and description
+    indexed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<NewsArticle {self.title}>'
+    
+    def to_dict(self):
+        # Same shape as a NewsAPI article
+        return {
+            'source': {'id': None, 'name': self.source},
+            'title': self.title,
+            'description': self.description,
+            'url': self.url,
+            'urlToImage': self.image_url,
+            'publishedAt': self.published_at
+        }
+
+class NewsArticleTopic(db.Model):
+    """Top-headline listing (country, category) an ingested article appeared in"""
+    __tablename__ = 'news_article_topics'
+    __table_args__ = (
+        db.Index('ix_news_article_topics_listing', 'country', 'category', 'published_at'),
+    )
+    
+    country = db.Column(db.String(2), primary_key=True)
+    category = db.Column(db.String(20), primary_key=True)
+    article_id = db.Column(db.Integer, db.ForeignKey('news_articles.id'), primary_key=True)
+    published_at = db.Column(db.String(30))  # Copied from the article for the listing index
+    
+    def __repr__(self):
+        return f'<NewsArticleTopic {self.country}/{self.category} {self.article_id}>'
+
+class NewsIngestState(db.Model):
+    """Last successful ingestion of one top-headline listing"""
+    __tablename__ = 'news_ingest_state'
+    __table_args__ = (
+        db.UniqueConstraint('country', 'category'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    country = db.Column(db.String(2), nullable=False)
+    category = db.Column(db.String(20), nullable=False)
+    articles = db.Column(db.Integer, default=0)  # Returned by the last run
+    ingested_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<NewsIngestState {self.country}/{self.category}>'
+    
+    def to_dict(self):
+        return {
+            'country': self.country,
+            'category': self.category,
+            'articles': self.articles,
+            'ingested_at': self.ingested_at.isoformat() if self.ingested_at else None
+        }
+
 class CryptoHolding(db.Model):
     """Cryptocurrency holdings/portfolio"""
     __tablename__ = 'crypto_holdings'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     coin_id = db.Column(db.String(50), nullable=False)  # e.g., 'bitcoin'
     coin_symbol = db.Column(db.String(10), nullable=False)  # e.g., 'BTC'
     coin_name = db.Column(db.String(100), nullable=False)  # e.g., 'Bitcoin'
@@ -88,7 +161,7 @@ class PriceAlert(db.Model):
     __tablename__ = 'price_alerts'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     coin_id = db.Column(db.String(50), nullable=False)
     coin_symbol = db.Column(db.String(10), nullable=False)
     target_price = db.Column(db.Float, nullable=False)
@@ -119,7 +192,7 @@ class WeatherFavorite(db.Model):
     __tablename__ = 'weather_favorites'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     city = db.Column(db.String(100), nullable=False)
     country = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -129,6 +202,11 @@ class WeatherFavorite(db.Model):
     def __repr__(self):
         return f'<WeatherFavorite {self.city}>'
     
+    @property
+    def query_name(self):
+        """City name as OpenWeatherMap's q parameter expects it"""
+        return f'{self.city},{self.country}' if self.country else self.city
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -142,7 +220,7 @@ class GitHubRepo(db.Model):
     __tablename__ = 'github_repos'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     repo_id = db.Column(db.Integer, nullable=False)  # GitHub repo ID
     repo_name = db.Column(db.String(200), nullable=False)
     full_name = db.Column(db.String(200), nullable=False)
@@ -171,3 +249,92 @@ class GitHubRepo(db.Model):
             'forks': self.forks,
             'created_at': self.created_at.isoformat()
         }
+
+class GitHubSyncCursor(db.Model):
+    """Incremental sync position for a tracked repository"""
+    __tablename__ = 'github_sync_cursors'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    full_name = db.Column(db.String(200), unique=True, nullable=False)
+    last_commit_sha = db.Column(db.String(40))  # Newest commit stored
+    commits_since = db.Column(db.String(30))  # Date of that commit (ISO 8601)
+    issues_since = db.Column(db.String(30))  # Latest issue/PR updated_at seen
+    walk_head_sha = db.Column(db.String(40))  # Newest commit of an unfinished walk
+    walk_resume_sha = db.Column(db.String(40))  # Oldest commit that walk reached
+    synced_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<GitHubSyncCursor {self.full_name}>'
+    
+    def to_dict(self):
+        return {
+            'full_name': self.full_name,
+            'last_commit_sha': self.last_commit_sha,
+            'commits_since': self.commits_since,
+            'issues_since': self.issues_since,
+            'walk_head_sha': self.walk_head_sha,
+            'walk_resume_sha': self.walk_resume_sha,
+            'synced_at': self.synced_at.isoformat() if self.synced_at else None
+        }
+
+class GitHubCommit(db.Model):
+    """Commit of a tracked repository"""
+    __tablename__ = 'github_commits'
+    __table_args__ = (
+        db.UniqueConstraint('repo_full_name', 'sha'),
+        db.Index('ix_github_commits_repo_date', 'repo_full_name', 'date'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    repo_full_name = db.Column(db.String(200), nullable=False)
+    sha = db.Column(db.String(40), nullable=False)
+    message = db.Column(db.Text)
+    author = db.Column(db.String(200))
+    date = db.Column(db.String(30))  # ISO 8601, sorts chronologically
+    html_url = db.Column(db.String(500))
+    
+    def __repr__(self):
+        return f'<GitHubCommit {self.sha[:7]}>'
+    
+    def to_dict(self):
+        return {
+            'sha': self.sha,
+            'message': self.message,
+            'author': self.author,
+            'date': self.date,
+            'html_url': self.html_url
+        }
+
+class GitHubIssue(db.Model):
+    """Issue or pull request of a tracked repository"""
+    __tablename__ = 'github_issues'
+    __table_args__ = (
+        db.UniqueConstraint('repo_full_name', 'number'),
+        db.Index('ix_github_issues_repo_kind_state', 'repo_full_name', 'is_pull_request', 'state', 'created_at'),
+        db.Index('ix_github_issues_repo_kind_created', 'repo_full_name', 'is_pull_request', 'created_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    repo_full_name = db.Column(db.String(200), nullable=False)
+    number = db.Column(db.Integer, nullable=False)
+    is_pull_request = db.Column(db.Boolean, default=False, nullable=False)
+    title = db.Column(db.String(500))
+    state = db.Column(db.String(20))
+    created_at = db.Column(db.String(30))
+    updated_at = db.Column(db.String(30))
+    html_url = db.Column(db.String(500))
+    user = db.Column(db.String(100))
+    
+    def __repr__(self):
+        return f'<GitHubIssue {self.repo_full_name}#{self.number}>'
+    
+    def to_dict(self):
+        return {
+            'number': self.number,
+            'title': self.title,
+            'state': self.state,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'html_url': self.html_url,
+            'user': self.user
+        }
@@ -0,0 +1,535 @@
+"""
+News Index
+Local store and full-text index of the articles the app has seen: ingested
+top headlines (see news_ingest), every other NewsAPI response it fetches and
+every SavedArticle. Articles live once in news_articles, keyed by a 64-bit
+hash of their canonical URL, with the headline listings they appeared in
+kept in news_article_topics. An SQLite FTS5 table over title, description
+and source answers searches ranked by relevance and recency, so repeated and
+type-ahead searches need not spend NewsAPI quota. Other database backends
+simply have no store and requests go upstream.
+"""
+
+import hashlib
+import json
+import re
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from flask import current_app
+import numpy as np
+from sqlalchemy import event, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models import NewsArticle, NewsArticleTopic, NewsIngestState, SavedArticle
+from app.api.utils import minhash
+
+# External-content FTS5 table kept in step with news_articles by triggers. The
+# update trigger only fires for the indexed columns, so updates to the other
+# columns do not rewrite the index rows
+FTS_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+        title, description, source,
+        content='news_articles', content_rowid='id', tokenize='porter unicode61')""",
+    """CREATE TRIGGER IF NOT EXISTS news_articles_ai AFTER INSERT ON news_articles BEGIN
+        INSERT INTO news_fts(rowid, title, description, source)
+        VALUES (new.id, new.title, new.description, new.source);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS news_articles_ad AFTER DELETE ON news_articles BEGIN
+        INSERT INTO news_fts(news_fts, rowid, title, description, source)
+        VALUES ('delete', old.id, old.title, old.description, old.source);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS news_articles_au
+    AFTER UPDATE OF title, description, source ON news_articles BEGIN
+        INSERT INTO news_fts(news_fts, rowid, title, description, source)
+        VALUES ('delete', old.id, old.title, old.description, old.source);
+        INSERT INTO news_fts(rowid, title, description, source)
+        VALUES (new.id, new.title, new.description, new.source);
+    END""",
+]
+
+# bm25 column weights: a match in the title counts most
+BM25_WEIGHTS = '10.0, 3.0, 1.0'
+
+# Longest description kept; NewsAPI's truncated 'content' is not stored
+MAX_DESCRIPTION = 1000
+
+# Query parameters that only track the click and do not change the article
+TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'cmpid', 'ocid', 'ref', 'smid', 'taid')
+
+_ready = {}
+
+
+def _engine():
+    """The app's engine, or None outside an app context"""
+    try:
+        return db.engine
+    except RuntimeError:
+        # Not in app context
+        return None
+
+
+def _setting(name, default):
+    return current_app.config.get(name, default)
+
+
+def canonical_url(url):
+    """
+    URL with the variations that point at the same article removed: scheme and
+    host case, a leading www., default ports, the fragment, tracking
+    parameters, parameter order and a trailing slash
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f'{host}:{parts.port}'
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not key.lower().startswith(TRACKING_PARAMS))
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('https' if parts.scheme in ('http', 'https') else parts.scheme,
+                       host, path, urlencode(query), ''))
+
+
+def url_hash(url):
+    """Signed 64-bit hash of the canonical URL (fits an SQLite INTEGER)"""
+    digest = hashlib.blake2b(canonical_url(url).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def ensure_index():
+    """Create the article tables and FTS index if needed; False when unavailable"""
+    engine = _engine()
+    if engine is None or engine.dialect.name != 'sqlite' or not _setting('NEWS_INDEX_ENABLED', True):
+        return False
+
+    key = str(engine.url)
+    if key not in _ready:
+        try:
+            with engine.begin() as conn:
+                for model in (NewsArticle, NewsArticleTopic, NewsIngestState):
+                    model.__table__.create(conn, checkfirst=True)
+                created = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'news_fts'")).first() is None
+                for statement in FTS_SCHEMA:
+                    conn.exec_driver_sql(statement)
+                if created:
+                    # Index rows stored before the FTS table existed
+                    conn.exec_driver_sql("INSERT INTO news_fts(news_fts) VALUES ('rebuild')")
+            _ready[key] = True
+            if created:
+                _index_saved_articles()
+        except SQLAlchemyError as e:
+            print(f"News index error: {e}")
+            _ready[key] = False
+    return _ready[key]
+
+
+def _article_row(article):
+    """NewsAPI article dict -> news_articles row, or None if it cannot be indexed"""
+    url = article.get('url')
+    title = article.get('title')
+    # NewsAPI keeps placeholders for articles withdrawn by the publisher
+    if not url or not title or title == '[Removed]':
+        return None
+    source = article.get('source')
+    return {
+        'url_hash': url_hash(url),
+        'url': url[:500],
+        'title': title[:500],
+        'description': (article.get('description') or '')[:MAX_DESCRIPTION] or None,
+        'source': (source.get('name') if isinstance(source, dict) else source),
+        'image_url': (article.get('urlToImage') or '')[:500] or None,
+        'published_at': article.get('publishedAt'),
+        'indexed_at': datetime.utcnow()
+    }
+
+
+def _insert_rows(conn, rows, saved=False):
+    """Insert rows, skipping articles already stored; returns the number added"""
+    if not rows:
+        return 0
+    statement = sqlite_insert(NewsArticle.__table__)
+    if saved:
+        # A stored article that gets saved must outlive the retention period
+        for row in rows:
+            row['saved'] = True
+        statement = statement.on_conflict_do_update(index_elements=['url_hash'], set_={'saved': True})
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=['url_hash'])
+    return conn.execute(statement, rows).rowcount
+
+
+def index_articles(articles, country=None, category=None):
+    """
+    Add NewsAPI articles to the store; returns the number of new articles.
+    With country and category, also record them in that headline listing.
+    """
+    rows = [row for row in map(_article_row, articles or []) if row]
+    if not rows or not ensure_index():
+        return 0
+    try:
+        with _engine().begin() as conn:
+            added = _insert_rows(conn, rows)
+            if country and category:
+                _insert_topics(conn, rows, country, category)
+        if added:
+            assign_clusters()
+        return added
+    except SQLAlchemyError as e:
+        print(f"News index error: {e}")
+        return 0
+
+
+# Per-process LSH index over the stored articles' signatures, loaded from the
+# database on first use and topped up with rows other processes added since
+_clusters = {}
+_clusters_lock = threading.Lock()
+
+
+def cluster_text(title, description):
+    """Text compared for near-duplicates; NewsAPI appends ' - Source' to titles"""
+    title = re.sub(r'\s+-\s+[^-]{1,60}$', '', title or '')
+    return f'{title} {description or ""}'
+
+
+def _cluster_state(conn):
+    state = _clusters.setdefault(str(conn.engine.url), {
+        'index': minhash.LSHIndex(), 'cluster_of': {}, 'loaded_to': 0
+    })
+    rows = conn.execute(text(
+        "SELECT id, cluster_id, signature FROM news_articles "
+        "WHERE id > :last AND signature IS NOT NULL ORDER BY id"), {'last': state['loaded_to']})
+    for article_id, cluster_id, signature in rows:
+        state['index'].add(article_id, np.frombuffer(signature, dtype=np.uint32))
+        state['cluster_of'][article_id] = cluster_id
+        state['loaded_to'] = article_id
+    return state
+
+
+def assign_clusters():
+    """
+    Give every stored article without a cluster one: that of its closest
+    near-duplicate (MinHash/LSH, see minhash), or its own id. Returns the
+    number of articles assigned.
+    """
+    with _clusters_lock, _engine().begin() as conn:
+        state = _cluster_state(conn)
+        pending = conn.execute(text(
+            "SELECT id, title, description FROM news_articles WHERE cluster_id IS NULL ORDER BY id")).all()
+        if not pending:
+            return 0
+
+        updates = []
+        signatures = minhash.signatures([cluster_text(title, description) for _, title, description in pending])
+        for (article_id, _, _), signature in zip(pending, signatures):
+            match = state['index'].match(signature)
+            cluster_id = article_id if match is None else state['cluster_of'][match]
+            state['index'].add(article_id, signature)
+            state['cluster_of'][article_id] = cluster_id
+            state['loaded_to'] = max(state['loaded_to'], article_id)
+            updates.append({'id': article_id, 'cluster_id': cluster_id, 'signature': signature.tobytes()})
+
+        conn.execute(text("UPDATE news_articles SET cluster_id = :cluster_id, signature = :signature "
+                          "WHERE id = :id"), updates)
+        return len(updates)
+
+
+def collapse_duplicates(result):
+    """
+    List each near-duplicate cluster of a NewsAPI result once (for results
+    that did not come from the store), with the same 'alternates' and
+    'alternate_sources' fields as store results
+    """
+    articles = (result or {}).get('articles') or []
+    if not articles:
+        return result
+    labels = minhash.cluster([cluster_text(a.get('title'), a.get('description')) for a in articles])
+
+    kept = {}
+    for article, label in zip(articles, labels):
+        source = (article.get('source') or {}).get('name')
+        if label not in kept:
+            kept[label] = dict(article, alternates=0, alternate_sources=[])
+        elif source and source != (kept[label].get('source') or {}).get('name') \
+                and source not in kept[label]['alternate_sources']:
+            kept[label]['alternate_sources'].append(source)
+            kept[label]['alternates'] += 1
+    return dict(result, articles=list(kept.values()))
+
+
+def _insert_topics(conn, rows, country, category):
+    articles = NewsArticle.__table__
+    hashes = [row['url_hash'] for row in rows]
+    stored = conn.execute(articles.select().with_only_columns(articles.c.id, articles.c.published_at)
+                          .where(articles.c.url_hash.in_(hashes))).all()
+    topics = [{'country': country, 'category': category, 'article_id': article_id,
+               'published_at': published_at} for article_id, published_at in stored]
+    conn.execute(sqlite_insert(NewsArticleTopic.__table__).on_conflict_do_nothing(), topics)
+
+
+def _saved_row(saved):
+    return _article_row({
+        'url': saved.url,
+        'title': saved.title,
+        'description': saved.description,
+        'source': saved.source,
+        'urlToImage': saved.image_url,
+        'publishedAt': saved.published_at
+    })
+
+
+def _index_saved_articles():
+    """Backfill the index with every SavedArticle"""
+    try:
+        rows = [row for row in map(_saved_row, SavedArticle.query.all()) if row]
+        with _engine().begin() as conn:
+            _insert_rows(conn, rows, saved=True)
+    except SQLAlchemyError as e:
+        # saved_articles not created yet (flask init-db)
+        db.session.rollback()
+        print(f"News index error: {e}")
+
+
+@event.listens_for(SavedArticle, 'after_insert')
+def _index_saved_article(mapper, connection, saved):
+    """Saved articles become searchable as soon as they are stored"""
+    if connection.dialect.name != 'sqlite' or not _ready.get(str(connection.engine.url)):
+        return
+    row = _saved_row(saved)
+    if row:
+        _insert_rows(connection, [row], saved=True)
+
+
+_TERM = re.compile(r'"([^"]+)"|(\w+)', re.UNICODE)
+
+
+def match_expression(query):
+    """
+    Free-text query -> FTS5 MATCH expression. Words and "quoted phrases" must
+    all match; the last word also matches as a prefix, so partially typed
+    queries find results. Returns None when nothing searchable remains.
+    """
+    terms = []
+    for phrase, word in _TERM.findall(query or ''):
+        value = (phrase or word).replace('"', ' ').strip()
+        if value:
+            terms.append((value, bool(word)))
+    if not terms:
+        return None
+    parts = [f'"{value}"' for value, _ in terms]
+    if terms[-1][1]:
+        parts[-1] += '*'
+    return ' '.join(parts)
+
+
+ARTICLE_COLUMNS = 'a.url, a.title, a.description, a.source, a.image_url, a.published_at'
+
+
+def _page(base, params, rank, descending, collapse, page, page_size):
+    """
+    One page of articles matching base ("FROM ... WHERE ..." over news_articles
+    a) ordered by the rank expression, as a NewsAPI-shaped result.
+
+    With collapse, each near-duplicate cluster counts once: it is represented
+    by its best-ranked article, which also carries 'alternates', the number
+    of other sources in the cluster, and their names in 'alternate_sources'.
+    """
+    direction = 'DESC' if descending else 'ASC'
+    limits = dict(params, limit=page_size, offset=(page - 1) * page_size)
+    if collapse:
+        # Ranked in a materialized CTE first: bm25 cannot run inside an
+        # aggregate. SQLite fills bare columns from the row that gives
+        # MIN()/MAX() its value
+        best = 'MAX' if descending else 'MIN'
+        counting = "COUNT(DISTINCT COALESCE(a.cluster_id, a.id))"
+        listing = (f"WITH ranked AS MATERIALIZED (SELECT {ARTICLE_COLUMNS}, "
+                   f"COALESCE(a.cluster_id, a.id) AS cluster, {rank} AS rank {base}) "
+                   f"SELECT url, title, description, source, image_url, published_at, "
+                   f"{best}(rank) AS rank, json_group_array(DISTINCT source) AS sources "
+                   f"FROM ranked GROUP BY cluster ORDER BY rank {direction} LIMIT :limit OFFSET :offset")
+    else:
+        counting = "COUNT(*)"
+        listing = f"SELECT {ARTICLE_COLUMNS} {base} ORDER BY {rank} {direction} LIMIT :limit OFFSET :offset"
+
+    try:
+        with _engine().connect() as conn:
+            total, newest = conn.execute(text(f"SELECT {counting}, MAX(a.published_at) {base}"), params).one()
+            rows = conn.execute(text(listing), limits).mappings().all()
+    except SQLAlchemyError as e:
+        print(f"News index error: {e}")
+        return None
+
+    articles = []
+    for row in rows:
+        row = dict(row)
+        sources = json.loads(row.pop('sources', None) or '[]')
+        row.pop('rank', None)
+        article = NewsArticle(**row).to_dict()
+        if collapse:
+            others = [name for name in sources if name and name != row['source']]
+            article['alternates'] = len(others)
+            article['alternate_sources'] = others
+        articles.append(article)
+
+    return {
+        'status': 'ok',
+        'totalResults': total,
+        'articles': articles,
+        'newest': newest,
+        'source': 'local'
+    }
+
+
+def search(query, from_date=None, to_date=None, sort_by='relevancy', page=1, page_size=20, collapse=True):
+    """
+    Search the local index. Returns a NewsAPI-shaped result plus 'newest',
+    the publish time of the newest match, or None when there is no index.
+
+    sort_by 'publishedAt' orders matches newest first; anything else ranks by
+    bm25 relevance divided by 1 + age / NEWS_INDEX_RECENCY_DAYS. With
+    collapse, near-duplicate stories are listed once (see _page).
+    """
+    expression = match_expression(query)
+    if expression is None or not ensure_index():
+        return None
+
+    filters = ''
+    params = {'match': expression}
+    if from_date:
+        filters += ' AND a.published_at >= :from_date'
+        params['from_date'] = from_date
+    if to_date:
+        filters += ' AND a.published_at <= :to_date'
+        # A bare date includes the whole day
+        params['to_date'] = to_date if 'T' in to_date else f'{to_date}T23:59:59Z'
+
+    if sort_by == 'publishedAt':
+        rank, descending = 'a.published_at', True
+    else:
+        # bm25 is negative (lower is better); age pushes it towards zero and
+        # undated articles count as very old
+        rank, descending = (f"bm25(news_fts, {BM25_WEIGHTS}) / "
+                            "(1.0 + MAX(julianday('now') - COALESCE(julianday(a.published_at), 0), 0) "
+                            "/ :recency_days)"), False
+        params['recency_days'] = float(_setting('NEWS_INDEX_RECENCY_DAYS', 3))
+
+    base = f"FROM news_fts JOIN news_articles a ON a.id = news_fts.rowid WHERE news_fts MATCH :match{filters}"
+    return _page(base, params, rank, descending, collapse, page, page_size)
+
+
+def is_sufficient(result, page=1, page_size=20):
+    """
+    Whether a local result can be served instead of asking NewsAPI: enough
+    matches (NEWS_INDEX_MIN_RESULTS, and at least one on the requested page)
+    and a newest match no older than NEWS_INDEX_MAX_AGE_HOURS.
+    """
+    if not result or not result['articles']:
+        return False
+    if result['totalResults'] < min(_setting('NEWS_INDEX_MIN_RESULTS', 5), page * page_size):
+        return False
+    newest = result.get('newest') or ''
+    cutoff = datetime.utcnow() - timedelta(hours=_setting('NEWS_INDEX_MAX_AGE_HOURS', 24))
+    return newest >= cutoff.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def headlines(country, category=None, query=None, page=1, page_size=20, collapse=True):
+    """
+    Top headlines of a listing from the store, newest first, in the NewsAPI
+    shape; without a category, the country's articles across categories.
+    With collapse, near-duplicate stories are listed once. Returns None when
+    there is no store.
+    """
+    if not ensure_index():
+        return None
+
+    filters = 't.country = :country'
+    params = {'country': country}
+    if category:
+        filters += ' AND t.category = :category'
+        params['category'] = category
+    if query:
+        expression = match_expression(query)
+        if expression is None:
+            return {'status': 'ok', 'totalResults': 0, 'articles': [], 'source': 'local'}
+        filters += ' AND a.id IN (SELECT rowid FROM news_fts WHERE news_fts MATCH :match)'
+        params['match'] = expression
+
+    # An article listed under several categories appears once
+    base = (f"FROM news_articles a WHERE a.id IN "
+            f"(SELECT t.article_id FROM news_article_topics t WHERE {filters})")
+    return _page(base, params, 'a.published_at', True, collapse, page, page_size)
+
+
+def ingest_countries():
+    """Countries whose top headlines news_ingest harvests"""
+    value = _setting('NEWS_INGEST_COUNTRIES', 'us')
+    return [country.strip().lower() for country in value.split(',') if country.strip()]
+
+
+def ingest_interval():
+    """
+    Seconds between ingestion runs: NEWS_INGEST_INTERVAL, stretched so the
+    calls of a run (countries x categories x pages) spend at most
+    NEWS_INGEST_QUOTA_SHARE of NEWS_DAILY_QUOTA, leaving the rest for
+    searches and fallbacks
+    """
+    calls = (len(ingest_countries()) * len(_setting('NEWS_CATEGORIES', []))
+             * _setting('NEWS_INGEST_MAX_PAGES', 1))
+    budget = _setting('NEWS_DAILY_QUOTA', 100) * _setting('NEWS_INGEST_QUOTA_SHARE', 0.6)
+    return max(_setting('NEWS_INGEST_INTERVAL', 10800), int(86400 * calls / budget) + 1 if budget else 0)
+
+
+def headlines_fresh(country, category=None):
+    """
+    Whether the store can answer a headline listing: it was ingested (every
+    category when none is given) within the last NEWS_INGEST_MAX_AGE seconds,
+    or two ingestion intervals if those are longer
+    """
+    categories = _setting('NEWS_CATEGORIES', [])
+    country = (country or '').lower()
+    if category is not None and category.lower() not in categories:
+        return False
+    if country not in ingest_countries() or not ensure_index():
+        return False
+
+    max_age = max(_setting('NEWS_INGEST_MAX_AGE', 21600), 2 * ingest_interval())
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+    try:
+        query = NewsIngestState.query.filter(NewsIngestState.country == country,
+                                             NewsIngestState.ingested_at >= cutoff)
+        if category is not None:
+            return query.filter_by(category=category.lower()).first() is not None
+        return query.count() == len(categories)
+    except SQLAlchemyError:
+        db.session.rollback()
+        return False
+
+
+def prune(retention_days):
+    """Drop unsaved articles published more than retention_days ago; returns the number removed"""
+    if not ensure_index():
+        return 0
+    cutoff = (datetime.utcnow() - timedelta(days=retention_days)).strftime('%Y-%m-%dT%H:%M:%S')
+    try:
+        with _engine().begin() as conn:
+            conn.execute(text("DELETE FROM news_article_topics WHERE published_at < :cutoff"),
+                         {'cutoff': cutoff})
+            removed = conn.execute(text(
+                "DELETE FROM news_articles WHERE NOT saved "
+                "AND COALESCE(published_at, strftime('%Y-%m-%dT%H:%M:%S', indexed_at)) < :cutoff "
+                "AND id NOT IN (SELECT article_id FROM news_article_topics)"),
+                {'cutoff': cutoff}).rowcount
+    except SQLAlchemyError as e:
+        print(f"News index error: {e}")
+        return 0
+
+    if removed:
+        # Reload the LSH index without the removed articles on next use
+        with _clusters_lock:
+            _clusters.pop(str(_engine().url), None)
+    return removed
@@ -0,0 +1,84 @@
+"""
+News Ingestion
+Periodically harvests the top headlines of every category for the configured
+countries into the local news store (see news_index), one 100-article call
+per listing. /news/api/headlines then pages through the store instead of
+calling NewsAPI for every country, category and page a user views.
+"""
+
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db, news_index
+from app.models import NewsIngestState
+from app.api.news_api import NewsAPI
+from app.api.utils.http import get_transport
+
+# NewsAPI's largest page
+PAGE_SIZE = 100
+
+news_api = NewsAPI()
+
+
+def _fetch_listing(api_key, country, category, max_pages):
+    """All articles of one top-headline listing, or None on an upstream error"""
+    articles = []
+    for page in range(1, max_pages + 1):
+        endpoint, params = news_api._headlines_request(api_key, country, category, None, page, PAGE_SIZE)
+        try:
+            response = get_transport().get('newsapi', endpoint, params=params)
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            print(f"News API Error: {e}")
+            return None
+        articles.extend(data.get('articles', []))
+        if len(articles) >= data.get('totalResults', 0) or len(data.get('articles', [])) < PAGE_SIZE:
+            break
+    return articles
+
+
+def _record(country, category, count):
+    state = NewsIngestState.query.filter_by(country=country, category=category).first()
+    if state is None:
+        state = NewsIngestState(country=country, category=category)
+        db.session.add(state)
+    state.articles = count
+    state.ingested_at = datetime.utcnow()
+    db.session.commit()
+
+
+def ingest_headlines():
+    """Harvest every (country, category) listing into the store; returns a summary"""
+    api_key = news_api._get_api_key()
+    if not api_key or not news_index.ensure_index():
+        return {'listings': 0, 'articles': 0, 'added': 0}
+
+    max_pages = current_app.config.get('NEWS_INGEST_MAX_PAGES', 1)
+    summary = {'listings': 0, 'articles': 0, 'added': 0, 'failed': 0}
+    for country in news_index.ingest_countries():
+        for category in current_app.config['NEWS_CATEGORIES']:
+            articles = _fetch_listing(api_key, country, category, max_pages)
+            if articles is None:
+                # Keep serving the previous harvest; retried next run
+                summary['failed'] += 1
+                continue
+            summary['added'] += news_index.index_articles(articles, country, category)
+            summary['articles'] += len(articles)
+            summary['listings'] += 1
+            _record(country, category, len(articles))
+
+    summary['pruned'] = news_index.prune(current_app.config.get('NEWS_STORE_RETENTION_DAYS', 7))
+    return summary
+
+
+def ingest_stats():
+    """Last run per listing"""
+    try:
+        return [state.to_dict() for state in NewsIngestState.query.order_by(
+            NewsIngestState.country, NewsIngestState.category)]
+    except SQLAlchemyError:
+        db.session.rollback()
+        return []
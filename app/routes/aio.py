@@ -0,0 +1,170 @@
+"""
+Async Routes
+asyncio versions of the JSON endpoints, served under the /aio prefix.
+The sync blueprints stay registered at their usual paths; argument parsing
+and response building are theirs, so these views only await the providers.
+"""
+import time
+from flask import Blueprint, jsonify, current_app
+from app.api.news_api import AsyncNewsAPI
+from app.api.weather_api import AsyncWeatherAPI
+from app.api.crypto_api import AsyncCryptoAPI
+from app.api.github_api import AsyncGitHubAPI
+from app.api.utils.cache import track_cache_lookups
+from app.api.utils.fanout import async_fan_out
+from app.routes.responses import error_response
+from app.routes.main import DASHBOARD_FAILED, dashboard_sources, dashboard_response
+from app.routes.news import headlines_args, search_args, articles_response
+from app.routes.weather import (current_args, weather_response, forecast_args, fetch_forecast,
+                                forecast_response, batch_args, batch_response)
+from app.routes.crypto import (prices_args, coin_response, top_args, top_response, chart_args,
+                               fetch_chart, indicators_args, indicators_response)
+from app.routes.github import trending_args, search_query, repo_response
+
+aio_bp = Blueprint('aio', __name__)
+news_api = AsyncNewsAPI()
+weather_api = AsyncWeatherAPI()
+crypto_api = AsyncCryptoAPI()
+github_api = AsyncGitHubAPI()
+
+@aio_bp.route('/dashboard/data')
+async def dashboard_data():
+    """API endpoint for dashboard data"""
+    started = time.perf_counter()
+    results = await async_fan_out(
+        dashboard_sources(news_api, weather_api, crypto_api, github_api),
+        deadlines=current_app.config.get('DASHBOARD_DEADLINES'), failed=DASHBOARD_FAILED)
+    return dashboard_response(results, started)
+
+@aio_bp.route('/news/api/headlines')
+async def news_headlines():
+    """API endpoint for headlines"""
+    return articles_response(await news_api.get_top_headlines(**headlines_args()))
+
+@aio_bp.route('/news/api/search')
+async def news_search():
+    """Search news articles"""
+    try:
+        args = search_args()
+    except ValueError as e:
+        return error_response(e, 400)
+
+    return articles_response(await news_api.search_everything(**args))
+
+@aio_bp.route('/weather/api/current/<city>')
+async def weather_current(city):
+    """API endpoint for current weather"""
+    return weather_response(await weather_api.get_current_weather(city, **current_args()))
+
+@aio_bp.route('/weather/api/forecast/<city>')
+async def weather_forecast(city):
+    """API endpoint for weather forecast"""
+    try:
+        args = forecast_args()
+    except ValueError as e:
+        return error_response(e, 400)
+
+    return forecast_response(await fetch_forecast(weather_api, city, **args))
+
+@aio_bp.route('/weather/api/batch')
+async def weather_batch():
+    """API endpoint for current weather in several cities"""
+    try:
+        args = batch_args()
+    except ValueError as e:
+        return error_response(e, 400)
+
+    return batch_response(await weather_api.get_current_weather_batch(**args))
+
+@aio_bp.route('/crypto/api/prices')
+async def crypto_prices():
+    """API endpoint for crypto prices"""
+    try:
+        prices = await crypto_api.get_prices(**prices_args())
+        return jsonify({'success': True, 'prices': prices})
+    except Exception as e:
+        return error_response(e, 500)
+
+@aio_bp.route('/crypto/api/coin/<coin_id>')
+async def crypto_coin_details(coin_id):
+    """API endpoint for coin details"""
+    try:
+        return coin_response(await crypto_api.get_coin_details(coin_id))
+    except Exception as e:
+        return error_response(e, 500)
+
+@aio_bp.route('/crypto/api/trending')
+async def crypto_trending():
+    """API endpoint for trending coins"""
+    try:
+        trending = await crypto_api.get_trending()
+        return jsonify({'success': True, 'trending': trending})
+    except Exception as e:
+        return error_response(e, 500)
+
+@aio_bp.route('/crypto/api/top')
+async def crypto_top():
+    """API endpoint for top coins"""
+    try:
+        lookups = track_cache_lookups()
+        return top_response(await crypto_api.get_top_coins(**top_args()), lookups)
+    except Exception as e:
+        return error_response(e, 500)
+
+@aio_bp.route('/crypto/api/chart/<coin_id>')
+async def crypto_chart(coin_id):
+    """API endpoint for chart data"""
+    try:
+        args = chart_args()
+    except ValueError as e:
+        return error_response(e, 400)
+
+    try:
+        chart_data = await fetch_chart(crypto_api, coin_id, **args)
+        return jsonify({'success': True, 'chart_data': chart_data})
+    except Exception as e:
+        return error_response(e, 500)
+
+@aio_bp.route('/crypto/api/indicators/<coin_id>')
+async def crypto_indicators(coin_id):
+    """API endpoint for technical indicators over chart data"""
+    try:
+        args = indicators_args()
+    except ValueError as e:
+        return error_response(e, 400)
+
+    try:
+        return indicators_response(await crypto_api.get_indicators(coin_id, **args))
+    except Exception as e:
+        return error_response(e, 500)
+
+@aio_bp.route('/github/api/trending')
+async def github_trending():
+    """API endpoint for trending repos"""
+    try:
+        repos = await github_api.get_trending_repos(**trending_args())
+        return jsonify({'success': True, 'repositories': repos})
+    except Exception as e:
+        return error_response(e, 500)
+
+@aio_bp.route('/github/api/search/repositories')
+async def github_search():
+    """API endpoint for searching repos"""
+    try:
+        query = search_query()
+    except ValueError as e:
+        return error_response(e, 400)
+
+    try:
+        repos = await github_api.search_repositories(query)
+        return jsonify({'success': True, 'results': repos})
+    except Exception as e:
+        return error_response(e, 500)
+
+@aio_bp.route('/github/api/repo/<owner>/<repo>')
+async def github_repo(owner, repo):
+    """API endpoint for repo details"""
+    try:
+        return repo_response(await github_api.get_repository(owner, repo))
+    except Exception as e:
+        return error_response(e, 500)
@@ -1,8 +1,14 @@
 """
 Crypto Routes
 """
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, render_template, jsonify, request, Response, stream_with_context, current_app
 from app.api.crypto_api import CryptoAPI
+from app.ticker import get_ticker
+from app.http_cache import content_version
+from app.api.utils.cache import track_cache_lookups
+from app.api.utils.downsample import METHODS as DOWNSAMPLE_METHODS
+from app.api.utils.indicators import parse_indicators
+from app.routes.responses import error_response
 
 crypto_bp = Blueprint('crypto', __name__)
 crypto_api = CryptoAPI()
@@ -19,32 +25,35 @@ def crypto_home():
     """Alias for crypto home (required by templates)"""
     return index()
 
-@crypto_bp.route('/api/prices')
-def api_prices():
-    """API endpoint for crypto prices"""
+def prices_args():
+    """get_prices arguments from the query string"""
     coins = request.args.getlist('coins')
     if not coins:
         coins = ['bitcoin', 'ethereum', 'cardano', 'ripple', 'solana']
-    
-    vs_currency = request.args.get('vs_currency', 'usd')
-    
+    return {'coin_ids': coins, 'vs_currency': request.args.get('vs_currency', 'usd')}
+
+@crypto_bp.route('/api/prices')
+def api_prices():
+    """API endpoint for crypto prices"""
     try:
-        prices = crypto_api.get_prices(coins, vs_currency)
+        prices = crypto_api.get_prices(**prices_args())
         return jsonify({'success': True, 'prices': prices})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e, 500)
+
+def coin_response(details):
+    if details:
+        return jsonify({'success': True, 'coin': details})
+    else:
+        return error_response('Coin not found', 404)
 
 @crypto_bp.route('/api/coin/<coin_id>')
 def api_coin_details(coin_id):
     """API endpoint for coin details"""
     try:
-        details = crypto_api.get_coin_details(coin_id)
-        if details:
-            return jsonify({'success': True, 'coin': details})
-        else:
-            return jsonify({'success': False, 'error': 'Coin not found'}), 404
+        return coin_response(crypto_api.get_coin_details(coin_id))
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e, 500)
 
 @crypto_bp.route('/api/trending')
 def api_trending():
@@ -53,29 +62,105 @@ def api_trending():
         trending = crypto_api.get_trending()
         return jsonify({'success': True, 'trending': trending})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e, 500)
+
+def top_args():
+    """get_top_coins arguments from the query string"""
+    return {
+        'vs_currency': request.args.get('vs_currency', 'usd'),
+        'limit': request.args.get('limit', 100, type=int),
+        'page': request.args.get('page', 1, type=int)
+    }
+
+def top_response(coins, lookups):
+    """Top coins with the age of the cached data served (see track_cache_lookups)"""
+    response = jsonify({
+        'success': True,
+        'coins': coins,
+        'age': lookups.get('age', 0.0),
+        'stale': lookups.get('stale', False)
+    })
+    response.headers['Age'] = str(int(lookups.get('age', 0)))
+    response.set_etag(content_version(coins))
+    return response
 
 @crypto_bp.route('/api/top')
 def api_top():
     """API endpoint for top coins"""
-    vs_currency = request.args.get('vs_currency', 'usd')
-    limit = request.args.get('limit', 100, type=int)
-    page = request.args.get('page', 1, type=int)
-    
     try:
-        coins = crypto_api.get_top_coins(vs_currency, limit, page)
-        return jsonify({'success': True, 'coins': coins})
+        lookups = track_cache_lookups()
+        return top_response(crypto_api.get_top_coins(**top_args()), lookups)
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e, 500)
+
+def chart_args():
+    """Chart arguments from the query string; ValueError for an unknown method"""
+    method = request.args.get('method', 'lttb')
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError('method must be lttb or minmax')
+    return {
+        'vs_currency': request.args.get('vs_currency', 'usd'),
+        'days': request.args.get('days', 7, type=int),
+        'points': request.args.get('points', type=int),
+        'method': method
+    }
+
+def fetch_chart(api, coin_id, vs_currency, days, points, method):
+    """Chart data from a sync or async client (awaitable for the latter)"""
+    if points:
+        return api.get_downsampled_chart(coin_id, vs_currency, days, points, method)
+    return api.get_market_chart(coin_id, vs_currency, days)
 
 @crypto_bp.route('/api/chart/<coin_id>')
 def api_chart(coin_id):
     """API endpoint for chart data"""
-    vs_currency = request.args.get('vs_currency', 'usd')
-    days = request.args.get('days', 7, type=int)
+    try:
+        args = chart_args()
+    except ValueError as e:
+        return error_response(e, 400)
     
     try:
-        chart_data = crypto_api.get_market_chart(coin_id, vs_currency, days)
+        chart_data = fetch_chart(crypto_api, coin_id, **args)
         return jsonify({'success': True, 'chart_data': chart_data})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
+        return error_response(e, 500)
+
+def indicators_args():
+    """get_indicators arguments from the query string; ValueError for a bad indicator list"""
+    return {
+        'vs_currency': request.args.get('vs_currency', 'usd'),
+        'days': request.args.get('days', 30, type=int),
+        'indicators': parse_indicators(request.args.get('indicators', 'sma_20,ema_20,rsi_14'))
+    }
+
+def indicators_response(data):
+    if data:
+        return jsonify({'success': True, 'indicators': data})
+    else:
+        return error_response('No chart data', 404)
+
+@crypto_bp.route('/api/indicators/<coin_id>')
+def api_indicators(coin_id):
+    """API endpoint for technical indicators over chart data"""
+    try:
+        args = indicators_args()
+    except ValueError as e:
+        return error_response(e, 400)
+    
+    try:
+        return indicators_response(crypto_api.get_indicators(coin_id, **args))
+    except Exception as e:
+        return error_response(e, 500)
+
+@crypto_bp.route('/api/stream')
+def api_stream():
+    """Server-sent price updates for the requested coins (changed prices only)"""
+    coins = crypto_api._coin_list(request.args.getlist('coins'))
+    if not coins:
+        return jsonify({'success': False, 'error': 'coins required'}), 400
+    
+    ticker = get_ticker(request.args.get('vs_currency', 'usd'))
+    subscriber = ticker.subscribe(coins[:250], app=current_app._get_current_object())
+    return Response(stream_with_context(ticker.stream(subscriber)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -1,8 +1,12 @@
 """
 GitHub Routes
 """
-from flask import Blueprint, render_template, jsonify, request
+import json
+from datetime import datetime
+from flask import Blueprint, render_template, jsonify, request, Response, stream_with_context, current_app
 from app.api.github_api import GitHubAPI
+from app import github_sync
+from app.routes.responses import error_response
 
 github_bp = Blueprint('github', __name__)
 github_api = GitHubAPI()
@@ -19,40 +23,159 @@ def github_home():
     """Alias for github home (required by templates)"""
     return index()
 
+def trending_args():
+    """get_trending_repos arguments from the query string"""
+    return {
+        'language': request.args.get('language'),
+        'since': request.args.get('since', 'daily'),
+        'limit': request.args.get('limit', 30, type=int)
+    }
+
 @github_bp.route('/api/trending')
 def api_trending():
     """API endpoint for trending repos"""
-    language = request.args.get('language')
-    since = request.args.get('since', 'daily')
-    limit = request.args.get('limit', 30, type=int)
-    
     try:
-        repos = github_api.get_trending_repos(language, since, limit)
+        repos = github_api.get_trending_repos(**trending_args())
         return jsonify({'success': True, 'repositories': repos})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e, 500)
+
+def search_query():
+    """Repository search query; ValueError when missing"""
+    query = request.args.get('q')
+    if not query:
+        raise ValueError('Query required')
+    return query
 
 @github_bp.route('/api/search/repositories')
 def api_search():
     """API endpoint for searching repos"""
-    query = request.args.get('q')
-    if not query:
-        return jsonify({'success': False, 'error': 'Query required'}), 400
+    try:
+        query = search_query()
+    except ValueError as e:
+        return error_response(e, 400)
     
     try:
         repos = github_api.search_repositories(query)
         return jsonify({'success': True, 'results': repos})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e, 500)
+
+def repo_response(result):
+    if result:
+        return jsonify({'success': True, 'repository': result})
+    else:
+        return error_response('Repository not found', 404)
 
 @github_bp.route('/api/repo/<owner>/<repo>')
 def api_repo(owner, repo):
     """API endpoint for repo details"""
     try:
-        result = github_api.get_repository(owner, repo)
-        if result:
-            return jsonify({'success': True, 'repository': result})
-        else:
-            return jsonify({'success': False, 'error': 'Repository not found'}), 404
+        return repo_response(github_api.get_repository(owner, repo))
+    except Exception as e:
+        return error_response(e, 500)
+
+@github_bp.route('/api/repo/<owner>/<repo>/report')
+def api_repo_report(owner, repo):
+    """API endpoint for the full repository report"""
+    try:
+        return github_api.full_report(owner, repo)
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def _ndjson(items, cursor=None):
+    """Stream items as newline-delimited JSON while later pages are fetched"""
+    def generate():
+        for item in items:
+            yield json.dumps(item) + '\n'
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    # Synced repositories are answered from the local store
+    response.headers['X-Data-Source'] = 'local' if cursor else 'upstream'
+    if cursor:
+        response.headers['X-Synced-At'] = cursor.synced_at.isoformat()
+    return response
+
+def _synced(owner, repo):
+    cursor = github_sync.get_cursor(f'{owner}/{repo}')
+    return cursor if cursor is not None and cursor.synced_at else None
+
+def _local(owner, repo):
+    """Cursor of a repository the local store can answer for, or None"""
+    cursor = _synced(owner, repo)
+    # A repository that is no longer saved stops being synced; once its last
+    # sync is too old the listings go back upstream
+    max_age = current_app.config.get('GITHUB_SYNC_MAX_AGE', 3600)
+    if cursor is None or (datetime.utcnow() - cursor.synced_at).total_seconds() > max_age:
+        return None
+    return cursor
+
+def _listing_args():
+    return {
+        'limit': request.args.get('limit', type=int),
+        'max_pages': request.args.get('max_pages', type=int)
+    }
+
+@github_bp.route('/api/repo/<owner>/<repo>/contributors')
+def api_repo_contributors(owner, repo):
+    """Stream repository contributors as NDJSON"""
+    return _ndjson(github_api.analytics.iter_contributors(owner, repo, **_listing_args()))
+
+@github_bp.route('/api/repo/<owner>/<repo>/commits')
+def api_repo_commits(owner, repo):
+    """Stream commit history as NDJSON"""
+    since = request.args.get('since')
+    until = request.args.get('until')
+    cursor = _local(owner, repo)
+    if cursor:
+        return _ndjson(github_sync.iter_local_commits(
+            cursor.full_name, since, until, request.args.get('limit', type=int)), cursor)
+    return _ndjson(github_api.analytics.iter_commits(
+        owner, repo, since=since, until=until, **_listing_args()))
+
+@github_bp.route('/api/repo/<owner>/<repo>/issues')
+def api_repo_issues(owner, repo):
+    """Stream repository issues as NDJSON"""
+    state = request.args.get('state', 'all')
+    cursor = _local(owner, repo)
+    if cursor:
+        return _ndjson(github_sync.iter_local_issues(
+            cursor.full_name, state, limit=request.args.get('limit', type=int)), cursor)
+    return _ndjson(github_api.analytics.iter_issues(owner, repo, state, **_listing_args()))
+
+@github_bp.route('/api/repo/<owner>/<repo>/pulls')
+def api_repo_pulls(owner, repo):
+    """Stream repository pull requests as NDJSON"""
+    state = request.args.get('state', 'all')
+    cursor = _local(owner, repo)
+    if cursor:
+        return _ndjson(github_sync.iter_local_issues(
+            cursor.full_name, state, pull_requests=True,
+            limit=request.args.get('limit', type=int)), cursor)
+    return _ndjson(github_api.analytics.iter_pull_requests(owner, repo, state, **_listing_args()))
+
+@github_bp.route('/api/repo/<owner>/<repo>/releases')
+def api_repo_releases(owner, repo):
+    """Stream repository releases as NDJSON"""
+    return _ndjson(github_api.analytics.iter_releases(owner, repo, **_listing_args()))
+
+@github_bp.route('/api/repo/<owner>/<repo>/sync', methods=['POST'])
+def api_repo_sync(owner, repo):
+    """Sync a tracked (saved) repository into the local store now"""
+    try:
+        full_name = github_sync.tracked_name(f'{owner}/{repo}')
+        if full_name is None:
+            return jsonify({'success': False, 'error': 'Repository is not tracked'}), 404
+        
+        # The periodic job keeps it current; on-demand syncs are throttled
+        cursor = _synced(*full_name.split('/', 1))
+        min_interval = current_app.config.get('GITHUB_SYNC_MIN_INTERVAL', 300)
+        if cursor is not None:
+            wait = min_interval - (datetime.utcnow() - cursor.synced_at).total_seconds()
+            if wait > 0:
+                response = jsonify({'success': False, 'error': 'Synced recently', 'cursor': cursor.to_dict()})
+                response.headers['Retry-After'] = str(int(wait) + 1)
+                return response, 429
+        
+        return jsonify({'success': True, 'sync': github_sync.sync_repo(full_name)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
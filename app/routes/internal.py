@@ -0,0 +1,31 @@
+"""
+Internal Routes
+Endpoints for trusted callers (back-office tools, other services), served
+under /internal. The app has no user accounts, so these answer only requests
+carrying INTERNAL_API_TOKEN in the X-Internal-Token header and are hidden
+(404) while no token is configured.
+"""
+import hmac
+from flask import Blueprint, jsonify, request, current_app
+from app.api.tracker import tracker
+from app.routes.responses import error_response
+
+internal_bp = Blueprint('internal', __name__)
+
+@internal_bp.before_request
+def require_token():
+    token = current_app.config.get('INTERNAL_API_TOKEN')
+    if not token:
+        return error_response('Not found', 404)
+    if not hmac.compare_digest(request.headers.get('X-Internal-Token', ''), token):
+        return error_response('Forbidden', 403)
+
+@internal_bp.route('/portfolio/<int:user_id>')
+def portfolio(user_id):
+    """Valuation of a user's holdings"""
+    vs_currency = request.args.get('vs_currency', 'usd')
+    try:
+        portfolio = tracker.calculate_portfolio_value(vs_currency, user_id=user_id)
+        return jsonify({'success': True, 'portfolio': portfolio})
+    except Exception as e:
+        return error_response(e, 500)
@@ -1,10 +1,42 @@
 """
 app/routes/main.py - Main routes with template rendering
 """
-from flask import Blueprint, render_template, jsonify
+from flask import Blueprint, render_template, jsonify, current_app
+import time
+from app.api.news_api import NewsAPI
+from app.api.weather_api import WeatherAPI
+from app.api.crypto_api import CryptoAPI
+from app.api.github_api import GitHubAPI
+from app.api.github_analytics_core import github_stats
+from app.http_cache import content_version
+from app.api.utils.fanout import fan_out
+from app.api.utils.http import get_transport
+from app.api.utils.cache import cache_stats
+from app.api.utils.singleflight import get_flight
+from app.api.utils.batching import batching_stats
+from app.scheduler import scheduler_stats
+from app.ticker import ticker_stats
+from app.news_ingest import ingest_stats
+from app.alerts import alert_stats
+from app.api.tracker import valuation_stats
 
 main_bp = Blueprint('main', __name__)
 
+# Shared provider clients for the dashboard (created once, not per request)
+dashboard_news_api = NewsAPI()
+dashboard_weather_api = WeatherAPI()
+dashboard_crypto_api = CryptoAPI()
+dashboard_github_api = GitHubAPI()
+
+# The providers return these empty values instead of raising on upstream
+# errors; fan_out reports a source whose result matches as failed
+DASHBOARD_FAILED = {
+    'news': lambda result: not (result or {}).get('articles'),
+    'weather': lambda result: not result,
+    'crypto': lambda result: not result,
+    'github': lambda result: not result
+}
+
 @main_bp.route('/')
 def index():
     """Dashboard home page"""
@@ -20,46 +52,55 @@ def health():
         'message': 'API is running'
     })
 
+@main_bp.route('/stats')
+def stats():
+    """Internal counters for the upstream provider layer"""
+    return jsonify({
+        'transport': get_transport().stats(),
+        'cache': cache_stats(),
+        'coalescing': get_flight().stats(),
+        'price_batching': batching_stats(),
+        'github_rate_limit': github_stats(),
+        'scheduler': scheduler_stats(),
+        'price_ticker': ticker_stats(),
+        'news_ingest': ingest_stats(),
+        'price_alerts': alert_stats(),
+        'portfolio_valuation': valuation_stats()
+    })
+
+def dashboard_sources(news_api, weather_api, crypto_api, github_api):
+    """The dashboard's fan-out calls, for sync or async provider clients"""
+    return {
+        'news': lambda: news_api.get_top_headlines(page_size=5),
+        'weather': lambda: weather_api.get_current_weather('London'),
+        'crypto': lambda: crypto_api.get_prices(['bitcoin', 'ethereum', 'cardano']),
+        'github': lambda: github_api.get_trending_repos(limit=5)
+    }
+
+def dashboard_response(results, started):
+    """Dashboard data from fan-out results, ETag'd on the data alone"""
+    data = {name: result['data'] for name, result in results.items()}
+    response = jsonify({
+        'success': True,
+        'data': data,
+        'sources': {
+            name: {key: value for key, value in result.items() if key != 'data'}
+            for name, result in results.items()
+        },
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    })
+    response.set_etag(content_version(data))
+    response.headers['Age'] = str(int(max(result.get('age', 0) for result in results.values())))
+    return response
+
 @main_bp.route('/dashboard/data')
 def dashboard_data():
     """API endpoint for dashboard data"""
-    from app.api.news_api import NewsAPI
-    from app.api.weather_api import WeatherAPI
-    from app.api.crypto_api import CryptoAPI
-    from app.api.github_api import GitHubAPI
-    
-    news_api = NewsAPI()
-    weather_api = WeatherAPI()
-    crypto_api = CryptoAPI()
-    github_api = GitHubAPI()
-    
-    try:
-        # Get news
-        news_data = news_api.get_top_headlines(page_size=5)
-        
-        # Get weather
-        weather_data = weather_api.get_current_weather('London')
-        
-        # Get crypto
-        crypto_data = crypto_api.get_prices(['bitcoin', 'ethereum', 'cardano'])
-        
-        # Get GitHub
-        github_data = github_api.get_trending_repos(limit=5)
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'news': news_data,
-                'weather': weather_data,
-                'crypto': crypto_data,
-                'github': github_data
-            }
-        })
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    started = time.perf_counter()
+    results = fan_out(
+        dashboard_sources(dashboard_news_api, dashboard_weather_api, dashboard_crypto_api, dashboard_github_api),
+        deadlines=current_app.config.get('DASHBOARD_DEADLINES'), failed=DASHBOARD_FAILED)
+    return dashboard_response(results, started)
 
 
 """
@@ -1,8 +1,9 @@
 """
 News Routes
 """
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, render_template, jsonify, request, current_app
 from app.api.news_api import NewsAPI
+from app.routes.responses import error_response
 
 news_bp = Blueprint('news', __name__)
 news_api = NewsAPI()
@@ -21,58 +22,56 @@ def news_home():
     """Alias for news home (required by templates)"""
     return index()
 
-@news_bp.route('/api/headlines')
-def api_headlines():
-    """API endpoint for headlines"""
-    country = request.args.get('country', 'us')
-    category = request.args.get('category')
+def headlines_args():
+    """get_top_headlines arguments from the query string"""
+    return {
+        'country': request.args.get('country', 'us'),
+        'category': request.args.get('category'),
+        'query': request.args.get('q'),
+        'page': int(request.args.get('page', 1)),
+        'page_size': int(request.args.get('page_size', 20)),
+        'collapse': request.args.get('cluster', 'true').lower() != 'false'
+    }
+
+def search_args():
+    """search_everything arguments from the query string; ValueError without a query"""
     query = request.args.get('q')
-    page = int(request.args.get('page', 1))
-    page_size = int(request.args.get('page_size', 20))
-    
-    result = news_api.get_top_headlines(
-        country=country,
-        category=category,
-        query=query,
-        page=page,
-        page_size=page_size
-    )
+    if not query:
+        raise ValueError('Query required')
     
+    return {
+        'query': query,
+        'from_date': request.args.get('from'),
+        'to_date': request.args.get('to'),
+        'language': request.args.get('language', 'en'),
+        'sort_by': request.args.get('sort_by', 'publishedAt'),
+        'page': int(request.args.get('page', 1)),
+        'page_size': int(request.args.get('page_size', 20)),
+        'collapse': request.args.get('cluster', 'true').lower() != 'false'
+    }
+
+def articles_response(result):
     return jsonify({
         'success': True,
         'articles': result.get('articles', []),
-        'total_results': result.get('totalResults', 0)
+        'total_results': result.get('totalResults', 0),
+        'source': result.get('source', 'newsapi')
     })
 
+@news_bp.route('/api/headlines')
+def api_headlines():
+    """API endpoint for headlines"""
+    return articles_response(news_api.get_top_headlines(**headlines_args()))
+
 @news_bp.route('/api/search')
 def search_news():
     """Search news articles"""
-    query = request.args.get('q')
-    if not query:
-        return jsonify({'success': False, 'error': 'Query required'}), 400
-    
-    from_date = request.args.get('from')
-    to_date = request.args.get('to')
-    language = request.args.get('language', 'en')
-    sort_by = request.args.get('sort_by', 'publishedAt')
-    page = int(request.args.get('page', 1))
-    page_size = int(request.args.get('page_size', 20))
+    try:
+        args = search_args()
+    except ValueError as e:
+        return error_response(e, 400)
     
-    result = news_api.search_everything(
-        query=query,
-        from_date=from_date,
-        to_date=to_date,
-        language=language,
-        sort_by=sort_by,
-        page=page,
-        page_size=page_size
-    )
-    
-    return jsonify({
-        'success': True,
-        'articles': result.get('articles', []),
-        'total_results': result.get('totalResults', 0)
-    })
+    return articles_response(news_api.search_everything(**args))
 
 @news_bp.route('/api/sources')
 def get_sources():
@@ -87,5 +86,4 @@ def get_sources():
 @news_bp.route('/api/categories')
 def get_categories():
     """Get available news categories"""
-    categories = ['business', 'entertainment', 'general', 'health', 'science', 'sports', 'technology']
-    return jsonify({'success': True, 'categories': categories})
\ No newline at end of file
+    return jsonify({'success': True, 'categories': current_app.config['NEWS_CATEGORIES']})
\ No newline at end of file
@@ -0,0 +1,11 @@
+"""
+Response Helpers
+Shared by the sync blueprints and their asyncio copies under /aio, which
+parse their arguments and build their responses with the same functions
+"""
+from flask import jsonify
+
+
+def error_response(error, status):
+    """The JSON error shape of every endpoint"""
+    return jsonify({'success': False, 'error': str(error)}), status
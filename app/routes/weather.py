@@ -1,8 +1,11 @@
 """
 Weather Routes
 """
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, render_template, jsonify, request, current_app
 from app.api.weather_api import WeatherAPI
+from app.api.utils.cache import normalize_text
+from app.models import WeatherFavorite
+from app.routes.responses import error_response
 
 weather_bp = Blueprint('weather', __name__)
 weather_api = WeatherAPI()
@@ -20,25 +23,88 @@ def weather_home():
     """Alias for weather home (required by templates)"""
     return index()
 
+def current_args():
+    """get_current_weather arguments from the query string"""
+    return {'units': request.args.get('units', 'metric')}
+
+def weather_response(result):
+    if result:
+        return jsonify({'success': True, 'weather': result})
+    else:
+        return error_response('Failed to fetch weather data', 400)
+
 @weather_bp.route('/api/current/<city>')
 def api_current(city):
     """API endpoint for current weather"""
-    units = request.args.get('units', 'metric')
-    result = weather_api.get_current_weather(city, units=units)
-    
+    return weather_response(weather_api.get_current_weather(city, **current_args()))
+
+def forecast_args():
+    """Forecast arguments from the query string; ValueError for a bad aggregate"""
+    aggregate = request.args.get('aggregate')
+    if aggregate not in (None, '', 'daily'):
+        raise ValueError("aggregate must be 'daily'")
+    return {
+        'days': int(request.args.get('days', 5)),
+        'units': request.args.get('units', 'metric'),
+        'aggregate': aggregate
+    }
+
+def fetch_forecast(api, city, days, units, aggregate):
+    """Forecast from a sync or async client (awaitable for the latter)"""
+    if aggregate == 'daily':
+        return api.get_daily_forecast(city, days=days, units=units)
+    return api.get_forecast(city, days=days, units=units)
+
+def forecast_response(result):
     if result:
-        return jsonify({'success': True, 'weather': result})
+        return jsonify({'success': True, 'forecast': result})
     else:
-        return jsonify({'success': False, 'error': 'Failed to fetch weather data'}), 400
+        return error_response('Failed to fetch forecast data', 400)
 
 @weather_bp.route('/api/forecast/<city>')
 def api_forecast(city):
     """API endpoint for weather forecast"""
-    days = int(request.args.get('days', 5))
-    units = request.args.get('units', 'metric')
-    result = weather_api.get_forecast(city, days=days, units=units)
+    try:
+        args = forecast_args()
+    except ValueError as e:
+        return error_response(e, 400)
     
-    if result:
-        return jsonify({'success': True, 'forecast': result})
-    else:
-        return jsonify({'success': False, 'error': 'Failed to fetch forecast data'}), 400
+    return forecast_response(fetch_forecast(weather_api, city, **args))
+
+def batch_cities():
+    """
+    Cities requested from the batch endpoint: repeated ?city= values (which
+    may carry a country, e.g. Paris,FR), comma-separated ?cities= and the
+    WeatherFavorite rows of ?user_id=
+    """
+    cities = request.args.getlist('city')
+    for value in request.args.getlist('cities'):
+        cities.extend(city for city in value.split(',') if city.strip())
+    user_id = request.args.get('user_id', type=int)
+    if user_id is not None:
+        favorites = WeatherFavorite.query.filter_by(user_id=user_id).order_by(WeatherFavorite.id)
+        cities.extend(favorite.query_name for favorite in favorites)
+    return cities
+
+def batch_args():
+    """Batch arguments from the query string; ValueError for an unacceptable city list"""
+    cities = batch_cities()
+    if not cities:
+        raise ValueError('At least one city is required (city, cities or user_id)')
+    limit = current_app.config.get('WEATHER_BATCH_MAX_CITIES', 50)
+    if len({normalize_text(city) for city in cities}) > limit:
+        raise ValueError(f'At most {limit} cities per request')
+    return {'cities': cities, 'units': request.args.get('units', 'metric')}
+
+def batch_response(results):
+    return jsonify({'success': True, 'results': results, 'count': len(results)})
+
+@weather_bp.route('/api/batch')
+def api_batch():
+    """API endpoint for current weather in several cities"""
+    try:
+        args = batch_args()
+    except ValueError as e:
+        return error_response(e, 400)
+    
+    return batch_response(weather_api.get_current_weather_batch(**args))
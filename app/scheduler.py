@@ -0,0 +1,176 @@
+"""
+Background Warm-up Scheduler
+Refreshes the hottest provider data on fixed intervals so user requests find
+it already cached, and runs the background jobs that work from the database
+(news ingestion, GitHub sync, price alerts, portfolio valuation).
+
+The scheduler runs only in serving processes: run.py and wsgi.py call
+init_scheduler, while create_app alone (flask CLI commands, scripts,
+benchmarks) does not start it. Only one process per node runs the jobs: the
+first worker to take the scheduler lock file (a local flock) becomes the
+leader, the others keep retrying in case the leader exits. Leadership is per node, not per
+deployment - with several nodes each runs its own leader, so set
+SCHEDULER_ENABLED=false on all but one of them.
+
+Cache warm-ups only help other workers when the cache backend is shared
+(sqlite or redis). On the in-process memory backend they would warm the
+leader alone, so they are skipped unless SCHEDULER_WARM_MEMORY_CACHE is set
+(single-process deployments).
+"""
+
+import fcntl
+import os
+import threading
+import time
+from datetime import datetime
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from app.api.weather_api import WeatherAPI
+from app.api.crypto_api import CryptoAPI
+from app.api.github_api import GitHubAPI
+from app.api.utils.cache import refresh_cached
+from app.api.utils.ratelimit import low_priority
+from app.github_sync import sync_tracked_repos
+from app import news_index
+from app.news_ingest import ingest_headlines
+from app.alerts import check_alerts
+from app.api.tracker import revalue_portfolios
+
+weather_api = WeatherAPI()
+crypto_api = CryptoAPI()
+github_api = GitHubAPI()
+
+# Database jobs: (job id, interval seconds - or the config key holding them, or
+# a function returning them in an app context - callable)
+JOBS = [
+    ('news_ingest', news_index.ingest_interval, ingest_headlines),
+    ('github_sync', 900, sync_tracked_repos),
+    ('price_alerts', 'PRICE_ALERT_INTERVAL', check_alerts),
+    ('portfolio_valuation', 'PORTFOLIO_VALUATION_INTERVAL', revalue_portfolios),
+]
+
+# Provider cache warm-ups, same shape as JOBS - arguments match the calls
+# made by the views so the refreshed entries are the ones users hit
+WARMUPS = [
+    ('weather_london', 540,
+     lambda: refresh_cached(weather_api.get_current_weather, 'London')),
+    ('crypto_dashboard_prices', 25,
+     lambda: refresh_cached(crypto_api.get_prices, ['bitcoin', 'ethereum', 'cardano'])),
+    ('crypto_trending', 240,
+     lambda: refresh_cached(crypto_api.get_trending)),
+    ('crypto_top_50', 50,
+     lambda: refresh_cached(crypto_api.get_top_coins, limit=50)),
+    ('github_trending', 540,
+     lambda: refresh_cached(github_api.search_repositories,
+                            github_api._trending_query(None, 'daily'), limit=5)),
+]
+
+scheduler = None
+job_stats = {}
+_lock_file = None
+_stats_lock = threading.Lock()
+
+
+def _acquire_leader_lock(path):
+    """Take the node-wide scheduler lock without blocking; True on success"""
+    global _lock_file
+    handle = open(path, 'a+')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    # Keep the handle open for the life of the process to hold the lock
+    _lock_file = handle
+    return True
+
+
+def _tracked(app, job_id, func):
+    """Wrap a job so it runs in the app context and records its timing"""
+    def run():
+        started = time.perf_counter()
+        error = None
+        try:
+            # Warm-ups are deferred first when an upstream's quota runs low
+            with app.app_context(), low_priority():
+                func()
+        except Exception as e:
+            error = str(e)
+            print(f"Scheduler job {job_id} failed: {e}")
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        with _stats_lock:
+            stats = job_stats.setdefault(job_id, {'runs': 0, 'failures': 0})
+            stats['runs'] += 1
+            stats['last_refresh'] = datetime.utcnow().isoformat()
+            stats['last_duration_ms'] = duration_ms
+            stats['last_error'] = error
+            if error:
+                stats['failures'] += 1
+
+    return run
+
+
+def _start(app):
+    global scheduler
+    jitter = app.config.get('SCHEDULER_JITTER', 5)
+    scheduler = BackgroundScheduler(daemon=True)
+    jobs = list(JOBS)
+    shared_cache = app.config.get('CACHE_BACKEND', 'memory').lower() != 'memory'
+    if shared_cache or app.config.get('SCHEDULER_WARM_MEMORY_CACHE'):
+        jobs.extend(WARMUPS)
+    else:
+        print("Scheduler: cache warm-ups skipped - the memory cache backend is per process, "
+              "so only the leader would see them (use CACHE_BACKEND=sqlite or redis)")
+    for job_id, interval, func in jobs:
+        if isinstance(interval, str):
+            interval = app.config[interval]
+        elif callable(interval):
+            with app.app_context():
+                interval = interval()
+        scheduler.add_job(_tracked(app, job_id, func), 'interval',
+                          id=job_id, seconds=interval, jitter=jitter,
+                          next_run_time=datetime.now(), coalesce=True,
+                          max_instances=1)
+    scheduler.start()
+
+
+def init_scheduler(app):
+    """Start the warm-up scheduler in this process if it wins the leader lock"""
+    if not app.config.get('SCHEDULER_ENABLED', True) or app.config.get('TESTING'):
+        return
+
+    lock_path = app.config.get('SCHEDULER_LOCK_FILE', '/tmp/flask-dashboard-scheduler.lock')
+    retry = app.config.get('SCHEDULER_LEADER_RETRY', 60)
+
+    def try_lead():
+        if _acquire_leader_lock(lock_path):
+            _start(app)
+            return
+        timer = threading.Timer(retry, try_lead)
+        timer.daemon = True
+        timer.start()
+
+    try_lead()
+
+
+def scheduler_stats():
+    """Leader status plus last refresh time and duration per job"""
+    with _stats_lock:
+        jobs = {job_id: dict(stats) for job_id, stats in job_stats.items()}
+
+    if scheduler is not None:
+        for job in scheduler.get_jobs():
+            entry = jobs.setdefault(job.id, {'runs': 0, 'failures': 0})
+            entry['next_run'] = job.next_run_time.isoformat() if job.next_run_time else None
+
+    return {
+        'leader': scheduler is not None,
+        'pid': os.getpid(),
+        'jobs': jobs
+    }
@@ -0,0 +1,166 @@
+"""
+Price Ticker
+Server-sent price updates for the crypto page. One poller per currency
+fetches the union of the coins all connected clients watch and pushes only
+the prices that changed, so upstream cost follows the number of distinct
+coins watched rather than the number of open tabs.
+"""
+
+import json
+import threading
+
+from app.api.crypto_api import CryptoAPI
+from app.api.utils.http import _config_value
+
+
+class Subscriber:
+    """One connected client: its coins and the updates not yet sent to it"""
+
+    def __init__(self, coins):
+        self.coins = frozenset(coins)
+        self.pending = {}
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    def push(self, prices):
+        """Merge updates for this client's coins; a slow client only gets the latest"""
+        updates = {coin: prices[coin] for coin in self.coins if coin in prices}
+        if not updates:
+            return
+        with self._lock:
+            self.pending.update(updates)
+        self._ready.set()
+
+    def wait(self, timeout):
+        """Return the pending updates, or {} if none arrived within timeout"""
+        if not self._ready.wait(timeout):
+            return {}
+        with self._lock:
+            updates, self.pending = self.pending, {}
+            self._ready.clear()
+        return updates
+
+
+class PriceTicker:
+    """Shared poller for one quote currency"""
+
+    def __init__(self, vs_currency='usd', interval=15, api=None):
+        self.vs_currency = vs_currency
+        self.interval = interval
+        self.api = api or CryptoAPI()
+        self.prices = {}
+        self.polls = 0
+        self.pushes = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._app = None
+
+    def subscribe(self, coins, app=None):
+        """Register a client; starts the poller if it is not running"""
+        subscriber = Subscriber(coins)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            self._app = self._app or app
+            known = {coin: self.prices[coin] for coin in subscriber.coins if coin in self.prices}
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True,
+                                                name=f'price-ticker-{self.vs_currency}')
+                self._thread.start()
+            elif len(known) < len(subscriber.coins):
+                # New coins: fetch now rather than at the next tick
+                self._wake.set()
+        # Send what is already known right away
+        subscriber.push(known)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def watched_coins(self):
+        with self._lock:
+            return sorted(set().union(*(s.coins for s in self._subscribers)))
+
+    def poll(self):
+        """Fetch the watched coins once and push what changed; returns the changes"""
+        coins = self.watched_coins()
+        if not coins:
+            return {}
+        latest = self.api.get_prices(coins, self.vs_currency)
+        self.polls += 1
+
+        with self._lock:
+            changed = {coin: data for coin, data in latest.items() if self.prices.get(coin) != data}
+            self.prices.update(changed)
+            subscribers = list(self._subscribers)
+        if changed:
+            for subscriber in subscribers:
+                subscriber.push(changed)
+            self.pushes += 1
+        return changed
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    # Last client left: stop until someone subscribes again
+                    self._thread = None
+                    return
+                app = self._app
+            try:
+                if app is None:
+                    self.poll()
+                else:
+                    with app.app_context():
+                        self.poll()
+            except Exception as e:
+                print(f"Price ticker error: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def stream(self, subscriber, heartbeat=15):
+        """Yield server-sent events for a subscriber until the client disconnects"""
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                updates = subscriber.wait(heartbeat)
+                if updates:
+                    yield f'event: prices\ndata: {json.dumps(updates)}\n\n'
+                else:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ': keep-alive\n\n'
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'coins': len(set().union(*(s.coins for s in self._subscribers))),
+                'running': self._thread is not None,
+                'polls': self.polls,
+                'pushes': self.pushes,
+                'interval': self.interval
+            }
+
+
+_tickers = {}
+_tickers_lock = threading.Lock()
+
+
+def get_ticker(vs_currency='usd'):
+    """Return the process-wide ticker for a quote currency"""
+    ticker = _tickers.get(vs_currency)
+    if ticker is None:
+        with _tickers_lock:
+            ticker = _tickers.get(vs_currency)
+            if ticker is None:
+                ticker = PriceTicker(vs_currency, _config_value('CRYPTO_TICKER_INTERVAL', 15))
+                _tickers[vs_currency] = ticker
+    return ticker
+
+
+def ticker_stats():
+    return {currency: ticker.stats() for currency, ticker in _tickers.items()}
@@ -0,0 +1,76 @@
+"""
+Sync vs. async provider throughput against a slow stub upstream.
+
+Usage: python -m benchmarks.bench_async [--requests 400] [--delay 0.2] [--threads 8]
+
+The sync path models a worker with a fixed number of request threads, each
+blocked for the whole upstream round trip. The async path serves the same
+requests from a single event loop. Each request fetches /simple/price for a
+coin of its own through the provider's raw fetch: get_prices would answer
+from the cache or merge concurrent lookups into one call (price batching),
+and then neither path would wait on the upstream. The cache is also reset
+before each run.
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.api.crypto_api import CryptoAPI, AsyncCryptoAPI
+from app.api.utils.cache import set_cache
+from app.api.utils.cache_backends import TTLCache
+from benchmarks.stub_upstream import StubUpstream
+
+
+def run_sync(base_url, requests_count, threads):
+    api = CryptoAPI()
+    api.base_url = base_url
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda i: api._fetch_simple_prices([f'coin-{i}'], ['usd']), range(requests_count)))
+    elapsed = time.perf_counter() - started
+    return elapsed, sum(1 for r in results if r)
+
+
+def run_async(base_url, requests_count, concurrency):
+    api = AsyncCryptoAPI()
+    api.base_url = base_url
+
+    async def main():
+        limit = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with limit:
+                return await api._fetch_simple_prices([f'coin-{i}'], ['usd'])
+
+        return await asyncio.gather(*(one(i) for i in range(requests_count)))
+
+    started = time.perf_counter()
+    results = asyncio.run(main())
+    elapsed = time.perf_counter() - started
+    return elapsed, sum(1 for r in results if r)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--delay', type=float, default=0.2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, default=200)
+    args = parser.parse_args()
+
+    with StubUpstream(delay=args.delay) as stub:
+        for name, runner, width in (
+            ('sync', run_sync, args.threads),
+            ('async', run_async, args.concurrency),
+        ):
+            set_cache(TTLCache())
+            hits = stub.hits
+            elapsed, ok = runner(stub.url, args.requests, width)
+            print(f'{name:>5}: {args.requests} requests ({ok} ok, {stub.hits - hits} upstream) '
+                  f'in {elapsed:.2f}s -> {args.requests / elapsed:.1f} req/s (width={width})')
+
+
+if __name__ == '__main__':
+    main()
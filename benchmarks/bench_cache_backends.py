@@ -0,0 +1,83 @@
+"""
+Cache hit latency: in-process memory vs. shared SQLite vs. Redis.
+
+Usage: python -m benchmarks.bench_cache_backends [--hits 5000] [--redis-url URL]
+
+Without --redis-url the Redis backend runs against fakeredis (an in-process
+Redis stand-in) when it is installed, which measures serialization cost but
+not the network round trip.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from app.api.utils.cache_backends import TTLCache, SQLiteCache, RedisCache
+
+PAYLOADS = {
+    # Shape of /simple/price for the dashboard coins
+    'prices': {
+        coin: {'usd': 1234.5, 'usd_24h_change': -1.2, 'usd_market_cap': 1e11, 'usd_24h_vol': 1e9}
+        for coin in ('bitcoin', 'ethereum', 'cardano')
+    },
+    # Shape of /coins/markets?per_page=100
+    'top_100': [
+        {'id': f'coin-{i}', 'symbol': f'c{i}', 'name': f'Coin {i}', 'image': 'https://example.com/x.png',
+         'current_price': 1.0 + i, 'market_cap': 1e9 * i, 'market_cap_rank': i,
+         'total_volume': 1e7 * i, 'price_change_percentage_24h': 0.5,
+         'price_change_percentage_7d_in_currency': -2.5}
+        for i in range(100)
+    ],
+}
+
+
+def measure(backend, hits):
+    results = {}
+    for name, payload in PAYLOADS.items():
+        key = f'bench:{name}'
+        backend.set(key, payload, ttl=600)
+        timings = []
+        for _ in range(hits):
+            started = time.perf_counter()
+            hit, _value = backend.get(key)
+            timings.append((time.perf_counter() - started) * 1e6)
+            assert hit
+        timings.sort()
+        results[name] = (statistics.median(timings), timings[int(len(timings) * 0.99) - 1])
+    return results
+
+
+def redis_backend(url):
+    if url:
+        return RedisCache(url)
+    try:
+        import fakeredis
+    except ImportError:
+        return None
+    return RedisCache(client=fakeredis.FakeRedis())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hits', type=int, default=5000)
+    parser.add_argument('--redis-url')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = [
+            TTLCache(),
+            SQLiteCache(os.path.join(tmp, 'cache.sqlite3')),
+            redis_backend(args.redis_url),
+        ]
+        for backend in backends:
+            if backend is None:
+                print('redis: skipped (pass --redis-url or install fakeredis)')
+                continue
+            for name, (p50, p99) in measure(backend, args.hits).items():
+                print(f'{backend.name:>6} {name:>8}: p50 {p50:8.1f} us   p99 {p99:8.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Bytes on the wire and serialization CPU for the large JSON endpoints.
+
+Usage: python -m benchmarks.bench_json_wire [--repeat 50]
+
+Payloads are synthetic but shaped like CoinGecko's responses:
+/crypto/api/top?limit=100, /crypto/api/trending (raw passthrough before,
+slimmed after) and /crypto/api/chart for 365 days of hourly points. "before"
+is the stdlib encoder used by Flask's default provider with no compression;
+"after" is orjson plus gzip (and brotli when installed).
+"""
+
+import argparse
+import json
+import random
+import time
+
+from app.api.crypto_api import CryptoAPI
+from app.compression import brotli, compress
+from app.json_provider import orjson, OrjsonProvider
+
+CURRENCIES = ['usd', 'eur', 'gbp', 'jpy', 'btc', 'eth', 'aud', 'cad', 'chf', 'cny', 'inr', 'krw',
+              'brl', 'rub', 'try', 'sek', 'nok', 'dkk', 'pln', 'czk', 'huf', 'mxn', 'sgd', 'hkd',
+              'nzd', 'zar', 'thb', 'idr', 'myr', 'php', 'vnd', 'ils', 'aed', 'sar', 'kwd', 'bhd',
+              'ars', 'clp', 'twd', 'uah', 'ngn', 'pkr', 'lkr', 'bdt', 'mmk', 'bmd', 'vef', 'xag',
+              'xau', 'xdr', 'bits', 'sats', 'ltc', 'bch', 'bnb', 'eos', 'xrp', 'xlm', 'link', 'dot']
+
+
+def top_coins(count=100):
+    return [{
+        'id': f'coin-{i}', 'symbol': f'c{i}', 'name': f'Coin Number {i}',
+        'image': f'https://coin-images.coingecko.com/coins/images/{i}/large/coin-{i}.png?1696501400',
+        'current_price': random.uniform(0.01, 60000), 'market_cap': random.randint(10**6, 10**12),
+        'market_cap_rank': i + 1, 'fully_diluted_valuation': random.randint(10**6, 10**12),
+        'total_volume': random.randint(10**5, 10**10), 'high_24h': random.uniform(1, 60000),
+        'low_24h': random.uniform(1, 60000), 'price_change_24h': random.uniform(-100, 100),
+        'price_change_percentage_24h': random.uniform(-10, 10),
+        'market_cap_change_24h': random.uniform(-10**8, 10**8),
+        'market_cap_change_percentage_24h': random.uniform(-10, 10),
+        'circulating_supply': random.uniform(10**6, 10**10), 'total_supply': random.uniform(10**6, 10**10),
+        'max_supply': None, 'ath': random.uniform(1, 70000), 'ath_change_percentage': random.uniform(-90, 0),
+        'ath_date': '2024-03-14T07:10:36.635Z', 'atl': random.uniform(0.001, 10),
+        'atl_change_percentage': random.uniform(0, 10**5), 'atl_date': '2013-07-06T00:00:00.000Z',
+        'roi': None, 'last_updated': '2026-10-18T16:00:00.000Z',
+        'price_change_percentage_7d_in_currency': random.uniform(-20, 20)
+    } for i in range(count)]
+
+
+def trending_raw(count=15):
+    return {'coins': [{'item': {
+        'id': f'trend-{i}', 'coin_id': 1000 + i, 'name': f'Trending {i}', 'symbol': f'T{i}',
+        'market_cap_rank': 50 + i, 'thumb': f'https://assets.coingecko.com/coins/images/{i}/thumb/t.png',
+        'small': f'https://assets.coingecko.com/coins/images/{i}/small/t.png',
+        'large': f'https://assets.coingecko.com/coins/images/{i}/large/t.png',
+        'slug': f'trending-{i}', 'price_btc': random.random() / 1000, 'score': i,
+        'data': {
+            'price': random.uniform(0.01, 100), 'price_btc': str(random.random() / 1000),
+            'price_change_percentage_24h': {c: random.uniform(-20, 20) for c in CURRENCIES},
+            'market_cap': f'${random.randint(10**6, 10**9):,}',
+            'market_cap_btc': str(random.uniform(100, 10000)),
+            'total_volume': f'${random.randint(10**5, 10**8):,}',
+            'total_volume_btc': str(random.uniform(1, 1000)),
+            'sparkline': f'https://www.coingecko.com/coins/{1000 + i}/sparkline.svg',
+            'content': {'title': f'What is Trending {i}?', 'description': 'Lorem ipsum dolor sit amet. ' * 20}
+        }
+    }} for i in range(count)], 'nfts': [], 'categories': []}
+
+
+def chart(points=365 * 24):
+    start = 1_700_000_000_000
+    series = lambda scale: [[start + i * 3_600_000, random.uniform(0.9, 1.1) * scale] for i in range(points)]
+    return {'prices': series(60000), 'market_caps': series(1.2e12), 'total_volumes': series(3e10)}
+
+
+def timed(func, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.process_time() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    random.seed(1)
+
+    api = CryptoAPI()
+    raw_trending = trending_raw()
+    top, history = top_coins(), chart()
+    cases = [
+        ('top?limit=100', top, top),
+        ('trending', raw_trending, api._format_trending(raw_trending)),
+        ('chart days=365', history, history),
+    ]
+
+    stdlib = lambda obj: json.dumps(obj, sort_keys=True, separators=(',', ':')).encode()
+    fast = (lambda obj: orjson.dumps(obj, option=OrjsonProvider.options)) if orjson else stdlib
+
+    print(f"{'endpoint':<16} {'':<7} {'encode ms':>10} {'raw B':>10} {'gzip B':>9} {'gzip ms':>8}"
+          + (f" {'br B':>9} {'br ms':>7}" if brotli else ''))
+    for name, before, after in cases:
+        body, encode_ms = timed(lambda: stdlib(before), args.repeat)
+        print(f"{name:<16} {'before':<7} {encode_ms:>10.2f} {len(body):>10}")
+
+        body, encode_ms = timed(lambda: fast(after), args.repeat)
+        zipped, gzip_ms = timed(lambda: compress(body, 'gzip'), args.repeat)
+        line = f"{'':<16} {'after':<7} {encode_ms:>10.2f} {len(body):>10} {len(zipped):>9} {gzip_ms:>8.2f}"
+        if brotli:
+            squeezed, br_ms = timed(lambda: compress(body, 'br'), args.repeat)
+            line += f" {len(squeezed):>9} {br_ms:>7.2f}"
+        print(line)
+    if not brotli:
+        print('(brotli not installed: br columns skipped)')
+
+
+if __name__ == '__main__':
+    main()
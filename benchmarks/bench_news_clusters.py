@@ -0,0 +1,90 @@
+"""
+Near-duplicate clustering of news headlines: pairwise Jaccard vs MinHash/LSH.
+
+Usage: python -m benchmarks.bench_news_clusters [--sizes 1000,2000,4000,40000] [--naive-max 4000]
+
+The corpus is synthetic but shaped like a syndicated feed: each story has a
+random headline and description that several outlets republish with small
+edits (a word swapped or dropped). "naive" compares every pair of shingle
+sets exactly, as a dedupe without an index would; "lsh" is
+app.api.utils.minhash.cluster. Recall and precision are over
+same-story pairs; clusters are compared as pair sets.
+"""
+
+import argparse
+import itertools
+import random
+import string
+import time
+
+from app.api.utils import minhash
+
+OUTLETS = ['Reuters', 'AP', 'CNN', 'BBC News', 'The Verge', 'Bloomberg', 'Forbes', 'NPR']
+
+
+def corpus(count, vocabulary=5000):
+    words = [''.join(random.choices(string.ascii_lowercase, k=random.randint(3, 10)))
+             for _ in range(vocabulary)]
+    texts, stories = [], []
+    story = 0
+    while len(texts) < count:
+        title = random.choices(words, k=random.randint(8, 14))
+        description = random.choices(words, k=random.randint(15, 25))
+        for outlet in random.sample(OUTLETS, random.randint(1, 4)):
+            edited = list(title)
+            if random.random() < 0.5:
+                edited[random.randrange(len(edited))] = random.choice(words)
+            if random.random() < 0.3:
+                del edited[random.randrange(len(edited))]
+            # The " - Outlet" title suffix is left out: cluster_text strips it
+            texts.append(f"{' '.join(edited)} {' '.join(description)}")
+            stories.append(story)
+        story += 1
+    return texts[:count], stories[:count]
+
+
+def naive(texts, threshold=minhash.THRESHOLD):
+    sets = [minhash.shingles(text) for text in texts]
+    labels = list(range(len(texts)))
+    for i in range(len(sets)):
+        for j in range(i):
+            union = len(sets[i] | sets[j])
+            if union and len(sets[i] & sets[j]) / union >= threshold:
+                labels[i] = labels[j]
+                break
+    return labels
+
+
+def pairs(labels):
+    groups = {}
+    for i, label in enumerate(labels):
+        groups.setdefault(label, []).append(i)
+    return {pair for members in groups.values() for pair in itertools.combinations(members, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='1000,2000,4000,40000')
+    parser.add_argument('--naive-max', type=int, default=4000)
+    args = parser.parse_args()
+
+    print(f"{'texts':>7} {'method':<6} {'ms':>10} {'clusters':>9} {'recall':>7} {'precision':>10}")
+    for size in (int(value) for value in args.sizes.split(',')):
+        random.seed(size)
+        texts, stories = corpus(size)
+        truth = pairs(stories)
+        methods = [('lsh', minhash.cluster)]
+        if size <= args.naive_max:
+            methods.insert(0, ('naive', naive))
+        for name, func in methods:
+            started = time.perf_counter()
+            labels = func(texts)
+            elapsed = (time.perf_counter() - started) * 1000
+            found = pairs(labels)
+            recall = len(found & truth) / len(truth) if truth else 1.0
+            precision = len(found & truth) / len(found) if found else 1.0
+            print(f"{size:>7} {name:<6} {elapsed:>10.1f} {len(set(labels)):>9} {recall:>7.3f} {precision:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
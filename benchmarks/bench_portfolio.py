@@ -0,0 +1,120 @@
+"""
+Portfolio valuation: per-holding price lookups vs the batch valuation engine.
+
+Usage: python -m benchmarks.bench_portfolio [--users 500] [--coins 300] [--delay 0.005]
+
+Users get a random handful of CryptoHolding rows in a scratch SQLite
+database. "per holding" loads each user's holdings and prices them one coin
+at a time (the price cache is shared, so repeated coins are cache hits);
+"per user" is CryptoTracker.calculate_portfolio_value for every user;
+"all users" is CryptoTracker.value_all_users. The price cache is cleared
+before each model, as it would be by the next price refresh. Upstream calls
+go to a local stub; SQL statements are counted on the engine.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import event
+
+from benchmarks.stub_upstream import StubUpstream
+
+# Price every lookup immediately instead of waiting out a batching window
+os.environ['CRYPTO_BATCH_WINDOW_MS'] = '0'
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'portfolio.db')
+
+from app import create_app, db
+from app.models import User, CryptoHolding
+from app.api.crypto_api import CryptoAPI
+from app.api.tracker import CryptoTracker
+from app.api.utils.cache import set_cache
+from app.api.utils.cache_backends import TTLCache
+
+
+def fixed_prices(path, query):
+    """Stub handler pricing each coin the same whatever else is requested"""
+    ids = query.get('ids', [''])[0].split(',')
+    currencies = query.get('vs_currencies', ['usd'])[0].split(',')
+    return {coin: {currency: 100.0 + int(coin.rsplit('-', 1)[1]) for currency in currencies} for coin in ids}
+
+
+def populate(users, coins):
+    coin_ids = [f'coin-{i}' for i in range(coins)]
+    db.session.bulk_insert_mappings(User, [
+        {'id': i + 1, 'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': 'x'}
+        for i in range(users)])
+    db.session.bulk_insert_mappings(CryptoHolding, [
+        {'user_id': i + 1, 'coin_id': coin, 'coin_symbol': coin[-4:], 'coin_name': coin,
+         'amount': random.uniform(0.01, 10), 'purchase_price': random.choice([None, random.uniform(50, 500)])}
+        for i in range(users) for coin in random.sample(coin_ids, random.randint(1, 10))])
+    db.session.commit()
+
+
+def per_holding(api, user_ids):
+    totals = {}
+    for user_id in user_ids:
+        total = 0.0
+        for holding in CryptoHolding.query.filter_by(user_id=user_id):
+            price = api.get_prices([holding.coin_id]).get(holding.coin_id, {}).get('usd')
+            if price is not None:
+                total += holding.amount * price
+        totals[user_id] = total
+    return totals
+
+
+def per_user(tracker, user_ids):
+    return {user_id: tracker.calculate_portfolio_value(user_id=user_id)['total_value'] for user_id in user_ids}
+
+
+def all_users(tracker, user_ids):
+    return {summary['user_id']: summary['total_value'] for summary in tracker.value_all_users()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--coins', type=int, default=300)
+    parser.add_argument('--delay', type=float, default=0.005, help='stub upstream latency (s)')
+    args = parser.parse_args()
+    random.seed(1)
+
+    app = create_app()
+    statements = [0]
+    with app.app_context():
+        db.create_all()
+        populate(args.users, args.coins)
+        holdings = CryptoHolding.query.count()
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.__setitem__(0, statements[0] + 1))
+
+        with StubUpstream(delay=args.delay, handler=fixed_prices) as stub:
+            api = CryptoAPI()
+            api.base_url = stub.url
+            tracker = CryptoTracker(api)
+            user_ids = list(range(1, args.users + 1))
+            models = [
+                ('per holding', lambda: per_holding(api, user_ids)),
+                ('per user', lambda: per_user(tracker, user_ids)),
+                ('all users', lambda: all_users(tracker, user_ids)),
+            ]
+
+            print(f"{args.users} users, {holdings} holdings over {args.coins} coins, "
+                  f"upstream delay {args.delay * 1000:.0f}ms")
+            print(f"{'model':<12} {'queries':>8} {'upstream':>9} {'seconds':>8} {'max diff':>9}")
+            reference = None
+            for name, run in models:
+                set_cache(TTLCache())
+                db.session.expire_all()
+                hits, queries = stub.hits, statements[0]
+                started = time.perf_counter()
+                totals = run()
+                elapsed = time.perf_counter() - started
+                reference = reference or totals
+                diff = max(abs(totals.get(user_id, 0.0) - value) for user_id, value in reference.items())
+                print(f"{name:<12} {statements[0] - queries:>8} {stub.hits - hits:>9} {elapsed:>8.2f} {diff:>9.2g}")
+
+
+if __name__ == '__main__':
+    main()
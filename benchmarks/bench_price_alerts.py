@@ -0,0 +1,144 @@
+"""
+Price alert evaluation: scanning every alert per tick vs the indexed alert book.
+
+Usage: python -m benchmarks.bench_price_alerts [--alerts 1000000] [--coins 200] [--ticks 500]
+
+Alerts get a random coin, condition and a target within 30% of the coin's
+starting price; prices then random-walk (1% per tick). "python scan" checks
+every active alert in a loop, as evaluating PriceAlert rows one by one
+would; "numpy scan" is the same check as one vectorized mask over all
+alerts; "alert book" is app.alerts.AlertBook.tick. Triggered ids are
+compared tick by tick. The database section loads the alerts from a scratch
+SQLite file with AlertBook.refresh and marks triggered ones through
+app.alerts.evaluate (bulk UPDATE).
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'alerts.db')
+
+from app import create_app, db
+from app.models import User, PriceAlert
+from app.alerts import AlertBook, evaluate, get_alert_book
+
+
+def make_alerts(count, coins, rng):
+    start = rng.uniform(1, 1000, coins)
+    coin = rng.integers(0, coins, count)
+    above = rng.random(count) < 0.5
+    target = start[coin] * rng.uniform(0.7, 1.3, count)
+    return start, coin, above, target
+
+
+def price_walk(start, ticks, rng):
+    steps = rng.normal(0, 0.01, (ticks, len(start)))
+    return start * np.exp(np.cumsum(steps, axis=0))
+
+
+def python_scan(alerts, prices):
+    """alerts: [coin, above, target, id, active] lists; prices indexed by coin"""
+    hits = []
+    for alert in alerts:
+        if alert[4]:
+            price = prices[alert[0]]
+            if (price >= alert[2]) if alert[1] else (price <= alert[2]):
+                alert[4] = False
+                hits.append(alert[3])
+    return hits
+
+
+def numpy_scan(state, prices):
+    coin, above, target, active = state
+    price = prices[coin]
+    hit = active & np.where(above, price >= target, price <= target)
+    active &= ~hit
+    return np.flatnonzero(hit) + 1
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--alerts', type=int, default=1_000_000)
+    parser.add_argument('--coins', type=int, default=200)
+    parser.add_argument('--ticks', type=int, default=500)
+    parser.add_argument('--python-ticks', type=int, default=5, help='ticks run through the python scan')
+    parser.add_argument('--skip-db', action='store_true')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    start, coin, above, target = make_alerts(args.alerts, args.coins, rng)
+    walk = price_walk(start, args.ticks, rng)
+    names = np.array([f'coin-{i}' for i in range(args.coins)])
+    ids = np.arange(1, args.alerts + 1)
+    conditions = np.where(above, 'above', 'below')
+    print(f"{args.alerts} alerts over {args.coins} coins, {args.ticks} ticks")
+
+    book = AlertBook()
+    _, build = timed(lambda: book.add(zip(ids.tolist(), names[coin].tolist(), conditions.tolist(),
+                                          target.tolist())))
+    python_alerts = [[c, a, t, i, True] for c, a, t, i in zip(coin.tolist(), above.tolist(),
+                                                                  target.tolist(), ids.tolist())]
+    numpy_state = (coin, above, target, np.ones(args.alerts, dtype=bool))
+
+    results = {'python scan': [], 'numpy scan': [], 'alert book': []}
+    mismatches = 0
+    triggered = 0
+    for tick, prices in enumerate(walk):
+        by_name = dict(zip(names.tolist(), prices.tolist()))
+        expected, elapsed = timed(lambda: numpy_scan(numpy_state, prices))
+        results['numpy scan'].append(elapsed)
+        got, elapsed = timed(lambda: book.tick(by_name))
+        results['alert book'].append(elapsed)
+        if tick < args.python_ticks:
+            scanned, elapsed = timed(lambda: python_scan(python_alerts, prices))
+            results['python scan'].append(elapsed)
+            mismatches += set(scanned) != set(expected.tolist())
+        mismatches += set(got.ids.tolist()) != set(expected.tolist())
+        triggered += len(expected)
+
+    print(f"book build {build:.2f}s, {triggered} triggered, {mismatches} mismatching ticks")
+    print(f"{'model':<12} {'ticks':>6} {'mean ms':>9} {'first ms':>9} {'max ms':>8}")
+    for name, timings in results.items():
+        timings = np.array(timings) * 1000
+        print(f"{name:<12} {len(timings):>6} {timings.mean():>9.3f} {timings[0]:>9.3f} {timings.max():>8.3f}")
+
+    if args.skip_db:
+        return
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, username='bench', email='bench@example.com', password_hash='x'))
+        db.session.commit()
+        _, elapsed = timed(lambda: db.session.execute(PriceAlert.__table__.insert(), [
+            {'id': i, 'user_id': 1, 'coin_id': n, 'coin_symbol': 'X', 'target_price': t, 'condition': c,
+             'is_active': True, 'triggered': False}
+            for i, n, c, t in zip(ids.tolist(), names[coin].tolist(), conditions.tolist(), target.tolist())]))
+        db.session.commit()
+        print(f"\ndatabase: inserted {args.alerts} rows in {elapsed:.1f}s")
+
+        book = get_alert_book()
+        loaded, elapsed = timed(book.refresh)
+        print(f"refresh loaded {loaded} alerts in {elapsed:.2f}s")
+        marked = 0
+        started = time.perf_counter()
+        for prices in walk:
+            marked += evaluate(dict(zip(names.tolist(), prices.tolist())))
+        elapsed = time.perf_counter() - started
+        stored = PriceAlert.query.filter_by(triggered=True).count()
+        print(f"evaluate x{args.ticks}: {marked} rows marked ({stored} stored), "
+              f"{elapsed / args.ticks * 1000:.2f} ms per tick including the UPDATE")
+
+
+if __name__ == '__main__':
+    main()
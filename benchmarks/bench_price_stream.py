@@ -0,0 +1,153 @@
+"""
+Server load for live crypto prices: per-tab polling vs. the shared SSE ticker.
+
+Usage: python -m benchmarks.bench_price_stream [--subscribers 1000] [--rounds 3]
+
+Each simulated tab watches a random handful of the top coins. In the polling
+model every tab calls /crypto/api/prices once per refresh (the cache is
+cleared between rounds, as the 30s TTL would be by the next refresh). In the
+streaming model one PriceTicker polls the union of the watched coins and
+pushes changes to every subscriber. Upstream calls go to a local stub whose
+prices move on every request.
+"""
+
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_upstream import StubUpstream
+
+from app import create_app
+from app.api.crypto_api import CryptoAPI
+from app.api.utils.cache import set_cache
+from app.api.utils.cache_backends import TTLCache
+from app.ticker import PriceTicker
+import app.routes.crypto as crypto_routes
+
+COINS = [f'coin-{i}' for i in range(50)]
+
+
+def moving_prices():
+    """Stub handler whose prices change on every call"""
+    tick = [0]
+    lock = threading.Lock()
+
+    def handler(path, query):
+        with lock:
+            tick[0] += 1
+            current = tick[0]
+        ids = query.get('ids', [''])[0].split(',')
+        currencies = query.get('vs_currencies', ['usd'])[0].split(',')
+        return {
+            coin: {currency: 100.0 + i + current / 100 for currency in currencies}
+            for i, coin in enumerate(ids)
+        }
+    return handler
+
+
+def polling(app, stub, watchlists, rounds):
+    client_local = threading.local()
+
+    def tab(coins):
+        client = getattr(client_local, 'client', None)
+        if client is None:
+            client = client_local.client = app.test_client()
+        response = client.get('/crypto/api/prices?coins=' + ','.join(coins))
+        assert response.status_code == 200
+
+    timings = []
+    hits_before = stub.hits
+    cpu_before = time.process_time()
+    with ThreadPoolExecutor(32) as pool:
+        for _ in range(rounds):
+            set_cache(TTLCache())
+            started = time.perf_counter()
+            list(pool.map(tab, watchlists))
+            timings.append(time.perf_counter() - started)
+    return {
+        'server_requests': len(watchlists) * rounds,
+        'upstream_calls': stub.hits - hits_before,
+        'cpu_s': time.process_time() - cpu_before,
+        'round_s': sum(timings) / rounds
+    }
+
+
+def streaming(app, stub, watchlists, rounds):
+    api = CryptoAPI()
+    api.base_url = stub.url
+    # Ticks are driven by hand below, so the background poller never fires
+    ticker = PriceTicker('usd', interval=3600, api=api)
+    subscribers = [ticker.subscribe(coins, app=app) for coins in watchlists]
+    delivered = [0]
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def consume(subscriber):
+        while not stop.is_set():
+            updates = subscriber.wait(0.1)
+            if updates:
+                with lock:
+                    delivered[0] += 1
+
+    consumers = [threading.Thread(target=consume, args=(s,), daemon=True) for s in subscribers]
+    for thread in consumers:
+        thread.start()
+    time.sleep(0.5)
+
+    timings = []
+    hits_before = stub.hits
+    delivered_before = delivered[0]
+    cpu_before = time.process_time()
+    for _ in range(rounds):
+        set_cache(TTLCache())
+        started = time.perf_counter()
+        with app.app_context():
+            ticker.poll()
+        # Wait until every subscriber has picked up this tick
+        while delivered[0] - delivered_before < len(subscribers) * (len(timings) + 1):
+            time.sleep(0.001)
+        timings.append(time.perf_counter() - started)
+    cpu = time.process_time() - cpu_before
+
+    stop.set()
+    for subscriber in subscribers:
+        ticker.unsubscribe(subscriber)
+    return {
+        'server_requests': 0,
+        'upstream_calls': stub.hits - hits_before,
+        'cpu_s': cpu,
+        'round_s': sum(timings) / rounds
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--subscribers', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--coins-per-tab', type=int, default=5)
+    parser.add_argument('--delay', type=float, default=0.05, help='stub upstream latency (s)')
+    args = parser.parse_args()
+
+    random.seed(1)
+    watchlists = [random.sample(COINS, args.coins_per_tab) for _ in range(args.subscribers)]
+    app = create_app()
+
+    with StubUpstream(delay=args.delay, handler=moving_prices()) as stub:
+        crypto_routes.crypto_api.base_url = stub.url
+        results = {
+            'polling': polling(app, stub, watchlists, args.rounds),
+            'sse ticker': streaming(app, stub, watchlists, args.rounds),
+        }
+
+    print(f"{args.subscribers} subscribers x {args.rounds} refreshes, "
+          f"{args.coins_per_tab} of {len(COINS)} coins each, upstream delay {args.delay * 1000:.0f}ms")
+    print(f"{'model':<12} {'requests':>9} {'upstream':>9} {'cpu s':>7} {'per refresh':>12}")
+    for name, result in results.items():
+        print(f"{name:<12} {result['server_requests']:>9} {result['upstream_calls']:>9} "
+              f"{result['cpu_s']:>7.2f} {result['round_s'] * 1000:>10.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Stub Upstream
+Local HTTP server that imitates the upstream APIs with a configurable delay
+"""
+
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+
+def default_handler(path, query):
+    """Return a small CoinGecko-like payload for any path"""
+    ids = query.get('ids', ['bitcoin'])[0].split(',')
+    currencies = query.get('vs_currencies', ['usd'])[0].split(',')
+    return {
+        coin: {currency: 100.0 + i for currency in currencies}
+        for i, coin in enumerate(ids)
+    }
+
+
+class _StubServer(ThreadingHTTPServer):
+    # Deep accept backlog for benchmark bursts; set here, not on the stdlib class
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class StubUpstream:
+    """Threaded keep-alive HTTP server answering every GET after `delay` seconds"""
+
+    def __init__(self, delay=0.1, handler=None):
+        self.delay = delay
+        self.handler = handler or default_handler
+        self.hits = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.hits += 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+                parsed = urlparse(self.path)
+                body = json.dumps(stub.handler(parsed.path, parse_qs(parsed.query))).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = _StubServer(('127.0.0.1', 0), Handler)
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server.server_port}'
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -18,6 +18,160 @@ class Config:
     CRYPTO_API_KEY = os.getenv("CRYPTO_API_KEY")
     GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 
+    # Shared HTTP transport (connection pools per upstream host)
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", 10))
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 20))
+    HTTP_ASYNC_MAX_CONNECTIONS = int(os.getenv("HTTP_ASYNC_MAX_CONNECTIONS", 100))
+
+    # Provider cache: backend ('memory', 'sqlite' or 'redis' - the last two are
+    # shared by all gunicorn workers), byte cap and per-data-type TTLs (seconds)
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "/tmp/flask-dashboard-cache.sqlite3")
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 32 * 1024 * 1024))
+    CACHE_TTLS = {
+        'crypto_prices': 30,
+        'crypto_coin': 120,
+        'crypto_top': 60,
+        'crypto_chart': 300,
+        'crypto_trending': 300,
+        'weather_current': 600,
+        'weather_forecast': 1800,
+        'news_headlines': 300,
+        'news_search': 600,
+        'news_sources': 3600,
+        'github_search': 600
+    }
+    # How long past its TTL an entry may still be served while it is refreshed
+    CACHE_MAX_STALE = {
+        'crypto_prices': 120,
+        'crypto_coin': 600,
+        'crypto_top': 300,
+        'crypto_chart': 900,
+        'crypto_trending': 900,
+        'weather_current': 1800,
+        'weather_forecast': 3600,
+        'news_headlines': 900,
+        'news_search': 1800,
+        'news_sources': 86400,
+        'github_search': 1800
+    }
+
+    # Browser/CDN freshness (seconds) for JSON endpoints, by longest path
+    # prefix; /aio/... paths share the table. Matches the provider cache
+    # TTLs, counted from when the served data was fetched (sent as Age)
+    HTTP_CACHE_MAX_AGE = {
+        '/dashboard/data': 30,
+        '/crypto/api/prices': 30,
+        '/crypto/api/top': 60,
+        '/crypto/api/coin': 120,
+        '/crypto/api/trending': 300,
+        '/crypto/api/chart': 300,
+        '/crypto/api/indicators': 300,
+        '/news/api/headlines': 300,
+        '/news/api/search': 600,
+        '/news/api/sources': 3600,
+        '/news/api/categories': 86400,
+        '/weather/api/current': 600,
+        '/weather/api/forecast': 1800,
+        '/weather/api/batch': 600,
+        '/github/api/trending': 600,
+        '/github/api/search': 600,
+        '/github/api/repo': 300
+    }
+
+    # gzip/brotli for text responses of at least COMPRESS_MIN_SIZE bytes
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+    COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", 4))
+
+    # Low-priority calls (warm-ups, background refreshes) stop below this
+    # share of an upstream's remaining quota; GitHub validators kept this long
+    RATE_LIMIT_RESERVE_PCT = int(os.getenv("RATE_LIMIT_RESERVE_PCT", 25))
+    GITHUB_VALIDATOR_TTL = int(os.getenv("GITHUB_VALIDATOR_TTL", 86400))
+
+    # Full repository report: pages of 100 items per listing, overall deadline
+    GITHUB_REPORT_MAX_PAGES = int(os.getenv("GITHUB_REPORT_MAX_PAGES", 5))
+    GITHUB_REPORT_DEADLINE = int(os.getenv("GITHUB_REPORT_DEADLINE", 30))
+
+    # Pages of 100 items fetched per listing in one sync of a tracked repo
+    GITHUB_SYNC_MAX_PAGES = int(os.getenv("GITHUB_SYNC_MAX_PAGES", 10))
+    # Only repositories saved by users are synced, the most saved first; a
+    # repository can be synced on demand at most once per MIN_INTERVAL seconds.
+    # Listings are answered locally while the last sync is under MAX_AGE old
+    GITHUB_SYNC_MAX_REPOS = int(os.getenv("GITHUB_SYNC_MAX_REPOS", 50))
+    GITHUB_SYNC_MIN_INTERVAL = int(os.getenv("GITHUB_SYNC_MIN_INTERVAL", 300))
+    GITHUB_SYNC_MAX_AGE = int(os.getenv("GITHUB_SYNC_MAX_AGE", 3600))
+
+    # Window for merging concurrent CoinGecko price lookups into one call, and
+    # how long past the window a caller waits for the merged call's result
+    CRYPTO_BATCH_WINDOW_MS = int(os.getenv("CRYPTO_BATCH_WINDOW_MS", 30))
+    CRYPTO_BATCH_MAX_IDS = int(os.getenv("CRYPTO_BATCH_MAX_IDS", 250))
+    CRYPTO_BATCH_TIMEOUT = int(os.getenv("CRYPTO_BATCH_TIMEOUT", 15))
+
+    # Local full-text news index (SQLite FTS5): searches are answered locally
+    # when it has at least NEWS_INDEX_MIN_RESULTS matches, the newest no older
+    # than NEWS_INDEX_MAX_AGE_HOURS; relevance is divided by
+    # 1 + age / NEWS_INDEX_RECENCY_DAYS
+    NEWS_INDEX_ENABLED = os.getenv("NEWS_INDEX_ENABLED", "true").lower() == "true"
+    NEWS_INDEX_LANGUAGE = os.getenv("NEWS_INDEX_LANGUAGE", "en")
+    NEWS_INDEX_MIN_RESULTS = int(os.getenv("NEWS_INDEX_MIN_RESULTS", 5))
+    NEWS_INDEX_MAX_AGE_HOURS = int(os.getenv("NEWS_INDEX_MAX_AGE_HOURS", 24))
+    NEWS_INDEX_RECENCY_DAYS = float(os.getenv("NEWS_INDEX_RECENCY_DAYS", 3))
+
+    # Background ingestion of every category's top headlines into the news
+    # store; /news/api/headlines is served from the store while the last run
+    # is younger than NEWS_INGEST_MAX_AGE seconds. Each run makes one call per
+    # country, category and page; the interval is stretched when needed so
+    # runs spend at most NEWS_INGEST_QUOTA_SHARE of NEWS_DAILY_QUOTA (NewsAPI
+    # developer plan: 100 requests a day). Defaults: 7 calls every 3 hours,
+    # 56 a day
+    NEWS_CATEGORIES = ['business', 'entertainment', 'general', 'health', 'science', 'sports', 'technology']
+    NEWS_INGEST_COUNTRIES = os.getenv("NEWS_INGEST_COUNTRIES", "us")
+    NEWS_DAILY_QUOTA = int(os.getenv("NEWS_DAILY_QUOTA", 100))
+    NEWS_INGEST_QUOTA_SHARE = float(os.getenv("NEWS_INGEST_QUOTA_SHARE", 0.6))
+    NEWS_INGEST_INTERVAL = int(os.getenv("NEWS_INGEST_INTERVAL", 10800))
+    NEWS_INGEST_MAX_AGE = int(os.getenv("NEWS_INGEST_MAX_AGE", 21600))
+    NEWS_INGEST_MAX_PAGES = int(os.getenv("NEWS_INGEST_MAX_PAGES", 1))
+    NEWS_STORE_RETENTION_DAYS = int(os.getenv("NEWS_STORE_RETENTION_DAYS", 7))
+
+    # Most distinct cities accepted by one /weather/api/batch request
+    WEATHER_BATCH_MAX_CITIES = int(os.getenv("WEATHER_BATCH_MAX_CITIES", 50))
+
+    # Seconds between polls of the shared SSE price ticker
+    CRYPTO_TICKER_INTERVAL = int(os.getenv("CRYPTO_TICKER_INTERVAL", 15))
+
+    # Seconds between evaluations of the active price alerts
+    PRICE_ALERT_INTERVAL = int(os.getenv("PRICE_ALERT_INTERVAL", 30))
+    # Seconds between full reloads of the alert book, which pick up alerts
+    # edited, re-activated or deleted by other workers
+    PRICE_ALERT_RECONCILE = int(os.getenv("PRICE_ALERT_RECONCILE", 300))
+
+    # Seconds between revaluations of every user's holdings in one pass
+    PORTFOLIO_VALUATION_INTERVAL = int(os.getenv("PORTFOLIO_VALUATION_INTERVAL", 60))
+
+    # Shared secret for the /internal endpoints (X-Internal-Token header);
+    # they are disabled while it is unset
+    INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+
+    # Background warm-up scheduler. One leader per node (local lock file):
+    # disable it on all but one node of a multi-node deployment. Cache
+    # warm-ups need a shared CACHE_BACKEND, or SCHEDULER_WARM_MEMORY_CACHE for
+    # a single-process server
+    SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+    SCHEDULER_WARM_MEMORY_CACHE = os.getenv("SCHEDULER_WARM_MEMORY_CACHE", "false").lower() == "true"
+    SCHEDULER_JITTER = int(os.getenv("SCHEDULER_JITTER", 5))
+    SCHEDULER_LOCK_FILE = os.getenv("SCHEDULER_LOCK_FILE", "/tmp/flask-dashboard-scheduler.lock")
+    SCHEDULER_LEADER_RETRY = int(os.getenv("SCHEDULER_LEADER_RETRY", 60))
+
+    # Per-source deadlines (seconds) for /dashboard/data
+    DASHBOARD_DEADLINES = {
+        'news': float(os.getenv("DASHBOARD_NEWS_DEADLINE", 4)),
+        'weather': float(os.getenv("DASHBOARD_WEATHER_DEADLINE", 3)),
+        'crypto': float(os.getenv("DASHBOARD_CRYPTO_DEADLINE", 3)),
+        'github': float(os.getenv("DASHBOARD_GITHUB_DEADLINE", 5))
+    }
+
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
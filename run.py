@@ -3,6 +3,7 @@ Flask API Dashboard - Main Application Entry Point
 """
 from app import create_app, db
 from app.models import User, SavedArticle, CryptoHolding
+from app.scheduler import init_scheduler
 import os
 
 # ✅ Fixed line — no config argument needed
@@ -38,8 +39,12 @@ def seed_db():
     print("✅ Database seeded!")
 
 if __name__ == '__main__':
+    debug = os.getenv('FLASK_ENV') == 'development'
+    # With the debug reloader only the child process serves requests
+    if not debug or os.getenv('WERKZEUG_RUN_MAIN') == 'true':
+        init_scheduler(app)
     app.run(
         host='0.0.0.0',
         port=int(os.getenv('PORT', 5000)),
-        debug=os.getenv('FLASK_ENV') == 'development'
+        debug=debug
     )
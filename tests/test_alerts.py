@@ -0,0 +1,171 @@
+"""
+Tests for the in-memory price alert book and its database sync
+"""
+import random
+import unittest
+
+from app import create_app, db
+from app.models import User, PriceAlert
+from app.alerts import AlertBook, Triggered, get_alert_book, mark_triggered
+
+
+def scan(alerts, prices):
+    """Brute force: every live alert whose condition the new prices meet"""
+    fired = {}
+    for alert_id, (coin_id, condition, target) in alerts.items():
+        price = prices.get(coin_id)
+        if price is None:
+            continue
+        if (condition == 'above' and target <= price) or (condition == 'below' and target >= price):
+            fired[alert_id] = (target, condition)
+    for alert_id in fired:
+        del alerts[alert_id]
+    return fired
+
+
+def fired_by(triggered):
+    return {int(alert_id): (float(target), str(condition))
+            for alert_id, target, condition in zip(*triggered)}
+
+
+class AlertBookTest(unittest.TestCase):
+
+    COINS = ('bitcoin', 'ethereum', 'solana')
+
+    def random_alert(self, rng):
+        # Few distinct targets so equal targets and prices are common
+        return rng.choice(self.COINS), rng.choice(('above', 'below')), float(rng.randint(90, 110))
+
+    def test_tick_matches_a_brute_force_scan(self):
+        rng = random.Random(7)
+        for _ in range(25):
+            book, alerts, next_id = AlertBook(), {}, 1
+            for _ in range(40):
+                # New alerts and discards interleaved with price ticks
+                rows = []
+                for _ in range(rng.randint(0, 8)):
+                    alerts[next_id] = self.random_alert(rng)
+                    rows.append((next_id, *alerts[next_id]))
+                    next_id += 1
+                book.add(rows)
+                if alerts and rng.random() < 0.3:
+                    alert_id = rng.choice(list(alerts))
+                    del alerts[alert_id]
+                    self.assertTrue(book.discard(alert_id))
+
+                prices = {coin: float(rng.randint(88, 112))
+                          for coin in rng.sample(self.COINS, rng.randint(1, 3))}
+                self.assertEqual(fired_by(book.tick(prices)), scan(alerts, prices))
+                self.assertEqual(len(book), len(alerts))
+
+    def test_alert_at_the_price_triggers_for_both_conditions(self):
+        book = AlertBook()
+        book.add([(1, 'bitcoin', 'above', 100.0), (2, 'bitcoin', 'below', 100.0)])
+        self.assertEqual(fired_by(book.tick({'bitcoin': 100.0})),
+                         {1: (100.0, 'above'), 2: (100.0, 'below')})
+
+    def test_triggered_alerts_leave_the_book(self):
+        book = AlertBook()
+        book.add([(1, 'bitcoin', 'above', 100.0)])
+        self.assertEqual(len(book.tick({'bitcoin': 150.0}).ids), 1)
+        self.assertEqual(len(book.tick({'bitcoin': 150.0}).ids), 0)
+        self.assertEqual(book.coins(), [])
+        self.assertEqual(book.stats()['triggered'], 1)
+
+    def test_invalid_rows_and_missing_prices_are_skipped(self):
+        book = AlertBook()
+        self.assertEqual(book.add([(1, 'bitcoin', 'sideways', 1.0), (2, 'bitcoin', 'above', None),
+                                   (3, 'bitcoin', 'above', 1.0)]), 1)
+        self.assertEqual(len(book.tick({'bitcoin': None}).ids), 0)
+        self.assertEqual(book.coins(), ['bitcoin'])
+
+    def test_discard_of_an_unknown_alert(self):
+        book = AlertBook()
+        book.add([(1, 'bitcoin', 'above', 100.0)])
+        self.assertFalse(book.discard(2))
+        self.assertTrue(book.discard(1))
+        self.assertFalse(book.discard(1))
+        self.assertEqual(len(book.tick({'bitcoin': 200.0}).ids), 0)
+
+
+class AlertBookDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.context = self.app.app_context()
+        self.context.push()
+        db.drop_all()
+        db.create_all()
+        self.user = User(username='alerts', email='alerts@example.com', password_hash='x')
+        db.session.add(self.user)
+        db.session.commit()
+        self.book = get_alert_book()
+        self.book.reset()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.book.reset()
+        self.context.pop()
+
+    def alert(self, target, condition='above', coin_id='bitcoin', **fields):
+        alert = PriceAlert(user_id=self.user.id, coin_id=coin_id, coin_symbol=coin_id[:3],
+                           target_price=target, condition=condition, **fields)
+        db.session.add(alert)
+        db.session.commit()
+        return alert
+
+    def test_refresh_indexes_new_active_alerts(self):
+        reconciles = self.book.reconciles
+        self.alert(100.0)
+        self.alert(90.0, is_active=False)
+        self.assertEqual(self.book.refresh(), 1)
+        self.alert(110.0, 'below', 'ethereum')
+        self.assertEqual(self.book.refresh(), 1)
+        self.assertEqual(self.book.coins(), ['bitcoin', 'ethereum'])
+        # Only the first refresh rebuilt the book
+        self.assertEqual(self.book.reconciles, reconciles + 1)
+
+    def test_orm_edits_and_deletes_apply_on_commit(self):
+        moved, deleted = self.alert(100.0), self.alert(100.0)
+        self.book.refresh()
+        moved.target_price = 200.0
+        db.session.delete(deleted)
+        db.session.commit()
+        self.assertEqual(fired_by(self.book.tick({'bitcoin': 150.0})), {})
+        self.assertEqual(fired_by(self.book.tick({'bitcoin': 250.0})), {moved.id: (200.0, 'above')})
+
+    def test_reconcile_picks_up_changes_made_elsewhere(self):
+        edited, removed = self.alert(100.0), self.alert(100.0)
+        revived = self.alert(100.0, is_active=False)
+        self.book.refresh()
+        reconciles = self.book.reconciles
+        # Bypass the ORM events, as another process would
+        table = PriceAlert.__table__
+        db.session.execute(table.update().where(table.c.id == edited.id).values(target_price=300.0))
+        db.session.execute(table.delete().where(table.c.id == removed.id))
+        db.session.execute(table.update().where(table.c.id == revived.id).values(is_active=True))
+        db.session.commit()
+
+        self.book.refresh(reconcile_every=0)
+        self.assertEqual(self.book.reconciles, reconciles + 1)
+        self.assertEqual(fired_by(self.book.tick({'bitcoin': 150.0})), {revived.id: (100.0, 'above')})
+        self.assertEqual(len(self.book), 1)
+
+    def test_mark_triggered_skips_alerts_changed_since_they_fired(self):
+        fired, edited, paused = self.alert(100.0), self.alert(100.0), self.alert(100.0)
+        triggered = Triggered([fired.id, edited.id, paused.id], [100.0] * 3, ['above'] * 3)
+        table = PriceAlert.__table__
+        db.session.execute(table.update().where(table.c.id == edited.id).values(target_price=120.0))
+        db.session.execute(table.update().where(table.c.id == paused.id).values(is_active=False))
+        db.session.commit()
+
+        self.assertEqual(mark_triggered(triggered), 1)
+        self.assertEqual(mark_triggered(triggered), 0)
+        db.session.expire_all()
+        self.assertTrue(db.session.get(PriceAlert, fired.id).triggered)
+        self.assertFalse(db.session.get(PriceAlert, edited.id).triggered)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+"""
+Tests for micro-batching of price lookups
+"""
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from app.api.utils.batching import PriceBatcher
+
+
+class PriceBatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fetches = []
+
+    def fetch(self, ids, currencies):
+        self.fetches.append((ids, currencies))
+        return {coin: {currency: 1.0 for currency in currencies} for coin in ids}
+
+    async def fetch_async(self, ids, currencies):
+        await asyncio.sleep(0.01)
+        return self.fetch(ids, currencies)
+
+    def run_threads(self, lookups, batcher, fetch=None):
+        results = [None] * len(lookups)
+
+        def worker(i, coin_ids, currency):
+            try:
+                results[i] = batcher.get(coin_ids, currency, fetch or self.fetch)
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=worker, args=(i, *lookup))
+                   for i, lookup in enumerate(lookups)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_lookups_within_the_window_share_one_fetch(self):
+        batcher = PriceBatcher(window=0.1)
+        results = self.run_threads([(['bitcoin'], 'usd'), (['ethereum'], 'eur'),
+                                    (['bitcoin', 'solana'], 'usd')], batcher)
+        self.assertEqual(len(self.fetches), 1)
+        self.assertEqual(self.fetches[0], (['bitcoin', 'ethereum', 'solana'], ['eur', 'usd']))
+        self.assertEqual(batcher.stats()['lookups'], 3)
+        self.assertEqual(batcher.stats()['upstream_calls'], 1)
+        # Each caller receives only the coins it asked for
+        self.assertEqual([sorted(result) for result in results],
+                         [['bitcoin'], ['ethereum'], ['bitcoin', 'solana']])
+
+    def test_lookups_in_separate_windows_fetch_separately(self):
+        batcher = PriceBatcher(window=0.01)
+        batcher.get(['bitcoin'], 'usd', self.fetch)
+        batcher.get(['bitcoin'], 'usd', self.fetch)
+        self.assertEqual(len(self.fetches), 2)
+
+    def test_full_batch_is_closed_early(self):
+        batcher = PriceBatcher(window=0.3, max_ids=3)
+        started = time.perf_counter()
+        self.run_threads([(['a', 'b'], 'usd'), (['c'], 'usd'), (['d'], 'usd')], batcher)
+        self.assertEqual(sorted(ids for ids, _ in self.fetches), [['a', 'b', 'c'], ['d']])
+        # The full batch did not hold its callers for longer than its window
+        self.assertLess(time.perf_counter() - started, 1)
+
+    def test_lookup_that_would_overflow_starts_a_new_batch(self):
+        batcher = PriceBatcher(window=0.1, max_ids=3)
+        self.run_threads([(['a', 'b'], 'usd'), (['c', 'd'], 'usd')], batcher)
+        self.assertEqual(sorted(ids for ids, _ in self.fetches), [['a', 'b'], ['c', 'd']])
+
+    def test_fetch_error_is_shared_by_the_batch(self):
+        error = RuntimeError('upstream down')
+
+        def fetch(ids, currencies):
+            self.fetches.append(ids)
+            raise error
+
+        results = self.run_threads([(['a'], 'usd'), (['b'], 'usd')],
+                                   PriceBatcher(window=0.1), fetch)
+        self.assertEqual(results, [error, error])
+        self.assertEqual(len(self.fetches), 1)
+
+    def test_follower_wait_is_bounded(self):
+        batcher = PriceBatcher(window=0.01, timeout=0.1)
+        release = threading.Event()
+
+        def fetch(ids, currencies):
+            release.wait(2)
+            return self.fetch(ids, currencies)
+
+        leader = threading.Thread(target=batcher.get, args=(['a'], 'usd', fetch))
+        leader.start()
+        try:
+            started = time.perf_counter()
+            with self.assertRaises(FutureTimeout):
+                batcher.get(['a'], 'usd', fetch)
+            self.assertLess(time.perf_counter() - started, 1)
+        finally:
+            release.set()
+            leader.join(2)
+
+    def test_async_lookups_share_one_fetch(self):
+        batcher = PriceBatcher(window=0.05)
+
+        async def main():
+            return await asyncio.gather(
+                batcher.get_async(['bitcoin'], 'usd', self.fetch_async),
+                batcher.get_async(['ethereum'], 'usd', self.fetch_async))
+
+        first, second = asyncio.run(main())
+        self.assertEqual(list(first), ['bitcoin'])
+        self.assertEqual(list(second), ['ethereum'])
+        self.assertEqual(len(self.fetches), 1)
+
+    def test_cancelled_async_leader_still_serves_its_followers(self):
+        batcher = PriceBatcher(window=0.05)
+
+        async def main():
+            leader = asyncio.create_task(batcher.get_async(['a'], 'usd', self.fetch_async))
+            await asyncio.sleep(0.01)
+            follower = asyncio.create_task(batcher.get_async(['b'], 'usd', self.fetch_async))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            return await asyncio.wait_for(follower, 2), leader.cancelled()
+
+        result, cancelled = asyncio.run(main())
+        self.assertTrue(cancelled)
+        self.assertEqual(result, {'b': {'usd': 1.0}})
+        # The abandoned batch never fetched; the follower led a new one
+        self.assertEqual(self.fetches, [(['b'], ['usd'])])
+
+    def test_cancelled_async_follower_does_not_cancel_the_batch(self):
+        batcher = PriceBatcher(window=0.05)
+
+        async def main():
+            leader = asyncio.create_task(batcher.get_async(['a'], 'usd', self.fetch_async))
+            await asyncio.sleep(0.01)
+            follower = asyncio.create_task(batcher.get_async(['b'], 'usd', self.fetch_async))
+            await asyncio.sleep(0.01)
+            follower.cancel()
+            return await leader
+
+        self.assertEqual(asyncio.run(main()), {'a': {'usd': 1.0}})
+        self.assertEqual(self.fetches, [(['a', 'b'], ['usd'])])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+"""
+Tests for the shared cache backends and their cross-worker compute lock
+"""
+import fnmatch
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from app.api.utils.cache_backends import SQLiteCache, RedisCache
+
+
+class FakeRedis:
+    """In-memory stand-in for the few redis-py calls RedisCache makes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def _live(self, key):
+        item = self._data.get(key)
+        if item is not None and item[1] is not None and item[1] <= time.time():
+            del self._data[key]
+            item = None
+        return item
+
+    def get(self, key):
+        with self._lock:
+            item = self._live(key)
+            return item[0] if item else None
+
+    def set(self, key, value, nx=False, px=None):
+        with self._lock:
+            if nx and self._live(key) is not None:
+                return None
+            self._data[key] = (value, time.time() + px / 1000 if px else None)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def scan_iter(self, match='*'):
+        with self._lock:
+            return [key for key in self._data if fnmatch.fnmatchcase(key, match)]
+
+
+class BackendTests:
+    """Checks every shared backend must pass; mixed into a TestCase per backend"""
+
+    def make_cache(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.cache = self.make_cache()
+        self.calls = 0
+
+    def test_round_trip(self):
+        value = {'bitcoin': {'usd': 100.5}, 'list': [1, 2, 3]}
+        self.cache.set('k', value, ttl=60)
+        self.assertEqual(self.cache.get('k'), (True, value))
+        self.cache.delete('k')
+        self.assertEqual(self.cache.get('k'), (False, None))
+
+    def test_entry_expires_after_ttl_and_max_stale(self):
+        self.cache.set('k', 'v', ttl=0.05, max_stale=0.1)
+        time.sleep(0.08)
+        self.assertEqual(self.cache.lookup('k')[0], 'stale')
+        time.sleep(0.1)
+        self.assertEqual(self.cache.lookup('k')[0], 'miss')
+
+    def test_clear_removes_every_entry(self):
+        self.cache.set('a', 1, ttl=60)
+        self.cache.set('b', 2, ttl=60)
+        self.cache.clear()
+        self.assertEqual(self.cache.lookup('a')[0], 'miss')
+        self.assertEqual(self.cache.lookup('b')[0], 'miss')
+
+    def compute(self):
+        self.calls += 1
+        time.sleep(0.2)
+        return 'computed'
+
+    def store(self, value):
+        self.cache.set('k', value, ttl=60)
+        return value
+
+    def test_concurrent_misses_compute_once(self):
+        results = []
+
+        def worker():
+            results.append(self.cache.get_or_compute('k', self.compute, self.store))
+
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(results, ['computed'] * 6)
+        self.assertEqual(self.calls, 1)
+
+    def test_lock_is_exclusive_until_released(self):
+        self.assertTrue(self.cache._try_lock('k', 5))
+        self.assertFalse(self.cache._try_lock('k', 5))
+        self.cache._unlock('k')
+        self.assertTrue(self.cache._try_lock('k', 5))
+
+    def test_lock_of_a_dead_holder_expires(self):
+        self.assertTrue(self.cache._try_lock('k', 0.1))
+        time.sleep(0.15)
+        self.assertTrue(self.cache._try_lock('k', 5))
+
+    def test_waiter_computes_itself_after_lock_timeout(self):
+        # Another worker holds the lock and never stores a value
+        self.cache._try_lock('k', 5)
+        started = time.perf_counter()
+        value = self.cache.get_or_compute('k', lambda: 'mine', self.store, lock_timeout=0.2)
+        self.assertEqual(value, 'mine')
+        self.assertLess(time.perf_counter() - started, 1)
+
+
+class SQLiteCacheTest(BackendTests, unittest.TestCase):
+
+    def make_cache(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        return SQLiteCache(os.path.join(self.tmpdir, 'cache.db'))
+
+    def test_entries_are_shared_between_instances(self):
+        other = SQLiteCache(self.cache.path)
+        self.cache.set('k', 'v', ttl=60)
+        self.assertEqual(other.get('k'), (True, 'v'))
+        self.assertTrue(self.cache._try_lock('k', 5))
+        self.assertFalse(other._try_lock('k', 5))
+
+    def test_least_recently_used_entries_are_evicted_over_the_byte_cap(self):
+        cache = SQLiteCache(os.path.join(self.tmpdir, 'small.db'), max_bytes=3000)
+        for key in 'abcd':
+            cache.set(key, 'x' * 800, ttl=60)
+        self.assertEqual(cache.lookup('a')[0], 'miss')
+        self.assertLessEqual(cache.stats()['bytes'], 3000)
+
+
+class RedisCacheTest(BackendTests, unittest.TestCase):
+
+    def make_cache(self):
+        self.client = FakeRedis()
+        return RedisCache(client=self.client, prefix='test:')
+
+    def test_keys_carry_the_prefix_and_a_server_ttl(self):
+        self.cache.set('k', 'v', ttl=1, max_stale=1)
+        expires = self.client._data['test:k'][1]
+        self.assertAlmostEqual(expires - time.time(), 2, delta=0.2)
+
+    def test_clear_leaves_other_prefixes_alone(self):
+        self.client.set('other:k', b'v')
+        self.cache.set('k', 'v', ttl=60)
+        self.cache.clear()
+        self.assertEqual(self.client.get('other:k'), b'v')
+
+
+if __name__ == '__main__':
+    unittest.main()
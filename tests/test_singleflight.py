@@ -0,0 +1,146 @@
+"""
+Tests for single-flight request coalescing
+"""
+import asyncio
+import threading
+import time
+import unittest
+
+from app.api.utils.singleflight import SingleFlight
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.calls = 0
+
+    def run_threads(self, count, target):
+        results = [None] * count
+
+        def worker(i):
+            try:
+                results[i] = target()
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_concurrent_callers_share_one_result(self):
+        def fn():
+            self.calls += 1
+            time.sleep(0.1)
+            return 'value'
+
+        results = self.run_threads(8, lambda: self.flight.do('k', fn))
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.flight.stats(), {'in_flight': 0, 'executions': 1, 'collapsed': 7})
+
+    def test_concurrent_callers_share_one_exception(self):
+        error = RuntimeError('upstream down')
+
+        def fn():
+            self.calls += 1
+            time.sleep(0.1)
+            raise error
+
+        results = self.run_threads(5, lambda: self.flight.do('k', fn))
+        self.assertTrue(all(result is error for result in results))
+        self.assertEqual(self.calls, 1)
+
+    def test_different_keys_run_separately(self):
+        def fn():
+            self.calls += 1
+            time.sleep(0.05)
+            return self.calls
+
+        self.run_threads(2, lambda: self.flight.do(threading.current_thread().name, fn))
+        self.assertEqual(self.calls, 2)
+
+    def test_finished_key_runs_again(self):
+        self.assertEqual(self.flight.do('k', lambda: 1), 1)
+        self.assertEqual(self.flight.do('k', lambda: 2), 2)
+
+    def test_async_callers_share_one_result(self):
+        async def fn():
+            self.calls += 1
+            await asyncio.sleep(0.05)
+            return 'value'
+
+        async def main():
+            return await asyncio.gather(*(self.flight.do_async('k', fn) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(main()), ['value'] * 5)
+        self.assertEqual(self.calls, 1)
+
+    def test_cancelled_async_leader_hands_over_to_a_follower(self):
+        async def fn():
+            self.calls += 1
+            await asyncio.sleep(0.1)
+            return self.calls
+
+        async def main():
+            leader = asyncio.create_task(self.flight.do_async('k', fn))
+            await asyncio.sleep(0.01)
+            followers = [asyncio.create_task(self.flight.do_async('k', fn)) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            results = await asyncio.gather(*followers)
+            return leader.cancelled(), results
+
+        cancelled, results = asyncio.run(main())
+        self.assertTrue(cancelled)
+        # One follower took over; the others joined its call
+        self.assertEqual(results, [2, 2, 2])
+        self.assertEqual(self.calls, 2)
+
+    def test_cancelled_async_leader_does_not_fail_sync_followers(self):
+        started = threading.Event()
+        results = []
+
+        async def fn():
+            self.calls += 1
+            started.set()
+            await asyncio.sleep(0.2)
+            return 'value'
+
+        async def main():
+            leader = asyncio.create_task(self.flight.do_async('k', fn))
+            await asyncio.to_thread(started.wait, 2)
+            follower = threading.Thread(
+                target=lambda: results.append(self.flight.do('k', lambda: 'sync')))
+            follower.start()
+            await asyncio.sleep(0.05)
+            leader.cancel()
+            await asyncio.to_thread(follower.join, 2)
+
+        asyncio.run(main())
+        self.assertEqual(results, ['sync'])
+
+    def test_cancelled_async_follower_does_not_cancel_the_call(self):
+        async def fn():
+            self.calls += 1
+            await asyncio.sleep(0.1)
+            return 'value'
+
+        async def main():
+            leader = asyncio.create_task(self.flight.do_async('k', fn))
+            await asyncio.sleep(0.01)
+            quitter = asyncio.create_task(self.flight.do_async('k', fn))
+            other = asyncio.create_task(self.flight.do_async('k', fn))
+            await asyncio.sleep(0.01)
+            quitter.cancel()
+            return await leader, await other, quitter.cancelled()
+
+        self.assertEqual(asyncio.run(main()), ('value', 'value', True))
+        self.assertEqual(self.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
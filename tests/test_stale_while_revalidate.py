@@ -0,0 +1,106 @@
+"""
+Tests for serving stale cache entries while they are refreshed
+"""
+import asyncio
+import threading
+import time
+import unittest
+
+from app.api.utils.cache import cached, set_cache, get_cache, track_cache_lookups
+from app.api.utils.cache_backends import TTLCache
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        if time.time() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class StaleWhileRevalidateTest(unittest.TestCase):
+
+    def setUp(self):
+        set_cache(TTLCache())
+        self.calls = 0
+
+    def test_stale_entry_is_served_while_one_refresh_runs(self):
+        release = threading.Event()
+
+        @cached('test_swr', ttl=0.05, max_stale=10)
+        def lookup(key):
+            self.calls += 1
+            if self.calls > 1:
+                release.wait(2)
+            return self.calls
+
+        self.assertEqual(lookup('x'), 1)
+        time.sleep(0.1)
+
+        # Every caller gets the stale value at once; only one refresh starts
+        started = time.perf_counter()
+        self.assertEqual([lookup('x') for _ in range(5)], [1] * 5)
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertTrue(wait_for(lambda: self.calls == 2))
+
+        release.set()
+        self.assertTrue(wait_for(lambda: get_cache().lookup('test_swr:{"key": "x"}')[0] == 'fresh'))
+        self.assertEqual(lookup('x'), 2)
+        self.assertEqual(self.calls, 2)
+
+    def test_entry_past_max_stale_blocks_on_the_upstream(self):
+        @cached('test_swr_expired', ttl=0.05, max_stale=0.05)
+        def lookup(key):
+            self.calls += 1
+            return self.calls
+
+        lookup('x')
+        time.sleep(0.15)
+        self.assertEqual(lookup('x'), 2)
+
+    def test_failed_refresh_keeps_the_stale_entry(self):
+        @cached('test_swr_failure', ttl=0.05, max_stale=10)
+        def lookup(key):
+            self.calls += 1
+            if self.calls > 1:
+                raise RuntimeError('upstream down')
+            return 'old'
+
+        lookup('x')
+        time.sleep(0.1)
+        self.assertEqual(lookup('x'), 'old')
+        self.assertTrue(wait_for(lambda: self.calls == 2))
+        time.sleep(0.05)
+        self.assertEqual(lookup('x'), 'old')
+
+    def test_lookups_report_the_age_of_stale_data(self):
+        @cached('test_swr_age', ttl=0.05, max_stale=10)
+        def lookup(key):
+            return 'value'
+
+        lookup('x')
+        time.sleep(0.2)
+        lookups = track_cache_lookups()
+        lookup('x')
+        self.assertTrue(lookups['stale'])
+        self.assertGreaterEqual(lookups['age'], 0.1)
+
+    def test_async_methods_share_the_behaviour(self):
+        @cached('test_swr_async', ttl=0.05, max_stale=10)
+        async def lookup(key):
+            self.calls += 1
+            return self.calls
+
+        async def main():
+            first = await lookup('x')
+            await asyncio.sleep(0.1)
+            return first, await lookup('x')
+
+        self.assertEqual(asyncio.run(main()), (1, 1))
+        self.assertTrue(wait_for(lambda: self.calls == 2))
+        self.assertTrue(wait_for(lambda: asyncio.run(lookup('x')) == 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
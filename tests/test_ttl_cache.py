@@ -0,0 +1,91 @@
+"""
+Tests for the in-process TTL cache and the @cached decorator
+"""
+import time
+import unittest
+
+from app.api.utils.cache import cached, set_cache, get_cache
+from app.api.utils.cache_backends import TTLCache
+
+
+class TTLCacheTest(unittest.TestCase):
+
+    def test_entry_is_fresh_until_its_ttl(self):
+        cache = TTLCache()
+        cache.set('k', {'v': 1}, ttl=0.1)
+        self.assertEqual(cache.get('k'), (True, {'v': 1}))
+        time.sleep(0.15)
+        self.assertEqual(cache.lookup('k')[0], 'miss')
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+    def test_expired_entry_is_stale_within_max_stale(self):
+        cache = TTLCache()
+        cache.set('k', 'v', ttl=0.05, max_stale=10)
+        time.sleep(0.1)
+        state, entry = cache.lookup('k')
+        self.assertEqual(state, 'stale')
+        self.assertEqual(entry.value, 'v')
+        # Stale entries are not hits
+        self.assertEqual(cache.get('k'), (False, None))
+
+    def test_least_recently_used_entries_are_evicted_over_the_byte_cap(self):
+        cache = TTLCache(max_bytes=3000)
+        for key in 'abc':
+            cache.set(key, 'x' * 800, ttl=60)
+        cache.get('a')
+        cache.set('d', 'x' * 800, ttl=60)
+        self.assertEqual(cache.lookup('b')[0], 'miss')
+        for key in 'acd':
+            self.assertEqual(cache.lookup(key)[0], 'fresh')
+        self.assertLessEqual(cache.stats()['bytes'], 3000)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_value_larger_than_the_cap_is_not_stored(self):
+        cache = TTLCache(max_bytes=100)
+        self.assertFalse(cache.set('k', 'x' * 1000, ttl=60))
+        self.assertEqual(cache.lookup('k')[0], 'miss')
+
+
+class CachedDecoratorTest(unittest.TestCase):
+
+    def setUp(self):
+        set_cache(TTLCache())
+        self.calls = []
+
+    def test_equal_normalized_arguments_share_an_entry(self):
+        @cached('test_prices', ttl=60, normalize={'ids': lambda ids: sorted(ids)})
+        def prices(ids, currency='usd'):
+            self.calls.append(ids)
+            return {coin: 1.0 for coin in ids}
+
+        prices(['b', 'a'])
+        prices(['a', 'b'], currency='usd')
+        self.assertEqual(len(self.calls), 1)
+        prices(['a', 'b'], 'eur')
+        self.assertEqual(len(self.calls), 2)
+
+    def test_empty_results_are_not_cached(self):
+        @cached('test_empty', ttl=60)
+        def lookup(key):
+            self.calls.append(key)
+            return {}
+
+        lookup('x')
+        lookup('x')
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(get_cache().stats()['entries'], 0)
+
+    def test_expired_entry_is_computed_again(self):
+        @cached('test_expiry', ttl=0.05)
+        def lookup(key):
+            self.calls.append(key)
+            return len(self.calls)
+
+        self.assertEqual(lookup('x'), 1)
+        self.assertEqual(lookup('x'), 1)
+        time.sleep(0.1)
+        self.assertEqual(lookup('x'), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
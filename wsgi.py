@@ -0,0 +1,10 @@
+"""
+WSGI entry point for production servers, e.g. gunicorn "wsgi:app".
+Unlike importing run.py, it also starts the background scheduler; the
+workers elect one leader per node between them.
+"""
+from app import create_app
+from app.scheduler import init_scheduler
+
+app = create_app()
+init_scheduler(app)